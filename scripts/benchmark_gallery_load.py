@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Gallery Load Benchmark
+Compares startup load time of the old pickle dict with the
+memory-mapped FaceDatabase gallery (keys JSON + .npy matrix).
+
+Usage:
+    python scripts/benchmark_gallery_load.py [--students 20000]
+"""
+
+import sys
+import os
+import io
+import time
+import pickle
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from core.database import FaceDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gallery load time")
+    parser.add_argument("--students", type=int, default=20000, help="Gallery size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = {f"{i}_Student_{i}": rng.standard_normal(512).astype(np.float32) for i in range(args.students)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "face_encodings.pkl")
+        gallery_path = os.path.join(tmp, "face_gallery.json")
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(data, f)
+
+        # First load runs the one-shot migration
+        with contextlib.redirect_stdout(io.StringIO()):
+            FaceDatabase(db_path=gallery_path, legacy_path=pickle_path)
+
+        start = time.perf_counter()
+        with open(pickle_path, 'rb') as f:
+            pickle.load(f)
+        pickle_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = FaceDatabase(db_path=gallery_path)
+        keys, matrix = db.get_gallery_matrix()
+        gallery_ms = (time.perf_counter() - start) * 1000
+        shape = matrix.shape
+        # Release the memmap so the temp dir can be removed on Windows
+        del db, keys, matrix
+
+    print("=" * 60)
+    print(f"Gallery load benchmark ({args.students} students)")
+    print("=" * 60)
+    print(f"  Pickle dict load : {pickle_ms:8.2f} ms")
+    print(f"  Gallery (mmap)   : {gallery_ms:8.2f} ms  -> matrix {shape}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+Cold import time of the recognition modules, each in a fresh interpreter,
+next to insightface (which core/detector.py used to import for SCRFD) and
+onnxruntime (the floor every model path pays).
+
+Usage:
+    python scripts/benchmark_import.py [--repeats 5]
+"""
+
+import sys
+import os
+import argparse
+import subprocess
+
+SRC_DIR = os.path.join(os.getcwd(), "src")
+
+MODULES = [
+    "onnxruntime",
+    "insightface",
+    "core.scrfd",
+    "core.detector",
+    "core.embedder",
+    "face_recognition_module",
+]
+
+SNIPPET = (
+    "import sys, time; sys.path.insert(0, {src!r}); "
+    "start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start); "
+    "print(int('insightface' in sys.modules))"
+)
+
+
+def import_time(module, repeats):
+    """Best cold import time (ms) and whether insightface got imported; None if not importable."""
+    best, pulled = float("inf"), False
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(src=SRC_DIR, module=module)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return None, False
+        seconds, loaded = proc.stdout.split()[-2:]
+        best = min(best, float(seconds) * 1000)
+        pulled = loaded == "1"
+    return best, pulled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of the recognition modules")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Import time benchmark (best of {args.repeats} fresh interpreters)")
+    print("=" * 60)
+    print(f"{'Module':<26} {'Import (ms)':>12} {'insightface loaded':>20}")
+    for module in MODULES:
+        ms, pulled = import_time(module, args.repeats)
+        if ms is None:
+            print(f"{module:<26} {'not installed':>12}")
+            continue
+        print(f"{module:<26} {ms:>12.1f} {'yes' if pulled else 'no':>20}")
+
+
+if __name__ == "__main__":
+    main()
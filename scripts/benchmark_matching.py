@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Gallery Matching Benchmark
+Compares the old per-student Python loop with the matrix-based
+FaceDatabase.find_best_matches used by recognize_faces.
+
+Usage:
+    python scripts/benchmark_matching.py [--faces 60] [--repeats 5]
+"""
+
+import sys
+import os
+import io
+import time
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from core.database import FaceDatabase
+
+EMBEDDING_DIM = 512
+GALLERY_SIZES = [100, 1000, 10000]
+
+
+def random_embeddings(rng, count):
+    """Random unit-length embeddings."""
+    embs = rng.standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    return embs / np.linalg.norm(embs, axis=1, keepdims=True)
+
+
+def loop_match(query_embs, all_students):
+    """Previous recognize_faces matching: one Python-level dot product per pair."""
+    results = []
+    for query_emb in query_embs:
+        best_name = None
+        best_sim = -1.0
+        for name, db_emb in all_students.items():
+            sim = np.dot(query_emb, db_emb) / (np.linalg.norm(query_emb) * np.linalg.norm(db_emb) + 1e-10)
+            if sim > best_sim:
+                best_sim = sim
+                best_name = name
+        results.append((best_name, best_sim))
+    return results
+
+
+def time_it(func, repeats):
+    """Best wall time (ms) over several runs."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gallery matching")
+    parser.add_argument("--faces", type=int, default=60, help="Detected faces per frame")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_embeddings(rng, args.faces)
+
+    print("=" * 60)
+    print(f"Gallery matching benchmark ({args.faces} faces per frame)")
+    print("=" * 60)
+    print(f"{'Students':>10} {'Loop (ms)':>12} {'Matrix (ms)':>12} {'Speedup':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in GALLERY_SIZES:
+            embs = random_embeddings(rng, size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                db = FaceDatabase(db_path=os.path.join(tmp, f"bench_{size}.json"))
+                for i, emb in enumerate(embs):
+                    db.add_student(name=f"Student_{i}", roll=str(i), embedding=emb)
+            all_students = db.get_all_students()
+
+            # Both paths must agree before timing means anything
+            loop_names = [name for name, _ in loop_match(queries[:5], all_students)]
+            matrix_names, _ = db.find_best_matches(queries[:5])
+            if loop_names != matrix_names:
+                print(f"  [FAIL] Results differ at {size} students")
+                sys.exit(1)
+
+            # Loop timing at 10k is slow, so a single run is enough there
+            loop_repeats = 1 if size >= 10000 else args.repeats
+            loop_ms = time_it(lambda: loop_match(queries, all_students), loop_repeats)
+            matrix_ms = time_it(lambda: db.find_best_matches(queries), args.repeats)
+            print(f"{size:>10} {loop_ms:>12.2f} {matrix_ms:>12.2f} {loop_ms / matrix_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
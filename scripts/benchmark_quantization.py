@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Quantization Benchmark
+Compares the fp32 and int8 SCRFD/ArcFace models on the student dataset:
+embedding cosine agreement, match-decision agreement at SIMILARITY_THRESHOLD,
+detection agreement and per-image / per-face latency.
+
+Match decisions use a leave-one-out gallery: every face is matched against
+the mean embedding of each student folder (its own image excluded), once
+with fp32 and once with int8 embeddings.
+
+Usage:
+    python scripts/benchmark_quantization.py [--mode static|dynamic] [--limit 200] [--threshold 0.55]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import cv2
+import numpy as np
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def best_of(func, repeats):
+    """Best wall time (ms) over several runs, plus the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def box_agreement(reference, other, iou_threshold=0.5):
+    """Fraction of reference boxes that other also found (IoU >= threshold)."""
+    if len(reference) == 0:
+        return 1.0 if len(other) == 0 else 0.0
+    if len(other) == 0:
+        return 0.0
+    a, b = np.asarray(reference)[:, None, :4], np.asarray(other)[None, :, :4]
+    w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = w * h
+    area = lambda x: (x[..., 2] - x[..., 0]) * (x[..., 3] - x[..., 1])
+    iou = inter / (area(a) + area(b) - inter)
+    return float(np.mean(iou.max(axis=1) >= iou_threshold))
+
+
+def loo_decisions(embeddings, labels, threshold):
+    """Best-matching folder per face against leave-one-out folder means (None below threshold)."""
+    names = sorted(set(labels))
+    index = np.array([names.index(label) for label in labels])
+    sums = np.zeros((len(names), embeddings.shape[1]), dtype=np.float32)
+    np.add.at(sums, index, embeddings)
+    counts = np.bincount(index, minlength=len(names)).astype(np.float32)
+
+    decisions = []
+    for emb, own in zip(embeddings, index):
+        centroids = sums.copy()
+        centroids[own] -= emb
+        valid = counts.copy()
+        valid[own] -= 1
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-10)
+        scores = np.where(valid > 0, centroids @ emb, -1.0)
+        best = int(np.argmax(scores))
+        decisions.append(names[best] if scores[best] >= threshold else None)
+    return decisions
+
+
+def main():
+    from core.alignment import align_faces
+    from core.detector import FaceDetector
+    from core.embedder import FaceEmbedder
+    from core.quantize import QUANTIZATION_MODES, calibration_images, quantized_path
+    from core.session import SessionFactory
+    from config import STUDENT_DATASET_DIR, SIMILARITY_THRESHOLD, QUANTIZATION_MODE
+
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 models")
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default=QUANTIZATION_MODE, help="int8 variant to test")
+    parser.add_argument("--limit", type=int, default=200, help="Dataset images to use")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD, help="Match threshold")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per latency measurement")
+    args = parser.parse_args()
+
+    for model in ("./models/buffalo_l/det_10g.onnx", "./models/buffalo_l/w600k_r50.onnx"):
+        if not quantized_path(model, args.mode).exists():
+            print(f"[FAIL] {quantized_path(model, args.mode)} missing, run scripts/quantize_models.py --mode {args.mode}")
+            sys.exit(1)
+
+    images = calibration_images(STUDENT_DATASET_DIR, args.limit)
+    if not images:
+        print(f"[FAIL] No images in {STUDENT_DATASET_DIR}")
+        sys.exit(1)
+
+    factory = SessionFactory(opencv_threads=-1)
+    detectors = {"fp32": FaceDetector(session_factory=factory),
+                 "int8": FaceDetector(session_factory=factory, quantization=args.mode)}
+    embedders = {"fp32": FaceEmbedder(session_factory=factory),
+                 "int8": FaceEmbedder(session_factory=factory, quantization=args.mode)}
+    for precision in ("fp32", "int8"):
+        detectors[precision].warmup()
+        embedders[precision].warmup()
+
+    # Detection: latency per image and box agreement; fp32 aligned faces feed the embedder comparison
+    detect_ms = {"fp32": [], "int8": []}
+    agreement, faces, labels = [], [], []
+    for path in images:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        boxes = {}
+        for precision, detector in detectors.items():
+            ms, boxes[precision] = best_of(lambda: detector.detect_raw(image, tiled=False)[0], args.repeats)
+            detect_ms[precision].append(ms)
+        agreement.append(box_agreement(boxes["fp32"], boxes["int8"]))
+        bboxes, kpss = detectors["fp32"].detect(image, tiled=False)
+        faces.append(align_faces(image, kpss, bboxes))
+        labels.extend([os.path.basename(os.path.dirname(path))] * len(bboxes))
+
+    faces = np.concatenate(faces) if faces else np.zeros((0, 112, 112, 3), dtype=np.uint8)
+    if len(faces) == 0:
+        print("[FAIL] No faces detected in the dataset images")
+        sys.exit(1)
+
+    # Embedding: latency per face over one batched pass, then agreement
+    embed_ms, embeddings = {}, {}
+    for precision, embedder in embedders.items():
+        ms, result = best_of(lambda: embedder.get_embeddings_aligned(faces), args.repeats)
+        embed_ms[precision] = ms / len(faces)
+        embeddings[precision] = np.asarray(result, dtype=np.float32)
+
+    cosine = np.sum(embeddings["fp32"] * embeddings["int8"], axis=1)
+    decisions = {p: loo_decisions(embeddings[p], labels, args.threshold) for p in embeddings}
+    decision_agreement = np.mean([a == b for a, b in zip(decisions["fp32"], decisions["int8"])])
+    accuracy = {p: np.mean([d == label for d, label in zip(decisions[p], labels)]) for p in decisions}
+
+    print("=" * 60)
+    print(f"Quantization benchmark: fp32 vs int8-{args.mode} "
+          f"({len(images)} images, {len(faces)} faces, threshold {args.threshold})")
+    print("=" * 60)
+    print(f"  Embedding cosine (fp32 vs int8) : mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+    print(f"  Match-decision agreement        : {decision_agreement * 100:6.2f}%")
+    print(f"  Leave-one-out accuracy          : fp32 {accuracy['fp32'] * 100:6.2f}%, "
+          f"int8 {accuracy['int8'] * 100:6.2f}%")
+    print(f"  Detection agreement (IoU>=0.5)  : {np.mean(agreement) * 100:6.2f}%")
+    print()
+    print(f"{'Latency':<26} {'fp32 (ms)':>12} {'int8 (ms)':>12} {'Speedup':>9}")
+    for name, fp32_ms, int8_ms in (
+        ("Detection / image", np.mean(detect_ms["fp32"]), np.mean(detect_ms["int8"])),
+        ("Embedding / face", embed_ms["fp32"], embed_ms["int8"]),
+    ):
+        print(f"{name:<26} {fp32_ms:>12.2f} {int8_ms:>12.2f} {fp32_ms / int8_ms:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
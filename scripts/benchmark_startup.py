@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures time-to-first-recognition: import, engine init, warmup and the
+first recognize_faces call, the same order the app goes through at launch.
+
+Usage:
+    python scripts/benchmark_startup.py [--image path/to/photo.jpg] [--retrain]
+
+--retrain also times train_face_encodings, which the app used to run on
+every launch, for comparison.
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def find_sample_image(dataset_dir):
+    """First image in the student dataset, if any."""
+    for root, _, files in os.walk(dataset_dir):
+        for f in sorted(files):
+            if f.lower().endswith((".jpg", ".jpeg", ".png")):
+                return os.path.join(root, f)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time-to-first-recognition")
+    parser.add_argument("--image", help="Image to recognize (default: first dataset image)")
+    parser.add_argument("--retrain", action="store_true", help="Also time train_face_encodings (old warmup)")
+    args = parser.parse_args()
+
+    steps = []
+    t0 = time.perf_counter()
+
+    start = time.perf_counter()
+    from face_recognition_module import FaceRecognitionModule
+    from config import STUDENT_DATASET_DIR
+    steps.append(("Import", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    fr = FaceRecognitionModule()
+    steps.append(("Engine init (gallery load)", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    timings = fr.warmup()
+    steps.append(("Warmup (models in parallel)", time.perf_counter() - start))
+
+    image_path = args.image or find_sample_image(STUDENT_DATASET_DIR)
+    if image_path:
+        start = time.perf_counter()
+        fr.recognize_faces(image_path)
+        steps.append(("First recognition", time.perf_counter() - start))
+    else:
+        print("[WARN] No image found, skipping first recognition")
+
+    total = time.perf_counter() - t0
+
+    print("=" * 60)
+    print("Startup benchmark")
+    print("=" * 60)
+    for name, seconds in steps:
+        print(f"  {name:<30} {seconds * 1000:10.1f} ms")
+    print(f"  {'Time to first recognition':<30} {total * 1000:10.1f} ms")
+    print()
+    print("  Warmup breakdown:")
+    for name, seconds in timings.items():
+        print(f"    {name:<28} {seconds * 1000:10.1f} ms")
+
+    if args.retrain:
+        start = time.perf_counter()
+        fr.train_face_encodings()
+        print()
+        print(f"  {'Retrain (old warmup)':<30} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Optimize ONNX Models
+One-time step that saves the optimized SCRFD/ArcFace graphs next to the
+originals (<model>.opt.onnx + .opt.json with the source hash), then compares
+session creation time from the original model against the pre-optimized one.
+
+Usage:
+    python scripts/optimize_models.py [--models a.onnx b.onnx] [--force] [--repeats 3]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+logging.basicConfig(level=logging.WARNING)
+
+DEFAULT_MODELS = [
+    "./models/buffalo_l/det_10g.onnx",
+    "./models/buffalo_l/w600k_r50.onnx",
+]
+
+
+def best_of(func, repeats):
+    """Best wall time (ms) over several runs."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save pre-optimized ONNX models and time session creation")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS, help="ONNX models to optimize")
+    parser.add_argument("--force", action="store_true", help="Rebuild artifacts even if they are current")
+    parser.add_argument("--repeats", type=int, default=3, help="Session creations per measurement")
+    args = parser.parse_args()
+
+    from core.session import SessionFactory
+    from config import (ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS, ORT_EXECUTION_MODE,
+                        ORT_GRAPH_OPTIMIZATION, USE_GPU)
+
+    settings = dict(intra_op_threads=ORT_INTRA_OP_THREADS, inter_op_threads=ORT_INTER_OP_THREADS,
+                    execution_mode=ORT_EXECUTION_MODE, optimization_level=ORT_GRAPH_OPTIMIZATION,
+                    use_gpu=USE_GPU, opencv_threads=-1)
+    original = SessionFactory(cache_optimized=False, **settings)
+    cached = SessionFactory(cache_optimized=True, **settings)
+
+    print("=" * 60)
+    print("Pre-optimized model benchmark")
+    print("=" * 60)
+    print(f"{'Model':<22} {'Artifact':>10} {'Original (ms)':>15} {'Pre-opt (ms)':>14} {'Speedup':>8}")
+
+    for model in args.models:
+        if not os.path.exists(model):
+            print(f"[WARN] {model} not found, skipping")
+            continue
+        written = cached.optimize(model, force=args.force)
+        # Same hash check the app does, so the timing includes it
+        original_ms = best_of(lambda: original.create(model), args.repeats)
+        cached_ms = best_of(lambda: cached.create(model), args.repeats)
+        print(f"{os.path.basename(model):<22} {'written' if written else 'current':>10} "
+              f"{original_ms:>15.1f} {cached_ms:>14.1f} {original_ms / cached_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Quantize Models
+Builds the int8 SCRFD/ArcFace variants used when MODEL_PRECISION = 'int8'.
+Static mode calibrates activation ranges on images from STUDENT_DATASET_DIR
+(full letterboxed photos for SCRFD, aligned detected faces for ArcFace).
+Needs the 'onnx' package (only for this step, not for the app).
+
+Usage:
+    python scripts/quantize_models.py [--mode static|dynamic] [--models detector embedder] [--limit 200]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import cv2
+
+# Setup path: add src to path
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+DETECTOR_MODEL = "./models/buffalo_l/det_10g.onnx"
+EMBEDDER_MODEL = "./models/buffalo_l/w600k_r50.onnx"
+
+
+def detector_calibration(images):
+    """SCRFD inputs: each photo letterboxed to the prepared input size."""
+    from core.detector import DETECTOR_INPUT_SIZE
+    from core.scrfd import letterbox, to_blob
+    for path in images:
+        image = cv2.imread(path)
+        if image is not None:
+            yield to_blob(letterbox(image, DETECTOR_INPUT_SIZE)[0])
+
+
+def embedder_calibration(images):
+    """ArcFace inputs: every face the fp32 detector finds, aligned and preprocessed like at runtime."""
+    from core.alignment import align_faces
+    from core.detector import FaceDetector
+    from core.embedder import FaceEmbedder
+    detector = FaceDetector()
+    for path in images:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        bboxes, kpss = detector.detect(image, tiled=False)
+        aligned = align_faces(image, kpss, bboxes)
+        for i in range(len(aligned)):
+            yield FaceEmbedder._preprocess_aligned(aligned[i:i + 1])
+
+
+def main():
+    from core.quantize import QUANTIZATION_MODES, CALIBRATION_METHODS, calibration_images, quantize_model
+    from config import STUDENT_DATASET_DIR, QUANTIZATION_MODE
+
+    parser = argparse.ArgumentParser(description="Build int8 variants of the detector and embedder")
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default=QUANTIZATION_MODE, help="Quantization mode")
+    parser.add_argument("--models", nargs="+", choices=["detector", "embedder"], default=["detector", "embedder"])
+    parser.add_argument("--limit", type=int, default=200, help="Calibration images (static mode)")
+    parser.add_argument("--method", choices=CALIBRATION_METHODS, default="minmax", help="Calibration method")
+    parser.add_argument("--per-tensor", action="store_true", help="Per-tensor instead of per-channel weights")
+    args = parser.parse_args()
+
+    images = []
+    if args.mode == "static":
+        images = calibration_images(STUDENT_DATASET_DIR, args.limit)
+        if not images:
+            print(f"[FAIL] No calibration images in {STUDENT_DATASET_DIR}")
+            sys.exit(1)
+        print(f"Calibrating on {len(images)} images from {STUDENT_DATASET_DIR}")
+
+    jobs = {
+        "detector": (DETECTOR_MODEL, detector_calibration),
+        "embedder": (EMBEDDER_MODEL, embedder_calibration),
+    }
+    print("=" * 60)
+    for name in args.models:
+        model_path, calibration = jobs[name]
+        if not os.path.exists(model_path):
+            print(f"[FAIL] {model_path} not found")
+            continue
+        output = quantize_model(
+            model_path, mode=args.mode,
+            calibration=calibration(images) if args.mode == "static" else None,
+            per_channel=not args.per_tensor, calibrate_method=args.method,
+        )
+        print(f"[OK] {name}: {output}")
+
+
+if __name__ == "__main__":
+    main()
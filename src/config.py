@@ -22,13 +22,19 @@ STUDENT_DATASET_DIR = DATA_DIR / "student_dataset"
 REPORTS_DIR = DATA_DIR / "reports"
 LOGS_DIR = DATA_DIR / "logs"
 ENCODINGS_DIR = DATA_DIR / "encodings"
+PRESENCE_DIR = DATA_DIR / "presence"   # Har session ka presence ledger (bitsets)
 
 # Ensure directories exist
-for directory in [DATA_DIR, IMAGES_DIR, STUDENT_DATASET_DIR, REPORTS_DIR, LOGS_DIR, ENCODINGS_DIR]:
+for directory in [DATA_DIR, IMAGES_DIR, STUDENT_DATASET_DIR, REPORTS_DIR, LOGS_DIR, ENCODINGS_DIR, PRESENCE_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
 # File paths
+# Gallery: keys/metadata JSON + float32 embedding matrix (.npy, memory-mapped)
+GALLERY_FILE = ENCODINGS_DIR / "face_gallery.json"
+# Purana pickle database (sirf ek baar migrate karne ke liye)
 ENCODINGS_FILE = ENCODINGS_DIR / "face_encodings.pkl"
+# Har image ka embedding (path/size/mtime/hash ke saath) taaki retrain me sirf nayi images process ho
+TRAIN_MANIFEST_FILE = ENCODINGS_DIR / "train_manifest.json"
 
 # ====================================================================
 # CAMERA KI SETTING
@@ -39,6 +45,25 @@ CAMERA_WIDTH = 640
 CAMERA_HEIGHT = 480
 CAMERA_FPS = 30
 
+# Webcam ki jagah video file chalani ho (testing/demo) toh yaha path do, warna None
+CAMERA_SOURCE = None
+# Grabber thread kitne latest frames (timestamp ke saath) yaad rakhe
+FRAME_BUFFER_SIZE = 5
+
+# Live preview ke green dibbe (Haar cascade) - background me, chhote frame pe
+PREVIEW_DETECTION_FPS = 5       # Ek second me kitni baar detect kare
+PREVIEW_DETECTION_WIDTH = 320   # Detect karne se pehle frame ki width itni kar dete hai
+
+# Live analysis sirf tab jab scene badla ho (chhote frame ka difference, pichhle analysis se)
+MOTION_GATE_ENABLED = True
+MOTION_DETECTION_WIDTH = 160          # Compare karne se pehle frame ki width
+MOTION_PIXEL_THRESHOLD = 25           # Pixel ki brightness itni badle tab "badla" (0-255)
+MOTION_THRESHOLD = 0.02               # Interval pe itne fraction pixels badle tabhi analysis
+MOTION_EARLY_THRESHOLD = 0.10         # Itna bada badlaav ho toh interval ka wait nahi
+MOTION_MIN_GAP = 10                   # Seconds, early analyses ke beech kam se kam itna gap
+MOTION_FORCE_ANALYSIS_MINUTES = 10    # Scene same rahe tab bhi itne minute me ek analysis
+MOTION_CHECK_FPS = 5                  # Interval ke beech ek second me kitni baar check kare
+
 # Image capture settings
 IMAGE_FORMAT = "jpg"
 IMAGE_QUALITY = 95  # Quality mast honi chahiye
@@ -47,33 +72,119 @@ IMAGE_QUALITY = 95  # Quality mast honi chahiye
 # FACE RECOGNITION KI SETTING
 # ====================================================================
 
-# Face detection model: 'hog' (fast hai) ya 'cnn' (bhaari hai)
-FACE_DETECTION_MODEL = 'hog'
+# Recognition backend (detector aur embedder alag-alag chun sakte hai):
+#   DETECTOR_BACKEND: 'scrfd' (SCRFD-10G, accurate) ya 'yunet' (OpenCV YuNet, CPU pe kai guna fast)
+#   EMBEDDER_BACKEND: 'arcface' (ArcFace-R50, accurate) ya 'sface' (OpenCV SFace, CPU pe kai guna fast)
+# YuNet/SFace models ./models/opencv/ me rakho (opencv_zoo se download)
+# Embedder badla toh gallery dobara train hogi (alag model ke embeddings mix nahi hote)
+DETECTOR_BACKEND = 'scrfd'
+EMBEDDER_BACKEND = 'arcface'
 
 # Face recognition tolerance (jitna kam, utna strict, default: 0.6)
 FACE_RECOGNITION_TOLERANCE = 0.6
 
-# DeepFace Model: 'VGG-Face', 'Facenet', 'Facenet512', 'ArcFace'
-# VGG-Face is stable, Facenet512 crashes on this system
-DEEPFACE_MODEL = 'VGG-Face'
-
-# Similarity threshold for DeepFace cosine distance.
+# Similarity threshold for ArcFace cosine similarity.
 # For our custom multi-face engine:
 #   - 0.40–0.50 = very strict (only near-perfect matches)
 #   - 0.60–0.75 = practical for classroom / angle changes
 # Increase to 0.75 so group photos with different angles still match.
 SIMILARITY_THRESHOLD = 0.55
 
+# Har embedder ka apna threshold (SFace ke liye OpenCV ka recommended 0.363)
+SIMILARITY_THRESHOLDS = {
+    'arcface': SIMILARITY_THRESHOLD,
+    'sface': 0.363,
+}
+
 # Face encoding jitters
 FACE_ENCODING_JITTERS = 1
 
-# Detector backend: 'opencv' (Fastest), 'ssd' (Fast), 'retinaface' (Slow, Accurate)
-# Use 'retinaface' for much better detection in group photos (multiple faces, angles).
-FACE_DETECTOR_BACKEND = 'retinaface'
+# Face quality gate: jo chehre kabhi match ho hi nahi sakte unhe embed hi nahi karte
+# (crowded class me ArcFace ka kaam kaafi kam ho jata hai)
+FACE_QUALITY_GATE = True      # False = sirf quality record hogi, koi chehra skip nahi
 
-# Minimum face size (pixels me)
+# Minimum face size (pixels me, box ki chhoti side)
 MIN_FACE_SIZE = 50
 
+MIN_FACE_SHARPNESS = 30.0     # Aligned chehre pe Laplacian variance, isse kam = blurry
+MIN_FACE_SCORE = 0.6          # Detector ka score isse kam ho toh skip
+MAX_FACE_YAW = 45.0           # Degrees, isse zyada side me ghooma chehra skip (landmarks se)
+
+# Detector ka input image ke aspect ratio ke hisaab se (webcam 640x480 -> 640x480, padding nahi)
+DETECTION_MIN_INPUT_SIDE = 640     # Isse chhoti image upscale hogi
+DETECTION_MAX_INPUT_SIDE = 1280    # Uploads isse badi side pe downscale (tiling off ho tab)
+
+# Badi photos (lecture hall, phone ki 4000x3000) ko overlapping tiles me todke detect karte hai
+# taaki peeche wale chhote chehre 640px me squash hoke gayab na ho
+DETECTION_TILING = 'auto'          # 'off' = hamesha single pass, 'on' = hamesha tiles, 'auto' = badi image pe tiles
+DETECTION_TILE_SIZE = 1024         # Ek tile kitne pixel ka (har tile 640px pe chalti hai)
+DETECTION_TILE_OVERLAP = 192       # Tiles kitna overlap kare (sabse bade chehre se zyada rakho)
+DETECTION_TILING_MIN_SIDE = 1600   # 'auto' me image ki lambi side isse badi ho toh tiles
+
+# ArcFace ek baar me kitne chehre process karega (ek session.run me)
+EMBEDDING_BATCH_SIZE = 32
+
+# Same photo dobara upload ho toh detection + embedding dobara nahi (content hash se cache)
+RESULT_CACHE_MAX_ENTRIES = 32   # Kitni photos yaad rakhe (0 = cache band)
+RESULT_CACHE_MAX_MB = 32        # Cache ki max memory
+
+# Live feed me har chehre ka track banta hai aur pehchaan yaad rehti hai,
+# toh baithe hue students ko har tick pe dobara ArcFace se nahi guzarna padta
+TRACKER_IOU_THRESHOLD = 0.3            # Pichhle box se itna overlap ho toh same chehra
+TRACKER_CENTROID_THRESHOLD = 0.5       # Overlap kam ho toh center ki doori (chehre ki size ke fraction me)
+TRACKER_MAX_MISSES = 2                 # Itne ticks tak nahi dikha toh track khatam
+TRACKER_REVERIFY_SECONDS = 300         # Pehchane hue chehre ko itne seconds baad dobara verify
+TRACKER_UNKNOWN_REVERIFY_SECONDS = 60  # Unknown chehre ko jaldi dobara try karte hai
+TRACKER_MIN_CONFIDENCE = 0.6           # Track ka confidence (kamzor matching se girta hai) isse neeche toh dobara embed
+TRACKER_KALMAN = False                 # True = Kalman filter se agla box predict (chalte-firte log)
+
+# Session me har student kab-kab dikha (har tick ka ek bit), attendance_interval pe
+# isi se attendance: sirf 5 minute ke liye aaya toh Present nahi
+PRESENCE_TICK_SECONDS = 60          # Ek bit = itne seconds
+PRESENCE_MIN_DWELL_MINUTES = 20     # Kam se kam itne minute dikha tabhi Present
+PRESENCE_MIN_FRACTION = 0.5         # Session isse chhota ho toh observed time ka itna hissa chahiye
+PRESENCE_MAX_GAP_INTERVALS = 3      # Do samples ke beech itne analysis intervals se bada gap ho toh beech ka time count nahi
+
+# Capture burst ki saari photos milake ek attendance banti hai:
+#   'max'  = kisi bhi frame me match hua toh Present (confidence = best similarity)
+#   'vote' = kam se kam FUSION_MIN_VOTES frames me match chahiye (confidence = frames ka fraction)
+FUSION_MODE = 'max'
+FUSION_MIN_VOTES = 2
+
+# ====================================================================
+# ONNX RUNTIME SETTINGS (detector + embedder dono same settings se bante hai)
+# ====================================================================
+
+# Ek operator kitne threads pe chale (0 = aadhe cores)
+ORT_INTRA_OP_THREADS = 0
+
+# Operators ke beech threads (sirf 'parallel' mode me kaam aata hai)
+ORT_INTER_OP_THREADS = 1
+
+# 'sequential' = ek ke baad ek node (CNN ke liye best), 'parallel' = branches saath me
+ORT_EXECUTION_MODE = 'sequential'
+
+# Graph optimization: 'disable', 'basic', 'extended', 'all'
+ORT_GRAPH_OPTIMIZATION = 'all'
+
+# Memory arena aur memory pattern (fixed input size pe fast, thodi zyada RAM)
+ORT_ENABLE_MEM_ARENA = True
+ORT_ENABLE_MEM_PATTERN = True
+
+# Optimized graph ek baar save karke (<model>.opt.onnx) agli baar seedha load karte hai
+# Model file badli (hash alag) toh apne aap dobara banta hai
+ORT_CACHE_OPTIMIZED_MODELS = True
+
+# Model precision: 'fp32' (original) ya 'int8' (quantized, CPU laptops pe fast)
+# int8 models pehle scripts/quantize_models.py se banao, warna fp32 hi chalega
+# Accuracy/speed check: scripts/benchmark_quantization.py
+MODEL_PRECISION = 'fp32'
+QUANTIZATION_MODE = 'static'       # 'static' (calibrated, zyada fast) ya 'dynamic'
+
+# OpenCV ke threads (0 = jo cores ONNX Runtime nahi use kar raha, -1 = OpenCV default)
+# Dono apne-apne pool se saare cores maange toh oversubscription hota hai
+OPENCV_THREADS = 0
+
 # ====================================================================
 # EMOTION DETECTION KA JUGAD
 # ====================================================================
@@ -202,7 +313,12 @@ OVERLAY_TRANSPARENCY = 0.95
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
 
 # Performance
-MAX_WORKERS = 4  # Threading ke liye
+MAX_WORKERS = 4  # Threading ke liye (inference scheduler ke workers)
+
+# Inference queue: itne se zyada jobs pending ho toh purane live jobs drop
+INFERENCE_QUEUE_SIZE = 16
+# Live analysis ka job itne second se zyada wait kare toh bekaar hai, drop kar dete hai
+LIVE_JOB_MAX_AGE = 5.0
 
 # Session timeout (seconds)
 SESSION_TIMEOUT = 300
@@ -320,16 +436,37 @@ STATUS_ERROR = "Lagg gaye (Error)"
 __all__ = [
     # Directories
     'BASE_DIR', 'DATA_DIR', 'IMAGES_DIR', 'STUDENT_DATASET_DIR',
-    'REPORTS_DIR', 'LOGS_DIR', 'ENCODINGS_DIR', 'ENCODINGS_FILE',
+    'REPORTS_DIR', 'LOGS_DIR', 'ENCODINGS_DIR', 'ENCODINGS_FILE', 'GALLERY_FILE',
+    'TRAIN_MANIFEST_FILE', 'PRESENCE_DIR',
     
     # Camera
     'CAMERA_INDEX', 'CAMERA_WIDTH', 'CAMERA_HEIGHT', 'CAMERA_FPS',
+    'CAMERA_SOURCE', 'FRAME_BUFFER_SIZE',
+    'PREVIEW_DETECTION_FPS', 'PREVIEW_DETECTION_WIDTH',
+    'MOTION_GATE_ENABLED', 'MOTION_DETECTION_WIDTH', 'MOTION_PIXEL_THRESHOLD',
+    'MOTION_THRESHOLD', 'MOTION_EARLY_THRESHOLD', 'MOTION_MIN_GAP',
+    'MOTION_FORCE_ANALYSIS_MINUTES', 'MOTION_CHECK_FPS',
     'IMAGE_FORMAT', 'IMAGE_QUALITY',
     
     # Face Recognition
-    'FACE_DETECTION_MODEL', 'FACE_RECOGNITION_TOLERANCE',
-    'FACE_ENCODING_JITTERS', 'MIN_FACE_SIZE',
-    'FACE_DETECTOR_BACKEND', 'DEEPFACE_MODEL',
+    'DETECTOR_BACKEND', 'EMBEDDER_BACKEND', 'SIMILARITY_THRESHOLDS',
+    'FACE_RECOGNITION_TOLERANCE', 'FACE_ENCODING_JITTERS', 'MIN_FACE_SIZE',
+    'FACE_QUALITY_GATE', 'MIN_FACE_SHARPNESS', 'MIN_FACE_SCORE', 'MAX_FACE_YAW',
+    'EMBEDDING_BATCH_SIZE', 'RESULT_CACHE_MAX_ENTRIES', 'RESULT_CACHE_MAX_MB',
+    'FUSION_MODE', 'FUSION_MIN_VOTES',
+    'TRACKER_IOU_THRESHOLD', 'TRACKER_CENTROID_THRESHOLD', 'TRACKER_MAX_MISSES',
+    'TRACKER_REVERIFY_SECONDS', 'TRACKER_UNKNOWN_REVERIFY_SECONDS',
+    'TRACKER_MIN_CONFIDENCE', 'TRACKER_KALMAN',
+    'PRESENCE_TICK_SECONDS', 'PRESENCE_MIN_DWELL_MINUTES', 'PRESENCE_MIN_FRACTION',
+    'PRESENCE_MAX_GAP_INTERVALS',
+    'DETECTION_TILING', 'DETECTION_TILE_SIZE', 'DETECTION_TILE_OVERLAP',
+    'DETECTION_TILING_MIN_SIDE', 'DETECTION_MIN_INPUT_SIDE', 'DETECTION_MAX_INPUT_SIDE',
+    
+    # ONNX Runtime
+    'ORT_INTRA_OP_THREADS', 'ORT_INTER_OP_THREADS', 'ORT_EXECUTION_MODE',
+    'ORT_GRAPH_OPTIMIZATION', 'ORT_ENABLE_MEM_ARENA', 'ORT_ENABLE_MEM_PATTERN',
+    'ORT_CACHE_OPTIMIZED_MODELS', 'MODEL_PRECISION', 'QUANTIZATION_MODE',
+    'OPENCV_THREADS',
     
     # Emotion Detection
     'EMOTION_BACKEND', 'EMOTION_MODEL', 'EMOTIONS',
@@ -348,7 +485,8 @@ __all__ = [
     'DATA_RETENTION_DAYS', 'CLEANUP_DIRECTORIES', 'CLEANUP_FILE_EXTENSIONS',
     
     # System
-    'LOG_LEVEL', 'MAX_WORKERS', 'SESSION_TIMEOUT', 'AUTO_SAVE_INTERVAL',
+    'LOG_LEVEL', 'MAX_WORKERS', 'INFERENCE_QUEUE_SIZE', 'LIVE_JOB_MAX_AGE',
+    'SESSION_TIMEOUT', 'AUTO_SAVE_INTERVAL',
     
     # GUI
     'WINDOW_TITLE', 'WINDOW_WIDTH', 'WINDOW_HEIGHT', 'WINDOW_RESIZABLE',
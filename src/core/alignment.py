@@ -0,0 +1,93 @@
+"""
+Face Alignment Module
+Warps every face of a frame onto the 112x112 ArcFace landmark template in
+one pass, writing straight into a single (N, 112, 112, 3) buffer that the
+embedders consume as is (no per-face crop copies or resizes).
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+
+ALIGNED_SIZE = 112
+
+# Eye centers, nose tip and mouth corners of the 112x112 template that
+# ArcFace and SFace were trained on (same order as SCRFD/YuNet landmarks)
+ARCFACE_TEMPLATE = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041],
+], dtype=np.float32)
+
+
+def similarity_transforms(kpss: np.ndarray, template: np.ndarray = ARCFACE_TEMPLATE) -> np.ndarray:
+    """
+    Least-squares similarity transforms (rotation, uniform scale,
+    translation) from each face's landmarks to the template (Umeyama),
+    solved for all faces at once.
+
+    Args:
+        kpss: (N, 5, 2) landmarks in image coordinates
+        template: (5, 2) destination landmarks
+
+    Returns:
+        (N, 2, 3) affine matrices for cv2.warpAffine
+    """
+    src = np.asarray(kpss, dtype=np.float64)
+    dst = np.asarray(template, dtype=np.float64)
+    src_mean = src.mean(axis=1, keepdims=True)
+    dst_mean = dst.mean(axis=0)
+    src_d = src - src_mean
+    dst_d = dst - dst_mean
+
+    # Per face: covariance dst_d.T @ src_d / K
+    cov = np.einsum('kj,nki->nji', dst_d, src_d) / src.shape[1]
+    u, s, vt = np.linalg.svd(cov)
+    d = np.ones((len(src), 2))
+    d[np.linalg.det(cov) < 0, 1] = -1.0
+
+    rotation = u @ (d[:, :, None] * vt)
+    variance = np.maximum((src_d ** 2).sum(axis=(1, 2)) / src.shape[1], 1e-12)
+    scale = (s * d).sum(axis=1) / variance
+
+    matrices = np.empty((len(src), 2, 3), dtype=np.float64)
+    matrices[:, :, :2] = scale[:, None, None] * rotation
+    matrices[:, :, 2] = dst_mean - np.einsum('nij,nj->ni', matrices[:, :, :2], src_mean[:, 0])
+    return matrices
+
+
+def align_faces(image_bgr: np.ndarray, kpss: Optional[np.ndarray], bboxes: Optional[np.ndarray] = None,
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Warp all faces of one image into a (N, 112, 112, 3) buffer.
+
+    Args:
+        image_bgr: Source image
+        kpss: (N, 5, 2) landmarks; None falls back to resizing the bboxes
+            (detector graphs without keypoints)
+        bboxes: (N, >=4) boxes, needed only for the fallback
+        out: Preallocated uint8 buffer of shape (N, 112, 112, 3) (e.g. a
+            slice of a whole burst's buffer); allocated if None
+
+    Returns:
+        out, filled with BGR aligned faces
+    """
+    count = len(kpss) if kpss is not None else (0 if bboxes is None else len(bboxes))
+    if out is None:
+        out = np.empty((count, ALIGNED_SIZE, ALIGNED_SIZE, 3), dtype=np.uint8)
+    if count == 0:
+        return out
+
+    size = (ALIGNED_SIZE, ALIGNED_SIZE)
+    if kpss is not None:
+        for face, matrix in zip(out, similarity_transforms(kpss)):
+            cv2.warpAffine(image_bgr, matrix, size, dst=face, borderValue=0.0)
+    else:
+        h, w = image_bgr.shape[:2]
+        for face, box in zip(out, bboxes):
+            x1, y1 = max(0, int(box[0])), max(0, int(box[1]))
+            x2, y2 = min(w, int(box[2])), min(h, int(box[3]))
+            cv2.resize(image_bgr[y1:y2, x1:x2], size, dst=face)
+    return out
@@ -1,144 +1,520 @@
 """
 Database Module for storing face embeddings.
-Uses pickle for simple, efficient storage.
+Stores student keys in a small JSON file and all embeddings in one
+contiguous float32 .npy matrix that is memory-mapped at startup.
+
+Readers work on immutable, versioned GallerySnapshot objects; writers
+modify a private copy-on-write buffer and publish a new snapshot when
+they are done, so recognition never sees a half-updated gallery.
 """
+import json
+import os
 import pickle
+import threading
 import numpy as np
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bump when the on-disk layout changes
+DATABASE_FORMAT_VERSION = 1
+# Embedding backend of galleries saved before they were tagged (only
+# ArcFace existed then)
+UNTAGGED_BACKEND = "arcface_r50"
+
+
+class GallerySnapshot:
+    """Immutable gallery state (keys + embedding matrix) at one version."""
+
+    __slots__ = ("version", "keys", "matrix", "_index")
+
+    def __init__(self, version: int, keys: Sequence[str], matrix: np.ndarray):
+        """
+        Args:
+            version: Gallery version (same number as the on-disk generation
+                once saved)
+            keys: Student keys, keys[i] belongs to matrix[i]
+            matrix: (N, D) L2-normalized float32 embeddings. Never written
+                to after publishing
+        """
+        self.version = version
+        self.keys: Tuple[str, ...] = tuple(keys)
+        matrix = matrix[:len(self.keys)]
+        matrix.flags.writeable = False
+        self.matrix = matrix
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search_by_key(self, key: str) -> Optional[np.ndarray]:
+        """Embedding for key, or None if not enrolled in this version."""
+        i = self._index.get(key)
+        return None if i is None else self.matrix[i]
+
+    def find_best_matches(self, query_embeddings) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        Find the closest enrolled student for every query embedding.
+
+        All queries are scored against the gallery in a single
+        (faces x D) @ (D x students) product.
+
+        Args:
+            query_embeddings: Array-like of shape (N, D)
+
+        Returns:
+            (best_keys, best_sims): best student key per query (None if the
+            gallery is empty) and the matching cosine similarities
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+
+        if len(queries) == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        if not self.keys:
+            return [None] * len(queries), np.full(len(queries), -1.0, dtype=np.float32)
+
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-10)
+        sims = queries @ self.matrix.T
+        best_idx = sims.argmax(axis=1)
+        best_sims = sims[np.arange(len(queries)), best_idx]
+        return [self.keys[i] for i in best_idx], best_sims
+
 
 class FaceDatabase:
-    """Pickle-based face embedding database."""
-    
-    def __init__(self, db_path="database/students.pkl"):
+    """Matrix-backed face embedding database with copy-on-write snapshots."""
+
+    def __init__(self, db_path="database/students.json", legacy_path=None, backend=None):
         """
         Initialize database.
-        
+
         Args:
-            db_path: Path to pickle database file
+            db_path: Path to the gallery keys/metadata JSON file. Embedding
+                matrices are written next to it as <stem>_<generation>.npy
+            legacy_path: Optional old pickle database to migrate from when
+                no gallery exists yet
+            backend: backend_id of the embedder that fills this gallery. It
+                is saved with the gallery, and a gallery written by another
+                backend is not loaded (its embeddings are not comparable).
+                None accepts any gallery
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.data: Dict[str, np.ndarray] = {}
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.backend = backend
+        # backend_id of a gallery on disk that was skipped for not matching
+        self.mismatched_backend: Optional[str] = None
+
+        # Writer state. keys/_index/_buffer are the working copy; rows
+        # [0, len(keys)) of _buffer are valid. _buffer is a read-only memmap
+        # after load, or an over-allocated in-memory buffer once modified.
+        self.keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._buffer: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        # True while a published snapshot still views _buffer: existing rows
+        # must then be copied before they are overwritten
+        self._buffer_shared = False
+        self._generation = 0
+        self._matrix_file: Optional[str] = None
+
+        # Reader state: the published snapshot is swapped by reference only
+        self._lock = threading.RLock()
+        self._txn_depth = 0
+        self._unpublished = False
+        self._snapshot = GallerySnapshot(0, [], np.zeros((0, 0), dtype=np.float32))
         self.load_database()
-    
+
+    # -------------------- STORAGE --------------------
     def load_database(self):
-        """Load database from pickle file."""
+        """Load keys and memory-map the embedding matrix."""
+        with self._lock:
+            self._load_database()
+
+    def _load_database(self):
+        self._reset()
         if self.db_path.exists():
             try:
-                with open(self.db_path, 'rb') as f:
-                    self.data = pickle.load(f)
-                print(f"Loaded database with {len(self.data)} students")
+                with open(self.db_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                # Versions keep counting up even if this gallery is skipped
+                self._generation = int(meta.get("generation", 0))
+                stored_backend = meta.get("backend") or UNTAGGED_BACKEND
+                if self.backend is not None and stored_backend != self.backend:
+                    self.mismatched_backend = stored_backend
+                    raise ValueError(f"gallery was built with '{stored_backend}', "
+                                     f"current backend is '{self.backend}' (retrain needed)")
+                self.mismatched_backend = None
+                keys = list(meta.get("keys", []))
+                self._matrix_file = meta.get("matrix_file")
+
+                if keys:
+                    matrix_path = self.db_path.parent / self._matrix_file
+                    matrix = np.load(matrix_path, mmap_mode='r')
+                    if matrix.ndim != 2 or matrix.shape[0] != len(keys) or matrix.dtype != np.float32:
+                        raise ValueError(f"Embedding matrix {matrix_path.name} does not match {len(keys)} keys")
+                    self._buffer = matrix
+
+                self.keys = keys
+                self._index = {key: i for i, key in enumerate(keys)}
+                print(f"Loaded database with {len(self.keys)} students")
             except Exception as e:
                 print(f"Error loading database: {e}")
-                self.data = {}
+                self._reset()
+        elif self.legacy_path is not None and self.legacy_path.exists():
+            if self.backend in (None, UNTAGGED_BACKEND):
+                self.migrate_from_pickle(self.legacy_path)
+                return
+            # Old pickles hold embeddings of the untagged backend: report the
+            # mismatch so the gallery gets retrained instead of staying empty
+            self.mismatched_backend = UNTAGGED_BACKEND
+            print(f"Legacy database {self.legacy_path.name} was built with '{UNTAGGED_BACKEND}', "
+                  f"current backend is '{self.backend}' (retrain needed)")
         else:
-            self.data = {}
             print("Creating new database")
-    
+
+        # The loaded memmap is published as-is (zero copy)
+        self._publish(self._generation)
+
     def save_database(self):
-        """Save database to pickle file."""
+        """
+        Save the published gallery to disk.
+
+        Pending changes are published first (call this after a transaction,
+        not inside one). The matrix is only rewritten when the gallery
+        version changed. Each write goes to a new generation file and the
+        JSON is swapped last, so a crash never leaves keys pointing at a
+        half-written matrix and a file that is still memory-mapped is never
+        overwritten. The generation number is the snapshot version.
+        """
+        with self._lock:
+            self._save_database()
+
+    def _save_database(self):
         try:
-            with open(self.db_path, 'wb') as f:
-                pickle.dump(self.data, f)
-            print(f"Saved database with {len(self.data)} students")
+            snapshot = self.snapshot()
+            if snapshot.version != self._generation or (snapshot.keys and self._matrix_file is None):
+                self._generation = snapshot.version
+                matrix_file = f"{self.db_path.stem}_{self._generation:06d}.npy"
+                np.save(self.db_path.parent / matrix_file, np.ascontiguousarray(snapshot.matrix))
+                self._matrix_file = matrix_file
+
+            meta = {
+                "format": DATABASE_FORMAT_VERSION,
+                "backend": self.backend,
+                "generation": self._generation,
+                "matrix_file": self._matrix_file,
+                "dim": int(snapshot.matrix.shape[1]) if snapshot.matrix.ndim == 2 else 0,
+                "keys": list(snapshot.keys),
+            }
+            tmp_path = self.db_path.with_name(self.db_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self.db_path)
+            # The file on disk now belongs to this backend
+            self.mismatched_backend = None
+
+            self._remove_stale_matrices()
+            print(f"Saved database with {len(snapshot)} students (version {snapshot.version})")
         except Exception as e:
             print(f"Error saving database: {e}")
             raise
-    
+
+    def migrate_from_pickle(self, pickle_path) -> bool:
+        """
+        One-shot migration from the old Dict[str, np.ndarray] pickle.
+
+        The pickle is left untouched; once the new gallery exists it is
+        loaded instead.
+
+        Args:
+            pickle_path: Path to the old pickle database
+
+        Returns:
+            True if migrated, False otherwise
+        """
+        with self._lock:
+            try:
+                with open(pickle_path, 'rb') as f:
+                    data = pickle.load(f)
+
+                with self.transaction():
+                    self._reset()
+                    for key, embedding in data.items():
+                        self._set_row(key, embedding)
+                self.save_database()
+                print(f"Migrated {len(self.keys)} students from {Path(pickle_path).name}")
+                return True
+            except Exception as e:
+                print(f"Error migrating database: {e}")
+                self._reset()
+                self._publish(self._snapshot.version + 1)
+                return False
+
+    def clear(self):
+        """Remove all students (call save_database to persist)."""
+        with self._lock:
+            self._reset()
+            self._mark_changed()
+
+    # -------------------- SNAPSHOTS --------------------
+    def snapshot(self) -> GallerySnapshot:
+        """
+        Current published gallery, for readers.
+
+        Returns a reference, no copy. Outside a transaction, changes made
+        since the last publish are published first so single-threaded
+        callers always see their own writes. While a transaction is open
+        the previous snapshot keeps being served.
+        """
+        snapshot = self._snapshot
+        if not self._unpublished or self._txn_depth:
+            return snapshot
+        with self._lock:
+            if self._unpublished and not self._txn_depth:
+                self._publish(self._snapshot.version + 1)
+            return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Version of the current published gallery."""
+        return self.snapshot().version
+
+    @contextmanager
+    def transaction(self, save: bool = False):
+        """
+        Group several changes into one atomic gallery update.
+
+        Readers keep getting the previous snapshot until the block exits,
+        then the new one is swapped in with a single reference assignment.
+        Other writers wait for the block to finish.
+
+        Args:
+            save: Save the new version before the lock is released (only if
+                something changed), so no load_database() in between can
+                publish the older gallery on disk over it
+        """
+        with self._lock:
+            self._txn_depth += 1
+            try:
+                yield self
+            finally:
+                self._txn_depth -= 1
+            if not self._txn_depth and self._unpublished:
+                self._publish(self._snapshot.version + 1)
+                if save:
+                    self._save_database()
+
+    # -------------------- ACCESS --------------------
+    # Writer-side accessors (keys, matrix, get_student, get_all_students,
+    # search_by_key, get_student_count) see the working copy including
+    # changes of an open transaction. Recognition should use snapshot(),
+    # get_gallery_matrix() or find_best_matches().
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only (N, D) view of the working embeddings, row i = keys[i]."""
+        view = self._buffer[:len(self.keys)]
+        view.flags.writeable = False
+        return view
+
     def add_student(self, name: str, roll: str, embedding: np.ndarray):
         """
         Add or update a student in the database.
-        
+
         Args:
             name: Student name
             roll: Student roll number
             embedding: Face embedding vector (normalized)
         """
         key = f"{roll}_{name}"
-        
-        # Ensure embedding is numpy array and normalized
-        if not isinstance(embedding, np.ndarray):
-            embedding = np.array(embedding)
-        
-        # Normalize embedding if not already normalized
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-        
-        self.data[key] = embedding
+        with self._lock:
+            self._set_row(key, embedding)
         print(f"Added/Updated student: {key}")
-    
+
     def get_student(self, roll: str, name: str) -> Optional[np.ndarray]:
         """
         Get student embedding.
-        
+
         Args:
             roll: Student roll number
             name: Student name
-            
+
         Returns:
             Embedding vector or None if not found
         """
         key = f"{roll}_{name}"
-        return self.data.get(key)
-    
+        return self.search_by_key(key)
+
     def get_all_students(self) -> Dict[str, np.ndarray]:
         """
         Get all enrolled students.
-        
+
+        Returns:
+            Dictionary mapping student keys to embedding row views
+        """
+        matrix = self.matrix
+        return {key: matrix[i] for i, key in enumerate(self.keys)}
+
+    def get_gallery_matrix(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        Get all enrolled students of the published gallery as one matrix.
+
+        No copy is made: the snapshot's keys tuple and its read-only
+        L2-normalized float32 matrix are returned.
+
         Returns:
-            Dictionary mapping student keys to embeddings
+            (keys, matrix) where matrix[i] is the embedding of keys[i]
+        """
+        snapshot = self.snapshot()
+        return snapshot.keys, snapshot.matrix
+
+    def find_best_matches(self, query_embeddings) -> Tuple[List[Optional[str]], np.ndarray]:
         """
-        return self.data.copy()
-    
+        Match query embeddings against the published gallery.
+
+        See GallerySnapshot.find_best_matches; use snapshot() directly when
+        the caller also needs the version the matches came from.
+        """
+        return self.snapshot().find_best_matches(query_embeddings)
+
     def delete_student(self, roll: str, name: str) -> bool:
         """
         Delete a student from database.
-        
+
         Args:
             roll: Student roll number
             name: Student name
-            
+
         Returns:
             True if deleted, False if not found
         """
         key = f"{roll}_{name}"
-        if key in self.data:
-            del self.data[key]
+        with self._lock:
+            deleted = self._delete_row(key)
+        if deleted:
             print(f"Deleted student: {key}")
             return True
         return False
-    
+
     def get_student_count(self) -> int:
         """Get total number of enrolled students."""
-        return len(self.data)
-    
+        return len(self.keys)
+
     def search_by_key(self, key: str) -> Optional[np.ndarray]:
         """
         Search student by full key (ROLL_NAME format).
-        
+
         Args:
             key: Student key in format "ROLL_NAME"
-            
+
         Returns:
             Embedding vector or None if not found
         """
-        return self.data.get(key)
-    
+        i = self._index.get(key)
+        return None if i is None else self.matrix[i]
+
     def remove_student(self, student_key: str) -> bool:
         """
         Remove a student using their full key (ROLL_NAME format).
         Wrapper for delete_student for convenience.
-        
+
         Args:
             student_key: Full student key (e.g., "10_Om_Bhamare")
-            
+
         Returns:
             True if deleted, False if not found
         """
-        if student_key in self.data:
-            del self.data[student_key]
+        with self._lock:
+            deleted = self._delete_row(student_key)
+        if deleted:
             print(f"Removed student: {student_key}")
             return True
         return False
+
+    # -------------------- INTERNALS --------------------
+    def _reset(self):
+        """Drop all in-memory working state (the published snapshot stays)."""
+        # New lists: the published snapshot holds its own keys tuple anyway
+        self.keys = []
+        self._index = {}
+        self._buffer = np.zeros((0, 0), dtype=np.float32)
+        self._buffer_shared = False
+
+    def _publish(self, version: int):
+        """Swap in a snapshot of the working state. Caller holds the lock."""
+        self._snapshot = GallerySnapshot(version, self.keys, self._buffer[:len(self.keys)])
+        self._buffer_shared = True
+        self._unpublished = False
+
+    def _mark_changed(self):
+        """Working state differs from the published snapshot."""
+        self._unpublished = True
+
+    def _ensure_writable(self, rows: int, dim: int, overwrite: bool = True):
+        """
+        Make sure the buffer is writable and can hold `rows` rows.
+
+        Capacity doubles on growth so bulk enrollment stays amortized O(1)
+        per student instead of copying the whole matrix every time. When a
+        published snapshot still views the buffer, existing rows are copied
+        before they are overwritten (copy-on-write); pure appends past the
+        published rows need no copy.
+        """
+        capacity, current_dim = self._buffer.shape if self._buffer.ndim == 2 else (0, 0)
+        if current_dim not in (0, dim):
+            raise ValueError(f"Embedding size {dim} does not match database size {current_dim}")
+
+        read_only = isinstance(self._buffer, np.memmap) or not self._buffer.flags.writeable
+        if read_only or rows > capacity or (overwrite and self._buffer_shared):
+            # Only grow when rows do not fit; a copy-on-write copy keeps the capacity
+            new_capacity = max(rows, 2 * capacity, 64) if rows > capacity else max(capacity, 64)
+            buffer = np.empty((new_capacity, dim), dtype=np.float32)
+            count = len(self.keys)
+            if count:
+                buffer[:count] = self._buffer[:count]
+            self._buffer = buffer
+            self._buffer_shared = False
+
+    def _set_row(self, key: str, embedding):
+        """Insert or overwrite the (normalized) embedding for key."""
+        # Ensure embedding is numpy array and normalized
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+
+        i = self._index.get(key)
+        if i is None:
+            i = len(self.keys)
+            self._ensure_writable(i + 1, embedding.shape[0], overwrite=False)
+            self._buffer[i] = embedding
+            self.keys.append(key)
+            self._index[key] = i
+        else:
+            self._ensure_writable(len(self.keys), embedding.shape[0])
+            self._buffer[i] = embedding
+
+        self._mark_changed()
+
+    def _delete_row(self, key: str) -> bool:
+        """Remove key, keeping the remaining rows in enrollment order."""
+        i = self._index.get(key)
+        if i is None:
+            return False
+
+        count = len(self.keys)
+        self._ensure_writable(count, self._buffer.shape[1])
+        self._buffer[i:count - 1] = self._buffer[i + 1:count]
+        del self.keys[i]
+        self._index = {k: j for j, k in enumerate(self.keys)}
+        self._mark_changed()
+        return True
+
+    def _remove_stale_matrices(self):
+        """Best-effort cleanup of older generation files (may still be mapped)."""
+        for path in self.db_path.parent.glob(f"{self.db_path.stem}_*.npy"):
+            if path.name != self._matrix_file:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
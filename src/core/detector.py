@@ -1,54 +1,261 @@
 """
 Face Detection Module
-Detects faces in images using insightface (includes SCRFD face detector).
+Detects faces in images with SCRFD (native onnxruntime wrapper, see scrfd.py).
 """
 import cv2
+import time
 import numpy as np
-import insightface
 from pathlib import Path
 import logging
 
+from .quantize import resolve_model_path
+from .scrfd import SCRFD, nms
+from .session import SessionFactory
+from .yunet import YuNet
+
 logger = logging.getLogger(__name__)
 
+# SCRFD input used when preparing the model; per-image sizes come from
+# FaceDetector.input_size_for
+DETECTOR_INPUT_SIZE = (640, 640)
+# SCRFD feature strides go up to 32, so input sides are multiples of 32
+INPUT_SIZE_MULTIPLE = 32
+# DETECTOR_BACKEND values and their default models
+DETECTOR_MODELS = {
+    'scrfd': './models/buffalo_l/det_10g.onnx',
+    'yunet': './models/opencv/face_detection_yunet_2023mar.onnx',
+}
+
+
+def tile_origins(length: int, tile: int, overlap: int) -> list:
+    """Start offsets of overlapping tiles covering [0, length)."""
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] + tile < length:
+        starts.append(length - tile)
+    return starts
+
+
 class FaceDetector:
-    """Face detector using insightface (SCRFD)."""
+    """Face detector using SCRFD (or OpenCV YuNet)."""
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend='scrfd', tiling='off', tile_size=1024, tile_overlap=192,
+                 tiling_min_side=1600, nms_threshold=0.4, min_input_side=640, max_input_side=1280,
+                 session_factory=None, quantization=None):
         """
         Initialize face detector.
         
         Args:
-            model_path: Path to model (not used, insightface handles it)
+            model_path: Path to the ONNX model (default: DETECTOR_MODELS[backend])
+            backend: 'scrfd' (SCRFD-10G on ONNX Runtime) or 'yunet' (OpenCV
+                YuNet; session_factory and quantization do not apply)
+            tiling: 'off' (single 640px pass), 'on' (always tile) or 'auto'
+                (tile when the longer image side is >= tiling_min_side)
+            tile_size: Tile edge in source pixels (each tile runs at 640px)
+            tile_overlap: Overlap between neighbouring tiles in pixels;
+                should exceed the largest face that must be caught by tiles
+            tiling_min_side: Image size that switches 'auto' to tiling
+            nms_threshold: IoU above which merged boxes are duplicates
+            min_input_side: Smallest long side of the SCRFD input (smaller
+                images are upscaled to it)
+            max_input_side: Largest long side of the SCRFD input for the
+                single-pass mode (larger images are downscaled to it)
+            session_factory: SessionFactory shared with the embedder
+                (a default one is created if None)
+            quantization: None for the fp32 model, 'dynamic' or 'static' to
+                load its int8 variant (see core/quantize.py)
         """
+        if backend not in DETECTOR_MODELS:
+            raise ValueError(f"Unknown detector backend '{backend}' (expected one of {tuple(DETECTOR_MODELS)})")
         self.model = None
+        self.model_path = model_path
+        self.backend = backend
+        self.quantization = quantization
+        self.session_factory = session_factory
+        self.tiling = tiling
+        self.tile_size = int(tile_size)
+        self.tile_overlap = int(min(tile_overlap, tile_size // 2))
+        self.tiling_min_side = int(tiling_min_side)
+        self.nms_threshold = nms_threshold
+        self.min_input_side = int(min_input_side)
+        self.max_input_side = int(max(max_input_side, min_input_side))
+        # (h, w, max_side) -> (input_w, input_h); SCRFD itself caches the
+        # anchor centers for every input shape it has seen
+        self._input_sizes = {}
         
     def _load_model(self):
         """Load face detection model."""
         if self.model is None:
             try:
-                model_path = './models/buffalo_l/det_10g.onnx'
+                model_path = self.model_path or DETECTOR_MODELS[self.backend]
+                if self.backend == 'yunet':
+                    if not Path(model_path).exists():
+                        raise FileNotFoundError(f"Model not found at {model_path}")
+                    logger.info(f"Loading detector from {model_path}")
+                    start = time.perf_counter()
+                    self.model = YuNet(model_path, nms_thresh=self.nms_threshold)
+                    self.model.prepare(input_size=DETECTOR_INPUT_SIZE)
+                    logger.info("Created YuNet detector in %.2fs", time.perf_counter() - start)
+                    return
+                
+                model_path = resolve_model_path(model_path, self.quantization)
                 if not Path(model_path).exists():
-                     # Try finding it in current directory or user home as fallback (though we should have it in models/buffalo_l now)
-                     pass
+                    raise FileNotFoundError(f"Model not found at {model_path}")
                      
                 logger.info(f"Loading detector from {model_path}")
-                # Load SCRFD model directly
-                self.model = insightface.model_zoo.get_model(model_path)
-                # Prepare with context_id 0 (which usually means GPU 0, or CPU if providers set? 
-                # actually get_model returns a model that needs prepare.
-                # If we want to use CPU, we might need to specify it.
-                # SCRFD prepare matches input size.
-                self.model.prepare(ctx_id=0, input_size=(640, 640), det_thresh=0.5)
+                # Load SCRFD model directly, on a session from the shared factory
+                # (same threads/optimization/providers as the embedder)
+                if self.session_factory is None:
+                    self.session_factory = SessionFactory()
+                self.model = SCRFD(self.session_factory.create(model_path))
+                self.model.prepare(input_size=DETECTOR_INPUT_SIZE, det_thresh=0.5, nms_thresh=self.nms_threshold)
             except Exception as e:
                 logger.error(f"Failed to load face detector: {e}", exc_info=True)
                 raise Exception(f"Failed to load face detector: {e}")
     
-    def detect_faces(self, image):
+    def warmup(self, shapes=((640, 640),)):
+        """
+        Load the model and run one dummy detection per expected frame shape
+        so the first real frame does not pay for session creation,
+        first-run allocations or anchor generation.
+        
+        Args:
+            shapes: (height, width) of the frames that will be detected
+            
+        Returns:
+            Dict with 'load' and 'inference' times in seconds
+        """
+        start = time.perf_counter()
+        self._load_model()
+        loaded = time.perf_counter()
+        for shape in shapes:
+            self.detect_raw(np.zeros((shape[0], shape[1], 3), dtype=np.uint8), tiled=False)
+        return {'load': loaded - start, 'inference': time.perf_counter() - loaded}
+    
+    def input_size_for(self, image_shape, max_side=None):
+        """
+        SCRFD input (width, height) for an image shape.
+        
+        Keeps the image's aspect ratio so a 640x480 webcam frame runs at
+        640x480 instead of being letterboxed into 640x640. The long side is
+        clamped to [min_input_side, max_side] and both sides are rounded up
+        to a multiple of 32. Cached per shape.
+        
+        Args:
+            image_shape: Image shape (h, w[, c])
+            max_side: Override for max_input_side (tiles use the base size)
+        """
+        h, w = image_shape[:2]
+        key = (h, w, max_side)
+        size = self._input_sizes.get(key)
+        if size is None:
+            limit = max(max_side or self.max_input_side, self.min_input_side)
+            long_side = min(max(h, w, self.min_input_side), limit)
+            scale = long_side / max(h, w)
+            step = INPUT_SIZE_MULTIPLE
+            size = (
+                int(np.ceil(w * scale / step) * step),
+                int(np.ceil(h * scale / step) * step),
+            )
+            self._input_sizes[key] = size
+            logger.debug(f"Detector input {size[0]}x{size[1]} for {w}x{h} images")
+        return size
+    
+    def use_tiling(self, image_shape) -> bool:
+        """Whether an image of this shape is detected tile by tile."""
+        if self.tiling == 'on':
+            return True
+        if self.tiling == 'auto':
+            return max(image_shape[:2]) >= self.tiling_min_side
+        return False
+    
+    def detect_raw(self, image_bgr, tiled=None):
+        """
+        Run SCRFD on a BGR image.
+        
+        Args:
+            image_bgr: BGR image
+            tiled: Force tiled (True) or single-pass (False); None follows
+                the configured tiling mode
+            
+        Returns:
+            (bboxes, kpss): (N, 5) [x1, y1, x2, y2, score] and (N, 5, 2)
+            landmarks (or None) in image coordinates
+        """
+        self._load_model()
+        if tiled is None:
+            tiled = self.use_tiling(image_bgr.shape)
+        if not tiled:
+            input_size = self.input_size_for(image_bgr.shape)
+            return self.model.detect(image_bgr, input_size=input_size, max_num=0, metric='default')
+        return self._detect_tiled(image_bgr)
+    
+    def _detect_tiled(self, image_bgr):
+        """
+        Detect on overlapping tiles plus one downscaled full-image pass,
+        then merge with NMS.
+        
+        det_10g is exported with a batch size of 1, so the tiles run back
+        to back through the same session rather than as one batch.
+        Boxes touching an inner tile edge are dropped: with enough overlap
+        the whole face is found in the neighbouring tile.
+        """
+        h, w = image_bgr.shape[:2]
+        all_boxes, all_kps = [], []
+        
+        # Full-image pass catches faces larger than the overlap
+        base_side = DETECTOR_INPUT_SIZE[0]
+        input_size = self.input_size_for(image_bgr.shape, max_side=base_side)
+        bboxes, kpss = self.model.detect(image_bgr, input_size=input_size, max_num=0, metric='default')
+        all_boxes.append(bboxes)
+        all_kps.append(kpss)
+        
+        edge = 2
+        for y0 in tile_origins(h, self.tile_size, self.tile_overlap):
+            for x0 in tile_origins(w, self.tile_size, self.tile_overlap):
+                tile = image_bgr[y0:y0 + self.tile_size, x0:x0 + self.tile_size]
+                th, tw = tile.shape[:2]
+                input_size = self.input_size_for(tile.shape, max_side=base_side)
+                bboxes, kpss = self.model.detect(tile, input_size=input_size, max_num=0, metric='default')
+                if len(bboxes) == 0:
+                    continue
+                
+                cut = np.zeros(len(bboxes), dtype=bool)
+                if x0 > 0:
+                    cut |= bboxes[:, 0] <= edge
+                if y0 > 0:
+                    cut |= bboxes[:, 1] <= edge
+                if x0 + tw < w:
+                    cut |= bboxes[:, 2] >= tw - edge
+                if y0 + th < h:
+                    cut |= bboxes[:, 3] >= th - edge
+                
+                bboxes = bboxes[~cut].copy()
+                bboxes[:, [0, 2]] += x0
+                bboxes[:, [1, 3]] += y0
+                all_boxes.append(bboxes)
+                if kpss is not None:
+                    kpss = kpss[~cut].copy()
+                    kpss[:, :, 0] += x0
+                    kpss[:, :, 1] += y0
+                all_kps.append(kpss)
+        
+        bboxes = np.concatenate([b for b in all_boxes if len(b)] or [np.zeros((0, 5), dtype=np.float32)])
+        keep = nms(bboxes, self.nms_threshold)
+        if any(k is None for k in all_kps):
+            return bboxes[keep], None
+        kpss = np.concatenate([k for k in all_kps if len(k)] or [np.zeros((0, 5, 2), dtype=np.float32)])
+        return bboxes[keep], kpss[keep]
+    
+    def detect_faces(self, image, tiled=None):
         """
         Detect faces in an image.
         
         Args:
             image: Input image (numpy array or PIL Image)
+            tiled: Force tiled/single-pass detection (None = configured mode)
             
         Returns:
             List of tuples: [(bbox, face_crop), ...]
@@ -76,35 +283,49 @@ class FaceDetector:
         # SCRFD expects BGR
         image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
         
-        logger.debug(f"Detecting faces in image of shape {image_bgr.shape}")
-        try:
-            # SCRFD detect returns (bboxes, kpss)
-            # bboxes is list of [x1, y1, x2, y2, score]
-            bboxes, kpss = self.model.detect(image_bgr, max_num=0, metric='default')
-            logger.debug(f"Found {len(bboxes)} faces")
-        except Exception as e:
-            logger.error(f"Error in face detection: {e}", exc_info=True)
-            bboxes = []
+        bboxes, _ = self.detect(image_bgr, tiled=tiled)
         
         faces = []
-        h, w = image_rgb.shape[:2]
-        
-        for bbox in bboxes:
-            # Get bounding box
-            x1, y1, x2, y2, score = bbox
+        for x1, y1, x2, y2, score in bboxes:
             x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            # Ensure coordinates are within image bounds
-            x1 = max(0, x1)
-            y1 = max(0, y1)
-            x2 = min(w, x2)
-            y2 = min(h, y2)
-            
             # Crop face (from RGB image for consistency with other parts of app)
             face_crop = image_rgb[y1:y2, x1:x2]
-            
-            if face_crop.size > 0 and (x2 - x1) > 10 and (y2 - y1) > 10:
-                bbox_with_conf = [x1, y1, x2, y2, score]
-                faces.append((bbox_with_conf, face_crop))
+            faces.append(([x1, y1, x2, y2, score], face_crop))
         
         return faces
+    
+    def detect(self, image_bgr, tiled=None):
+        """
+        Detect faces with their landmarks, without cropping.
+        
+        Args:
+            image_bgr: BGR image (numpy array)
+            tiled: Force tiled/single-pass detection (None = configured mode)
+            
+        Returns:
+            (bboxes, kpss): (N, 5) [x1, y1, x2, y2, score] with integer
+            coordinates clipped to the image (faces of 10px or less are
+            dropped, same as detect_faces) and (N, 5, 2) landmarks, or None
+            if the model has no keypoints. Feed both to
+            core.alignment.align_faces.
+        """
+        self._load_model()
+        logger.debug(f"Detecting faces in image of shape {image_bgr.shape}")
+        try:
+            # detect returns (bboxes, kpss); bboxes rows are [x1, y1, x2, y2, score]
+            bboxes, kpss = self.detect_raw(image_bgr, tiled=tiled)
+            logger.debug(f"Found {len(bboxes)} faces")
+        except Exception as e:
+            logger.error(f"Error in face detection: {e}", exc_info=True)
+            return np.zeros((0, 5), dtype=np.float32), None
+        
+        h, w = image_bgr.shape[:2]
+        boxes = np.array(bboxes, dtype=np.float32).reshape(-1, 5)
+        # Truncate like int() and keep within image bounds
+        boxes[:, :4] = np.trunc(boxes[:, :4])
+        boxes[:, 0:2] = np.maximum(boxes[:, 0:2], 0)
+        boxes[:, 2] = np.minimum(boxes[:, 2], w)
+        boxes[:, 3] = np.minimum(boxes[:, 3], h)
+        
+        keep = ((boxes[:, 2] - boxes[:, 0]) > 10) & ((boxes[:, 3] - boxes[:, 1]) > 10)
+        return boxes[keep], (kpss[keep] if kpss is not None else None)
@@ -3,24 +3,67 @@ ArcFace Embedding Generation Module
 Generates face embeddings using ArcFace model.
 """
 import cv2
+import time
 import numpy as np
-import onnxruntime as ort
 from pathlib import Path
-import insightface
+
+from .quantize import resolve_model_path
+from .session import SessionFactory
+from .sface import SFaceEmbedder
+
+# EMBEDDER_BACKEND values
+EMBEDDER_BACKENDS = ('arcface', 'sface')
+
+
+def create_embedder(backend='arcface', max_batch_size=32, session_factory=None, quantization=None):
+    """
+    Embedder for an EMBEDDER_BACKEND value.
+    
+    Args:
+        backend: 'arcface' (ArcFace-R50 on ONNX Runtime) or 'sface'
+            (OpenCV SFace; session_factory and quantization do not apply)
+        max_batch_size: Maximum number of faces per inference call
+        session_factory: SessionFactory for the ArcFace session
+        quantization: None, 'dynamic' or 'static' (ArcFace only)
+        
+    Returns:
+        FaceEmbedder or SFaceEmbedder; its backend_id tags the gallery
+    """
+    if backend == 'arcface':
+        return FaceEmbedder(max_batch_size=max_batch_size, session_factory=session_factory,
+                            quantization=quantization)
+    if backend == 'sface':
+        return SFaceEmbedder(max_batch_size=max_batch_size)
+    raise ValueError(f"Unknown embedder backend '{backend}' (expected one of {EMBEDDER_BACKENDS})")
+
 
 class FaceEmbedder:
     """ArcFace-based face embedder."""
     
-    def __init__(self, model_path=None):
+    # Galleries and training manifests are tagged with this (faces are
+    # landmark-aligned, see core/alignment.py)
+    backend_id = "arcface_r50_aligned"
+    embedding_size = 512
+    
+    def __init__(self, model_path=None, max_batch_size=32, session_factory=None, quantization=None):
         """
         Initialize face embedder.
         
         Args:
-            model_path: Path to ArcFace ONNX model. If None, uses insightface default.
+            model_path: Path to ArcFace ONNX model. If None, uses buffalo_l w600k_r50.
+            max_batch_size: Maximum number of faces per session.run call
+            session_factory: SessionFactory shared with the detector
+                (a default one is created if None)
+            quantization: None for the fp32 model, 'dynamic' or 'static' to
+                load its int8 variant (see core/quantize.py)
         """
         self.model = None
         self.model_path = model_path
+        self.quantization = quantization
+        self.session_factory = session_factory
         self.input_size = (112, 112)  # Standard ArcFace input size
+        self.input_name = None
+        self.max_batch_size = max(1, int(max_batch_size))
         
     def _load_model(self):
         """Load ArcFace model."""
@@ -30,27 +73,38 @@ class FaceEmbedder:
                 model_path = './models/buffalo_l/w600k_r50.onnx'
                 if self.model_path:
                     model_path = self.model_path
+                model_path = resolve_model_path(model_path, self.quantization)
                     
-                if Path(model_path).exists():
-                    try:
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.info(f"Loading embedder from {model_path}")
-                        self.model = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
-                    except Exception as e:
-                         # Try fallback
-                         raise e
-                else:
-                    # Fallback to insightface if local not found (unlikely now)
-                    # But we prefer explicit ONNX loading
+                if not Path(model_path).exists():
                     raise FileNotFoundError(f"Model not found at {model_path}")
+                
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.info(f"Loading embedder from {model_path}")
+                if self.session_factory is None:
+                    self.session_factory = SessionFactory()
+                self.model = self.session_factory.create(model_path)
 
             except Exception as e:
-                # Fallback to ONNX runtime if insightface fails
-                if self.model_path and Path(self.model_path).exists():
-                    self.model = ort.InferenceSession(self.model_path)
-                else:
-                    raise Exception(f"Failed to load ArcFace model: {e}")
+                raise Exception(f"Failed to load ArcFace model: {e}")
+            
+            # Input name is fixed per session, look it up once
+            self.input_name = self.model.get_inputs()[0].name
+    
+    def warmup(self):
+        """
+        Load the model and run one dummy batch so the first real face
+        does not pay for session creation and first-run allocations.
+        
+        Returns:
+            Dict with 'load' and 'inference' times in seconds
+        """
+        start = time.perf_counter()
+        self._load_model()
+        loaded = time.perf_counter()
+        dummy = np.zeros((1, 3, self.input_size[1], self.input_size[0]), dtype=np.float32)
+        self._run_batch(dummy)
+        return {'load': loaded - start, 'inference': time.perf_counter() - loaded}
     
     def get_embedding(self, face_image):
         """
@@ -73,17 +127,24 @@ class FaceEmbedder:
         # Preprocess for ArcFace ONNX
         face_processed = self._preprocess_face(face_image)
         
-        # Get input and output names
-        input_name = self.model.get_inputs()[0].name
-        
-        # Run inference
-        outputs = self.model.run(None, {input_name: face_processed})
-        embedding = outputs[0][0]
+        return self._run_batch(face_processed)[0]
+    
+    def _run_batch(self, face_batch):
+        """
+        Run ArcFace on a preprocessed (N, 3, 112, 112) batch.
         
-        # Normalize embedding
-        embedding = embedding / np.linalg.norm(embedding)
+        Args:
+            face_batch: Preprocessed faces (float32, NCHW)
+            
+        Returns:
+            (N, 512) array of normalized embeddings
+        """
+        outputs = self.model.run(None, {self.input_name: face_batch})
+        embeddings = outputs[0]
         
-        return embedding
+        # Normalize embeddings
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-10)
     
     def _preprocess_face(self, face_image):
         """
@@ -111,22 +172,70 @@ class FaceEmbedder:
         
         return face_batch.astype(np.float32)
     
-    def get_embeddings_batch(self, face_images):
+    def get_embeddings_aligned(self, faces, max_batch_size=None):
+        """
+        Generate embeddings for faces aligned by core.alignment.align_faces.
+        
+        The aligned buffer is converted to the network layout in one
+        vectorized pass per chunk; no per-face resize or copy.
+        
+        Args:
+            faces: (N, 112, 112, 3) uint8 BGR buffer
+            max_batch_size: Override for the per-run batch limit
+            
+        Returns:
+            (N, 512) array of normalized embeddings
+        """
+        self._load_model()
+        batch_size = max(1, int(max_batch_size or self.max_batch_size))
+        if len(faces) == 0:
+            return np.zeros((0, self.embedding_size), dtype=np.float32)
+        chunks = [
+            self._run_batch(self._preprocess_aligned(faces[start:start + batch_size]))
+            for start in range(0, len(faces), batch_size)
+        ]
+        return np.concatenate(chunks, axis=0)
+    
+    @staticmethod
+    def _preprocess_aligned(faces):
+        """(N, 112, 112, 3) BGR uint8 -> (N, 3, 112, 112) RGB float32 in [-1, 1]."""
+        batch = np.empty((len(faces), 3, faces.shape[1], faces.shape[2]), dtype=np.float32)
+        # BGR -> RGB, HWC -> CHW and scaling in one pass over the buffer
+        np.multiply(faces[..., ::-1].transpose(0, 3, 1, 2), 1.0 / 127.5, out=batch, casting='unsafe')
+        batch -= 1.0
+        return batch
+    
+    def get_embeddings_batch(self, face_images, max_batch_size=None):
         """
         Generate embeddings for multiple face images.
         
+        Crops are preprocessed and stacked into (N, 3, 112, 112) tensors so
+        each chunk of up to max_batch_size faces is a single session.run.
+        
         Args:
             face_images: List of face crops
+            max_batch_size: Override for the per-run batch limit
             
         Returns:
             List of normalized embedding vectors
         """
-        embeddings = []
+        self._load_model()
+        batch_size = max(1, int(max_batch_size or self.max_batch_size))
+        
+        processed = []
         for face_image in face_images:
             try:
-                embedding = self.get_embedding(face_image)
-                embeddings.append(embedding)
+                if hasattr(face_image, 'mode'):
+                    face_image = np.array(face_image)
+                    if len(face_image.shape) == 3 and face_image.shape[2] == 4:  # RGBA
+                        face_image = cv2.cvtColor(face_image, cv2.COLOR_RGBA2RGB)
+                processed.append(self._preprocess_face(face_image))
             except Exception as e:
                 print(f"Error processing face: {e}")
                 continue
+        
+        embeddings = []
+        for start in range(0, len(processed), batch_size):
+            face_batch = np.concatenate(processed[start:start + batch_size], axis=0)
+            embeddings.extend(self._run_batch(face_batch))
         return embeddings
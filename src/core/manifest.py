@@ -0,0 +1,176 @@
+"""
+Training Manifest Module
+Remembers the embedding of every dataset image so retraining only
+processes images that were added or changed since the last run.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .database import UNTAGGED_BACKEND
+from .quality import QualityGate
+
+# Bump when the manifest layout changes (old manifests are then ignored)
+MANIFEST_FORMAT_VERSION = 1
+
+
+def content_sha1(data: bytes) -> str:
+    """Content hash used to recognise unchanged or renamed images."""
+    return hashlib.sha1(data).hexdigest()
+
+
+class EmbeddingManifest:
+    """Per-image embedding cache keyed by path, size, mtime and content hash."""
+
+    def __init__(self, manifest_path, backend=None, quality_gate: Optional[QualityGate] = None):
+        """
+        Initialize manifest.
+
+        Args:
+            manifest_path: Path to the manifest JSON file. Embeddings are
+                stored next to it as <stem>.npy
+            backend: backend_id of the embedder; a manifest written by
+                another backend is ignored (full retrain). None accepts any
+            quality_gate: Gate the stored faces were judged by; if its
+                settings changed since the manifest was written, faces it
+                would now decide differently are forgotten (re-detected and
+                re-gated). None keeps every entry
+        """
+        self.manifest_path = Path(manifest_path)
+        self.backend = backend
+        self.quality_gate = quality_gate
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.embeddings_path = self.manifest_path.with_suffix(".npy")
+
+        # rel_path -> {"size", "mtime_ns", "sha1", "row", "quality"}; row is
+        # None when the image had no usable face, so it is not re-detected
+        # either (until the quality gate settings change, for rejected
+        # faces). quality is the face quality record, if the image had a face.
+        self.entries: Dict[str, dict] = {}
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self._by_hash: Dict[str, str] = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Load manifest from disk (a missing or corrupt one means full retrain)."""
+        self.entries, self._embeddings, self._by_hash = {}, {}, {}
+        self.changed = False
+        if not self.manifest_path.exists():
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("format") != MANIFEST_FORMAT_VERSION:
+                return
+            stored_backend = meta.get("backend") or UNTAGGED_BACKEND
+            if self.backend is not None and stored_backend != self.backend:
+                print(f"Training manifest was built with '{stored_backend}', doing full retrain")
+                return
+
+            entries = meta.get("entries", {})
+            rows = [e["row"] for e in entries.values() if e.get("row") is not None]
+            matrix = np.load(self.embeddings_path) if rows else None
+            if matrix is not None and (matrix.ndim != 2 or max(rows) >= len(matrix)):
+                raise ValueError("Manifest embeddings do not match entries")
+
+            gate_changed = (self.quality_gate is not None
+                            and meta.get("quality_gate") != self._gate_settings())
+            for rel_path, entry in entries.items():
+                if gate_changed and self._needs_regate(entry):
+                    self.changed = True
+                    continue
+                row = entry.get("row")
+                if row is not None:
+                    self._embeddings[rel_path] = matrix[row]
+                self.entries[rel_path] = entry
+                self._by_hash[entry["sha1"]] = rel_path
+        except Exception as e:
+            print(f"Error loading training manifest, doing full retrain: {e}")
+            self.entries, self._embeddings, self._by_hash = {}, {}, {}
+
+    def _gate_settings(self) -> Optional[dict]:
+        """Quality gate thresholds as stored in the manifest."""
+        return dict(vars(self.quality_gate)) if self.quality_gate is not None else None
+
+    def _needs_regate(self, entry: dict) -> bool:
+        """Whether the current gate could decide this image differently than when it was stored."""
+        quality = entry.get("quality")
+        if quality is None:
+            # No face found: does not depend on the gate
+            return False
+        return not quality.get("passed") or not self.quality_gate.passes(quality)
+
+    def save(self):
+        """Write manifest and embeddings (compacted to live entries only)."""
+        rel_paths = [p for p in self.entries if p in self._embeddings]
+        rows = {p: i for i, p in enumerate(rel_paths)}
+        entries = {}
+        for rel_path, entry in self.entries.items():
+            entry = dict(entry)
+            entry["row"] = rows.get(rel_path)
+            entries[rel_path] = entry
+
+        if rel_paths:
+            matrix = np.stack([self._embeddings[p] for p in rel_paths]).astype(np.float32)
+            tmp_npy = self.embeddings_path.with_name(self.embeddings_path.stem + ".tmp.npy")
+            np.save(tmp_npy, matrix)
+            os.replace(tmp_npy, self.embeddings_path)
+
+        meta = {"format": MANIFEST_FORMAT_VERSION, "backend": self.backend,
+                "quality_gate": self._gate_settings(), "entries": entries}
+        tmp_json = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_json, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_json, self.manifest_path)
+        self.changed = False
+
+    def lookup(self, rel_path: str, size: int, mtime_ns: int) -> Optional[dict]:
+        """Fast path: same path, size and mtime means the file is unchanged."""
+        entry = self.entries.get(rel_path)
+        if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            return entry
+        return None
+
+    def find_by_hash(self, sha1: str) -> Optional[str]:
+        """Find an already-embedded image with identical content (touched or renamed file)."""
+        rel_path = self._by_hash.get(sha1)
+        entry = self.entries.get(rel_path)
+        return rel_path if entry is not None and entry["sha1"] == sha1 else None
+
+    def get_embedding(self, rel_path: str) -> Optional[np.ndarray]:
+        """Stored embedding for an image, or None if it had no usable face."""
+        return self._embeddings.get(rel_path)
+
+    def update(self, rel_path: str, size: int, mtime_ns: int, sha1: str, embedding: Optional[np.ndarray],
+               quality: Optional[dict] = None):
+        """Record (or refresh) one image."""
+        self.entries[rel_path] = {"size": size, "mtime_ns": mtime_ns, "sha1": sha1}
+        if quality is not None:
+            self.entries[rel_path]["quality"] = quality
+        if embedding is not None:
+            self._embeddings[rel_path] = np.asarray(embedding, dtype=np.float32)
+        else:
+            self._embeddings.pop(rel_path, None)
+        self._by_hash[sha1] = rel_path
+        self.changed = True
+
+    def prune(self, live_paths: Iterable[str]) -> int:
+        """
+        Drop images that no longer exist in the dataset.
+
+        Returns:
+            Number of entries removed
+        """
+        live = set(live_paths)
+        removed = [p for p in self.entries if p not in live]
+        for rel_path in removed:
+            del self.entries[rel_path]
+            self._embeddings.pop(rel_path, None)
+        if removed:
+            self._by_hash = {e["sha1"]: p for p, e in self.entries.items()}
+            self.changed = True
+        return len(removed)
@@ -0,0 +1,235 @@
+"""
+Presence Ledger Module
+Per-session record of when each student was seen: one bit per sampling
+tick (default one minute) per student, stored as a memory-mapped NumPy bit
+array next to a small JSON index. Marking a tick only touches a few bytes
+of the mapped file, and dwell-time rules reduce to popcounts.
+
+An 8-hour session with 300 students at one-minute ticks is 300 x 60 bytes.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Bump when the ledger layout changes
+LEDGER_FORMAT_VERSION = 1
+
+# Bits set in each byte value, for popcounts over packed rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+# Row 0 holds the ticks the camera was analyzed at (observed time)
+_SAMPLED_ROW = 0
+
+
+class PresenceLedger:
+    """Memory-mapped per-student presence bitsets for one session."""
+
+    def __init__(self, ledger_dir, session_id: str, tick_seconds: float = 60.0,
+                 initial_hours: float = 8.0, start: Optional[float] = None,
+                 max_gap_seconds: float = 900.0):
+        """
+        Open (resume) or create a session ledger.
+
+        Args:
+            ledger_dir: Directory for <session_id>.json and <session_id>.npy
+            session_id: Name of the session (e.g. subject and start time)
+            tick_seconds: Length of one tick
+            initial_hours: Ticks allocated up front (grows when exceeded)
+            start: Session start as a UNIX timestamp (default: now)
+            max_gap_seconds: Longest gap between two samples that is
+                filled in for students seen at both (e.g. a few analysis
+                intervals); after a longer gap only the samples count
+        """
+        self.ledger_dir = Path(ledger_dir)
+        self.ledger_dir.mkdir(parents=True, exist_ok=True)
+        self.session_id = session_id
+        self.index_path = self.ledger_dir / f"{session_id}.json"
+        self.bits_path = self.ledger_dir / f"{session_id}.npy"
+        self._lock = threading.Lock()
+
+        self.tick_seconds = float(tick_seconds)
+        self.start = time.time() if start is None else float(start)
+        self.max_gap_seconds = float(max_gap_seconds)
+        self.keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.bits = None
+        if not self._load():
+            ticks = max(8, int(np.ceil(initial_hours * 3600 / self.tick_seconds)))
+            self._allocate(rows=64, n_bytes=(ticks + 7) // 8)
+            self._save_index()
+
+    # -------------------- STORAGE --------------------
+    def _load(self) -> bool:
+        """Resume an existing ledger (e.g. after a restart). False if there is none."""
+        if not self.index_path.exists() or not self.bits_path.exists():
+            return False
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("format") != LEDGER_FORMAT_VERSION:
+                return False
+            self.bits = np.load(self.bits_path, mmap_mode='r+')
+            self.tick_seconds = float(meta["tick_seconds"])
+            self.start = float(meta["start"])
+            self.keys = list(meta["keys"])
+            self._rows = {key: i + 1 for i, key in enumerate(self.keys)}
+            return True
+        except Exception as e:
+            print(f"Error loading presence ledger {self.session_id}, starting a new one: {e}")
+            self.bits = None
+            return False
+
+    def _allocate(self, rows: int, n_bytes: int):
+        """(Re)create the bit array with room for rows and n_bytes * 8 ticks, keeping existing bits."""
+        tmp_path = self.bits_path.with_name(self.bits_path.stem + ".tmp.npy")
+        new = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(rows, n_bytes))
+        if self.bits is not None:
+            old_rows, old_bytes = self.bits.shape
+            new[:old_rows, :old_bytes] = self.bits
+        new.flush()
+        # Mapped files cannot be replaced on Windows, close both first
+        del new
+        self.bits = None
+        os.replace(tmp_path, self.bits_path)
+        self.bits = np.load(self.bits_path, mmap_mode='r+')
+
+    def _save_index(self):
+        """Write the JSON index (only needed when students are added or the array grows)."""
+        meta = {
+            "format": LEDGER_FORMAT_VERSION,
+            "session_id": self.session_id,
+            "start": self.start,
+            "tick_seconds": self.tick_seconds,
+            "keys": self.keys,
+        }
+        tmp_json = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_json, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_json, self.index_path)
+
+    def _row(self, key: str) -> int:
+        """Row of a student, adding (and growing the array) if new."""
+        row = self._rows.get(key)
+        if row is None:
+            self.keys.append(key)
+            row = self._rows[key] = len(self.keys)
+            if row >= len(self.bits):
+                self._allocate(rows=2 * len(self.bits), n_bytes=self.bits.shape[1])
+        return row
+
+    # -------------------- MARKING --------------------
+    def tick_at(self, when: Optional[float] = None) -> int:
+        """Tick index of a UNIX timestamp (default: now)."""
+        when = time.time() if when is None else when
+        return max(0, int((when - self.start) // self.tick_seconds))
+
+    def _last_tick(self) -> Optional[int]:
+        """Latest sampled tick, or None before the first sample."""
+        sampled = np.flatnonzero(np.unpackbits(self.bits[_SAMPLED_ROW]))
+        return int(sampled[-1]) if len(sampled) else None
+
+    def _tick_mask(self, first: int, last: int) -> np.ndarray:
+        """Packed row with ticks first..last (inclusive) set."""
+        ticks = np.zeros(self.bits.shape[1] * 8, dtype=bool)
+        ticks[first:last + 1] = True
+        return np.packbits(ticks)
+
+    def mark(self, present_keys: Iterable[str], when: Optional[float] = None):
+        """
+        Record one analysis: present_keys were seen at this tick.
+
+        Students seen at both this and the previous sample are assumed to
+        have stayed in between, so the ticks since then count towards
+        their dwell time too (the camera is only sampled every few minutes).
+        Gaps longer than max_gap_seconds (camera stopped, app restarted)
+        are not filled in: nobody was observed then.
+        """
+        with self._lock:
+            tick = self.tick_at(when)
+            if tick >= self.bits.shape[1] * 8:
+                self._allocate(rows=len(self.bits), n_bytes=max(2 * self.bits.shape[1], (tick + 8) // 8))
+                self._save_index()
+
+            known = len(self.keys)
+            rows = np.array(sorted({self._row(key) for key in present_keys}), dtype=np.intp)
+            if len(self.keys) != known:
+                self._save_index()
+
+            previous = self._last_tick()
+            byte, bit = divmod(tick, 8)
+            flag = np.uint8(1 << (7 - bit))
+            max_gap_ticks = max(1, int(np.ceil(self.max_gap_seconds / self.tick_seconds)))
+            if previous is not None and previous < tick <= previous + max_gap_ticks:
+                prev_byte, prev_bit = divmod(previous, 8)
+                stayed = rows[(self.bits[rows, prev_byte] & (1 << (7 - prev_bit))) != 0]
+                span = self._tick_mask(previous, tick)
+                self.bits[_SAMPLED_ROW] |= span
+                if len(stayed):
+                    self.bits[stayed] |= span
+            self.bits[_SAMPLED_ROW, byte] |= flag
+            if len(rows):
+                self.bits[rows, byte] |= flag
+            self.bits.flush()
+
+    def hold(self, when: Optional[float] = None):
+        """Record a sample without new recognition (scene unchanged): whoever was seen last is still there."""
+        with self._lock:
+            previous = self._last_tick()
+            if previous is None:
+                return
+            byte, bit = divmod(previous, 8)
+            keys = [key for key in self.keys if self.bits[self._rows[key], byte] & (1 << (7 - bit))]
+        self.mark(keys, when)
+
+    # -------------------- QUERIES --------------------
+    def present_ticks(self) -> Tuple[Dict[str, int], int]:
+        """Popcounts: ticks each student was present, and ticks observed."""
+        with self._lock:
+            counts = _POPCOUNT[self.bits[:len(self.keys) + 1]].sum(axis=1)
+        return {key: int(counts[self._rows[key]]) for key in self.keys}, int(counts[_SAMPLED_ROW])
+
+    def attendance(self, keys: Iterable[str] = (), min_dwell_minutes: float = 20.0,
+                   min_fraction: float = 0.5) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """
+        Dwell-time attendance for the session so far.
+
+        A student is Present after min_dwell_minutes of presence. Only in
+        a session observed for less than min_dwell_minutes, min_fraction
+        of the observed time is enough instead.
+
+        Args:
+            keys: Students to report (e.g. the whole gallery); students in
+                the ledger are always included
+            min_dwell_minutes: Presence needed for a full-length session
+            min_fraction: Share of the observed time needed in short sessions
+
+        Returns:
+            ({student_key: "Present"|"Absent"}, {student_key: fraction of
+            observed time present})
+        """
+        present, observed = self.present_ticks()
+        tick_minutes = self.tick_seconds / 60
+        dwell_ticks = max(1, int(np.ceil(min_dwell_minutes / tick_minutes)))
+        if observed >= dwell_ticks:
+            required = dwell_ticks
+        else:
+            required = max(1, int(np.ceil(min_fraction * observed)))
+        statuses, fractions = {}, {}
+        for key in list(keys) + self.keys:
+            if key in statuses:
+                continue
+            ticks = present.get(key, 0)
+            statuses[key] = "Present" if observed and ticks >= required else "Absent"
+            if observed:
+                fractions[key] = ticks / observed
+        return statuses, fractions
+
+    def flush(self):
+        """Make sure every marked tick is on disk (mark() already flushes)."""
+        with self._lock:
+            self.bits.flush()
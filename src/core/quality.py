@@ -0,0 +1,201 @@
+"""
+Face Quality Module
+Cheap per-face checks (size, detector score, landmark yaw, Laplacian
+sharpness) run before the embedder, so faces that can never match are not
+embedded at all.
+"""
+import math
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# Rejection reasons, in the order they are checked
+QUALITY_REASONS = ('small', 'low_score', 'turned', 'blurry')
+
+
+def face_sizes(bboxes: np.ndarray) -> np.ndarray:
+    """Shorter side of each (N, >=4) box in pixels."""
+    bboxes = np.asarray(bboxes, dtype=np.float32)[:, :4].reshape(-1, 4)
+    return np.minimum(bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1])
+
+
+def estimate_yaw(kpss: np.ndarray) -> np.ndarray:
+    """
+    Rough head yaw in degrees from 5-point landmarks.
+
+    The nose tip moves sideways from the eye midpoint as the head turns
+    while the eyes get closer together; their ratio is about tan(yaw).
+    Measured along the eye line, so in-plane roll does not count as yaw.
+
+    Args:
+        kpss: (N, 5, 2) landmarks (eyes, nose, mouth corners)
+
+    Returns:
+        (N,) absolute yaw in degrees
+    """
+    kpss = np.asarray(kpss, dtype=np.float32)
+    left_eye, right_eye, nose = kpss[:, 0], kpss[:, 1], kpss[:, 2]
+    axis = right_eye - left_eye
+    half_width = np.linalg.norm(axis, axis=1) / 2
+    unit = axis / np.maximum(2 * half_width, 1e-6)[:, None]
+    offset = ((nose - (left_eye + right_eye) / 2) * unit).sum(axis=1)
+    ratio = np.abs(offset) / np.maximum(half_width, 1e-6)
+    # Eyes on top of each other: fully turned
+    ratio[half_width < 1.0] = np.inf
+    return np.degrees(np.arctan(ratio))
+
+
+def sharpness(faces: np.ndarray) -> np.ndarray:
+    """
+    Variance of the Laplacian over the central part of aligned faces (the
+    border may contain background or padding). Higher is sharper.
+
+    Args:
+        faces: (N, 112, 112, 3) aligned BGR faces
+
+    Returns:
+        (N,) sharpness values
+    """
+    values = np.empty(len(faces), dtype=np.float32)
+    margin = faces.shape[1] // 7 if len(faces) else 0
+    for i, face in enumerate(faces):
+        gray = cv2.cvtColor(face[margin:-margin, margin:-margin], cv2.COLOR_BGR2GRAY)
+        values[i] = cv2.Laplacian(gray, cv2.CV_32F).var()
+    return values
+
+
+class FaceQuality:
+    """
+    Quality of the faces of one image, one entry per face. sharpness is
+    NaN for faces rejected before alignment, yaw is NaN when the detector
+    has no landmarks.
+    """
+
+    def __init__(self, size: np.ndarray, score: np.ndarray, yaw: np.ndarray):
+        self.size = size
+        self.score = score
+        self.yaw = yaw
+        self.sharpness = np.full(len(size), np.nan, dtype=np.float32)
+        # '' = passed, otherwise one of QUALITY_REASONS
+        self.reason = np.full(len(size), '', dtype=object)
+        self.quality = np.zeros(len(size), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.size)
+
+    @property
+    def passed(self) -> np.ndarray:
+        """Boolean mask of faces that should be embedded."""
+        return self.reason == ''
+
+    def records(self, bboxes: Optional[np.ndarray] = None, **extra) -> List[dict]:
+        """Per-face dicts (JSON-friendly, NaN as None), e.g. for results and the manifest."""
+        def value(x):
+            return None if math.isnan(x) else round(float(x), 3)
+
+        records = []
+        for i in range(len(self)):
+            record = {
+                'size': value(self.size[i]),
+                'score': value(self.score[i]),
+                'yaw': value(self.yaw[i]),
+                'sharpness': value(self.sharpness[i]),
+                'quality': value(self.quality[i]),
+                'passed': bool(self.reason[i] == ''),
+                'reason': self.reason[i] or None,
+            }
+            if bboxes is not None:
+                record['bbox'] = [int(v) for v in bboxes[i][:4]]
+            record.update(extra)
+            records.append(record)
+        return records
+
+
+class QualityGate:
+    """Decides which detected faces are worth embedding."""
+
+    def __init__(self, min_size: float = 50, min_sharpness: float = 30.0,
+                 min_score: float = 0.6, max_yaw: float = 45.0, enabled: bool = True):
+        """
+        Initialize gate.
+
+        Args:
+            min_size: Minimum shorter box side in image pixels
+            min_sharpness: Minimum Laplacian variance of the aligned face
+            min_score: Minimum detector score
+            max_yaw: Maximum estimated head yaw in degrees
+            enabled: False only measures (nothing is rejected)
+        """
+        self.min_size = min_size
+        self.min_sharpness = min_sharpness
+        self.min_score = min_score
+        self.max_yaw = max_yaw
+        self.enabled = enabled
+
+    def assess(self, bboxes: np.ndarray, kpss: Optional[np.ndarray]) -> FaceQuality:
+        """
+        Geometric checks that need no pixels (size, score, yaw). Run
+        assess_sharpness() on the aligned survivors afterwards.
+
+        Args:
+            bboxes: (N, 5) [x1, y1, x2, y2, score]
+            kpss: (N, 5, 2) landmarks or None
+
+        Returns:
+            FaceQuality for the N faces
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 5)
+        yaw = estimate_yaw(kpss) if kpss is not None else np.full(len(bboxes), np.nan, dtype=np.float32)
+        quality = FaceQuality(face_sizes(bboxes), bboxes[:, 4].copy(), yaw)
+        self._reject(quality, quality.size < self.min_size, 'small')
+        self._reject(quality, quality.score < self.min_score, 'low_score')
+        self._reject(quality, yaw > self.max_yaw, 'turned')
+        self._update_quality(quality)
+        return quality
+
+    def assess_sharpness(self, quality: FaceQuality, faces: np.ndarray, index: Optional[np.ndarray] = None):
+        """
+        Measure sharpness of aligned faces and reject blurry ones.
+
+        Args:
+            quality: FaceQuality from assess()
+            faces: (M, 112, 112, 3) aligned faces
+            index: Which faces of quality these are (default: all, in order)
+        """
+        index = np.arange(len(quality)) if index is None else np.asarray(index)
+        if len(index) == 0:
+            return
+        quality.sharpness[index] = sharpness(faces)
+        blurry = np.zeros(len(quality), dtype=bool)
+        blurry[index] = quality.sharpness[index] < self.min_sharpness
+        self._reject(quality, blurry, 'blurry')
+        self._update_quality(quality)
+
+    def passes(self, record: dict) -> bool:
+        """
+        Check a stored quality record (see FaceQuality.records) against the
+        current thresholds, e.g. after they were changed. Values that were
+        never measured (None) do not fail.
+        """
+        if not self.enabled:
+            return True
+
+        def value(key):
+            v = record.get(key)
+            return math.nan if v is None else v
+
+        return not (value('size') < self.min_size or value('score') < self.min_score
+                    or value('yaw') > self.max_yaw or value('sharpness') < self.min_sharpness)
+
+    def _reject(self, quality: FaceQuality, mask: np.ndarray, reason: str):
+        """Mark faces failing a check (first failing check wins)."""
+        if self.enabled:
+            quality.reason[mask & quality.passed] = reason
+
+    def _update_quality(self, quality: FaceQuality):
+        """Single 0..1 score for ranking faces (each term saturates at its threshold)."""
+        size = np.clip(quality.size / max(self.min_size, 1e-6), 0, 1)
+        sharp = np.nan_to_num(np.clip(quality.sharpness / max(self.min_sharpness, 1e-6), 0, 1), nan=1.0)
+        yaw = np.nan_to_num(np.cos(np.radians(np.minimum(quality.yaw, 90))), nan=1.0)
+        quality.quality = (size * sharp * np.clip(quality.score, 0, 1) * yaw).astype(np.float32)
@@ -0,0 +1,146 @@
+"""
+Model Quantization Module
+INT8 variants of the SCRFD and ArcFace models for CPU-only machines, built
+with ONNX Runtime dynamic or static (QDQ, calibrated) quantization and
+stored next to the fp32 originals as <model>.int8-<mode>.onnx.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ('dynamic', 'static')
+CALIBRATION_METHODS = ('minmax', 'entropy', 'percentile')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def quantized_path(model_path, mode: str) -> Path:
+    """Where the int8 variant of model_path lives (<stem>.int8-<mode>.onnx)."""
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}'")
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.int8-{mode}.onnx")
+
+
+def resolve_model_path(model_path, quantization: Optional[str]) -> str:
+    """
+    Model file to load for the requested precision.
+
+    Args:
+        model_path: fp32 model path
+        quantization: None for fp32, or 'dynamic'/'static' for the int8 variant
+
+    Returns:
+        The int8 variant if it was built, otherwise model_path (with a
+        warning, so a missing artifact never stops the app)
+    """
+    if not quantization:
+        return str(model_path)
+    int8_path = quantized_path(model_path, quantization)
+    if int8_path.exists():
+        return str(int8_path)
+    logger.warning("%s not found (run scripts/quantize_models.py), using fp32 %s",
+                   int8_path.name, Path(model_path).name)
+    return str(model_path)
+
+
+def calibration_images(dataset_dir, limit: int = 200) -> List[str]:
+    """
+    Up to limit image paths from the student dataset, taken round-robin
+    across student folders so every student is represented.
+    """
+    per_folder = []
+    for root, _, files in sorted(os.walk(dataset_dir)):
+        images = [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS)]
+        if images:
+            per_folder.append(images)
+
+    selected = []
+    depth = 0
+    while len(selected) < limit and any(depth < len(images) for images in per_folder):
+        for images in per_folder:
+            if depth < len(images) and len(selected) < limit:
+                selected.append(images[depth])
+        depth += 1
+    return selected
+
+
+def quantize_model(model_path, mode: str = 'static', calibration: Optional[Iterable[np.ndarray]] = None,
+                   output_path=None, per_channel: bool = True, calibrate_method: str = 'minmax') -> Path:
+    """
+    Write the int8 variant of an ONNX model.
+
+    Dynamic quantization only needs the weights; activations are quantized
+    per run. Static quantization fixes activation ranges from calibration
+    inputs and emits a QDQ graph, which is usually the faster choice for
+    conv nets like SCRFD and ArcFace on CPU.
+
+    Args:
+        model_path: fp32 ONNX model
+        mode: 'dynamic' or 'static'
+        calibration: Model inputs (one array per run) for static mode
+        output_path: Destination (default: quantized_path(model_path, mode))
+        per_channel: Per-channel weight scales (more accurate for convs)
+        calibrate_method: 'minmax', 'entropy' or 'percentile' (static mode)
+
+    Returns:
+        Path of the written int8 model
+    """
+    # Needs the onnx package; imported here so the app never pays for it
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_dynamic, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnxruntime as ort
+
+    output_path = Path(output_path or quantized_path(model_path, mode))
+    if mode == 'static' and calibration is None:
+        raise ValueError("Static quantization needs calibration inputs")
+    if calibrate_method not in CALIBRATION_METHODS:
+        raise ValueError(f"Unknown calibration method '{calibrate_method}'")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Shape inference + graph cleanup first, as ONNX Runtime recommends
+        source = Path(tmp) / "preprocessed.onnx"
+        try:
+            quant_pre_process(str(model_path), str(source))
+        except Exception as e:
+            logger.warning("Quantization pre-processing failed (%s), quantizing the original graph", e)
+            source = Path(model_path)
+
+        if mode == 'dynamic':
+            quantize_dynamic(str(source), str(output_path), weight_type=QuantType.QInt8,
+                             per_channel=per_channel)
+        elif mode == 'static':
+            input_name = ort.InferenceSession(
+                str(model_path), providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+            class ArrayReader(CalibrationDataReader):
+                """Feeds the calibration arrays one run at a time."""
+
+                def __init__(self, arrays):
+                    self._arrays = iter(arrays)
+
+                def get_next(self):
+                    array = next(self._arrays, None)
+                    return None if array is None else {input_name: array}
+
+            methods = {
+                'minmax': CalibrationMethod.MinMax,
+                'entropy': CalibrationMethod.Entropy,
+                'percentile': CalibrationMethod.Percentile,
+            }
+            quantize_static(str(source), str(output_path), ArrayReader(calibration),
+                            quant_format=QuantFormat.QDQ, per_channel=per_channel,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                            calibrate_method=methods[calibrate_method])
+        else:
+            raise ValueError(f"Unknown quantization mode '{mode}'")
+
+    logger.info("Wrote %s int8 model %s (%.1f MB -> %.1f MB)", mode, output_path,
+                os.path.getsize(model_path) / 1e6, os.path.getsize(output_path) / 1e6)
+    return output_path
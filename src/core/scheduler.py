@@ -0,0 +1,261 @@
+"""
+Inference Scheduler Module
+Runs all recognition/training work on one bounded worker pool with a
+priority queue, so jobs never pile up as unbounded ad-hoc threads on the
+shared ONNX sessions and face database.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first
+PRIORITY_CAPTURE = 0   # User pressed capture / enroll
+PRIORITY_UPLOAD = 1    # Manual photo upload
+PRIORITY_TRAINING = 2  # Retrain after enroll/delete
+PRIORITY_LIVE = 3      # Periodic live analysis (droppable)
+
+PRIORITY_NAMES = {
+    PRIORITY_CAPTURE: "capture",
+    PRIORITY_UPLOAD: "upload",
+    PRIORITY_TRAINING: "training",
+    PRIORITY_LIVE: "live",
+}
+
+
+class _Job:
+    """One queued call."""
+
+    __slots__ = ("priority", "seq", "func", "args", "kwargs", "future",
+                 "submitted", "max_age", "droppable", "coalesce_key", "dropped")
+
+    def __init__(self, priority, seq, func, args, kwargs, max_age, droppable, coalesce_key):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted = time.perf_counter()
+        self.max_age = max_age
+        self.droppable = droppable
+        self.coalesce_key = coalesce_key
+        self.dropped = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class InferenceScheduler:
+    """Bounded worker pool fed by a priority queue."""
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Maximum number of pending jobs. When full, the oldest
+                droppable (live) job is dropped to make room; if there is
+                none, a new droppable job is rejected while user-triggered
+                jobs are still accepted so no user action is lost
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+
+        self._heap = []
+        self._pending = 0
+        self._seq = itertools.count()
+        self._coalesce: Dict[str, _Job] = {}
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._running = 0
+
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "dropped_stale": 0,
+            "dropped_replaced": 0,
+            "dropped_full": 0,
+            "rejected": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"inference-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # -------------------- SUBMIT --------------------
+    def submit(self, priority: int, func: Callable, *args,
+               max_age: Optional[float] = None, coalesce_key: Optional[str] = None,
+               **kwargs) -> Future:
+        """
+        Queue func(*args, **kwargs).
+
+        Args:
+            priority: One of the PRIORITY_* constants (lower runs first)
+            func: Callable to run on a worker
+            max_age: Drop the job (future cancelled) if it waited longer than
+                this many seconds before a worker picked it up. Jobs with a
+                max_age are also the ones dropped when the queue is full
+            coalesce_key: Only the newest pending job per key is kept; an
+                older pending job with the same key is dropped
+
+        Returns:
+            Future for the result (cancelled if the job was dropped)
+        """
+        droppable = max_age is not None
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+
+            job = _Job(priority, next(self._seq), func, args, kwargs, max_age, droppable, coalesce_key)
+            self._stats["submitted"] += 1
+
+            if coalesce_key is not None:
+                older = self._coalesce.get(coalesce_key)
+                if older is not None and not older.dropped:
+                    self._drop(older, "dropped_replaced")
+                self._coalesce[coalesce_key] = job
+
+            if self._pending >= self.max_queue and not self._drop_oldest_droppable() and droppable:
+                self._stats["rejected"] += 1
+                logger.warning("Inference queue full (%d), rejecting %s job",
+                               self._pending, PRIORITY_NAMES.get(priority, priority))
+                if coalesce_key is not None:
+                    self._coalesce.pop(coalesce_key, None)
+                job.future.cancel()
+                return job.future
+
+            heapq.heappush(self._heap, job)
+            self._pending += 1
+            self._cond.notify()
+            return job.future
+
+    # -------------------- STATS --------------------
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        with self._cond:
+            return self._pending
+
+    def stats(self) -> dict:
+        """
+        Snapshot of queue depth, per-priority depth, wait times and counters.
+
+        Returns:
+            Dict with queue_depth, running, depth_by_priority, avg_wait_ms,
+            max_wait_ms and the job counters
+        """
+        with self._cond:
+            depth_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+            for job in self._heap:
+                if not job.dropped:
+                    name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+                    depth_by_priority[name] = depth_by_priority.get(name, 0) + 1
+
+            stats = dict(self._stats)
+            started = stats["completed"] + stats["failed"]
+            # Always pop, so the returned keys are the same on every call
+            wait_total = stats.pop("wait_total")
+            stats["avg_wait_ms"] = 1000 * wait_total / started if started else 0.0
+            stats["max_wait_ms"] = 1000 * stats.pop("wait_max")
+            stats["queue_depth"] = self._pending
+            stats["running"] = self._running
+            stats["depth_by_priority"] = depth_by_priority
+            return stats
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs, cancel pending ones and stop the workers."""
+        with self._cond:
+            self._shutdown = True
+            for job in self._heap:
+                if not job.dropped:
+                    job.dropped = True
+                    job.future.cancel()
+            self._heap = []
+            self._pending = 0
+            self._coalesce.clear()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    # -------------------- INTERNALS --------------------
+    def _drop(self, job: _Job, reason: str):
+        """Mark a queued job dropped (lazily removed from the heap). Caller holds the lock."""
+        job.dropped = True
+        self._pending -= 1
+        self._stats[reason] += 1
+        job.future.cancel()
+        if job.coalesce_key is not None and self._coalesce.get(job.coalesce_key) is job:
+            del self._coalesce[job.coalesce_key]
+
+    def _drop_oldest_droppable(self) -> bool:
+        """Make room by dropping the oldest droppable job. Caller holds the lock."""
+        candidates = [job for job in self._heap if job.droppable and not job.dropped]
+        if not candidates:
+            return False
+        self._drop(min(candidates, key=lambda job: job.seq), "dropped_full")
+        return True
+
+    def _next_job(self) -> Optional[_Job]:
+        """Block until a runnable job is available (None on shutdown)."""
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0].dropped:
+                    heapq.heappop(self._heap)
+                if self._shutdown:
+                    return None
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                job = heapq.heappop(self._heap)
+                waited = time.perf_counter() - job.submitted
+                if job.max_age is not None and waited > job.max_age:
+                    self._drop(job, "dropped_stale")
+                    continue
+
+                self._pending -= 1
+                if job.coalesce_key is not None and self._coalesce.get(job.coalesce_key) is job:
+                    del self._coalesce[job.coalesce_key]
+                self._running += 1
+                self._stats["wait_total"] += waited
+                self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+                return job
+
+    def _worker_loop(self):
+        """Run jobs until shutdown."""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                with self._cond:
+                    self._running -= 1
+                continue
+
+            try:
+                result = job.func(*job.args, **job.kwargs)
+            except BaseException as e:
+                logger.error("Inference job %s failed: %s",
+                             getattr(job.func, "__name__", job.func), e)
+                job.future.set_exception(e)
+                outcome = "failed"
+            else:
+                job.future.set_result(result)
+                outcome = "completed"
+
+            with self._cond:
+                self._running -= 1
+                self._stats[outcome] += 1
@@ -0,0 +1,243 @@
+"""
+SCRFD Module
+Native SCRFD face detector on onnxruntime alone: anchor generation,
+distance-to-bbox/keypoint decoding and NMS in NumPy. Same outputs as
+insightface's model_zoo SCRFD, without importing insightface (whose
+dependency tree dominated startup).
+"""
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+# Output layouts of the exported SCRFD graphs:
+# number of outputs -> (feature map count, strides, anchors per location, has keypoints)
+OUTPUT_LAYOUTS = {
+    6: (3, (8, 16, 32), 2, False),
+    9: (3, (8, 16, 32), 2, True),
+    10: (5, (8, 16, 32, 64, 128), 1, False),
+    15: (5, (8, 16, 32, 64, 128), 1, True),
+}
+
+# Input normalization the models were trained with (BGR -> RGB, (x - mean) / std)
+INPUT_MEAN = 127.5
+INPUT_STD = 128.0
+
+
+def nms(dets: np.ndarray, iou_threshold: float = 0.4) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    The pairwise IoU matrix is computed in one vectorized step; the greedy
+    pass then only indexes into it.
+
+    Args:
+        dets: (N, 5) array of [x1, y1, x2, y2, score]
+        iou_threshold: Boxes overlapping a kept box by more than this are dropped
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if len(dets) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = dets[:, 4].argsort()[::-1]
+    boxes = dets[order, :4]
+    areas = (boxes[:, 2] - boxes[:, 0] + 1) * (boxes[:, 3] - boxes[:, 1] + 1)
+
+    xx1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    yy1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    xx2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    yy2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.maximum(0.0, xx2 - xx1 + 1) * np.maximum(0.0, yy2 - yy1 + 1)
+    iou = inter / (areas[:, None] + areas[None, :] - inter)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= iou[i] > iou_threshold
+    return order[keep]
+
+
+def letterbox(img: np.ndarray, input_size: Tuple[int, int]) -> Tuple[np.ndarray, float]:
+    """
+    Resize img into input_size (width, height) keeping its aspect ratio and
+    pad at the bottom/right, as the model was trained.
+
+    Returns:
+        (padded BGR image, scale from image to input pixels)
+    """
+    im_ratio = img.shape[0] / img.shape[1]
+    model_ratio = input_size[1] / input_size[0]
+    if im_ratio > model_ratio:
+        new_height = input_size[1]
+        new_width = int(new_height / im_ratio)
+    else:
+        new_width = input_size[0]
+        new_height = int(new_width * im_ratio)
+    det_scale = new_height / img.shape[0]
+
+    det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
+    det_img[:new_height, :new_width] = cv2.resize(img, (new_width, new_height))
+    return det_img, det_scale
+
+
+def to_blob(det_img: np.ndarray) -> np.ndarray:
+    """(1, 3, H, W) float32 network input for a padded BGR image."""
+    h, w = det_img.shape[:2]
+    return cv2.dnn.blobFromImage(det_img, 1.0 / INPUT_STD, (w, h), (INPUT_MEAN,) * 3, swapRB=True)
+
+
+def anchor_centers(height: int, width: int, stride: int, num_anchors: int) -> np.ndarray:
+    """
+    (height * width * num_anchors, 2) anchor centers [x, y] of one feature map,
+    row-major, each location repeated num_anchors times.
+    """
+    centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+    centers = (centers * stride).reshape(-1, 2)
+    if num_anchors > 1:
+        centers = np.repeat(centers, num_anchors, axis=0)
+    return centers
+
+
+def distance2bbox(points: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """Decode (left, top, right, bottom) distances from anchor centers to [x1, y1, x2, y2]."""
+    return np.concatenate([points - distance[:, 0:2], points + distance[:, 2:4]], axis=-1)
+
+
+def distance2kps(points: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """Decode keypoint offsets from anchor centers to (N, K, 2) keypoints."""
+    return distance.reshape(len(distance), -1, 2) + points[:, None, :]
+
+
+class SCRFD:
+    """SCRFD detector running on a caller-provided onnxruntime session."""
+
+    def __init__(self, session, det_thresh: float = 0.5, nms_thresh: float = 0.4):
+        """
+        Initialize detector and read the graph's input/output layout.
+
+        Args:
+            session: onnxruntime.InferenceSession of an SCRFD model
+            det_thresh: Minimum face score
+            nms_thresh: IoU above which overlapping detections are merged
+        """
+        self.session = session
+        self.det_thresh = det_thresh
+        self.nms_thresh = nms_thresh
+        # (height, width, stride) -> anchor centers
+        self.center_cache = {}
+
+        input_cfg = session.get_inputs()[0]
+        self.input_name = input_cfg.name
+        # Fixed input size if the graph has one, else chosen per call
+        shape = input_cfg.shape
+        self.input_size = None if isinstance(shape[2], str) else tuple(shape[2:4][::-1])
+
+        outputs = session.get_outputs()
+        self.output_names = [o.name for o in outputs]
+        self.batched = len(outputs[0].shape) == 3
+        if len(outputs) not in OUTPUT_LAYOUTS:
+            raise ValueError(f"Unsupported SCRFD graph with {len(outputs)} outputs")
+        self.fmc, self.strides, self.num_anchors, self.use_kps = OUTPUT_LAYOUTS[len(outputs)]
+
+    def prepare(self, input_size: Optional[Tuple[int, int]] = None,
+                det_thresh: Optional[float] = None, nms_thresh: Optional[float] = None):
+        """Set the default input size (width, height) and thresholds."""
+        if input_size is not None:
+            self.input_size = tuple(input_size)
+        if det_thresh is not None:
+            self.det_thresh = det_thresh
+        if nms_thresh is not None:
+            self.nms_thresh = nms_thresh
+
+    def _anchors(self, height: int, width: int, stride: int) -> np.ndarray:
+        key = (height, width, stride)
+        centers = self.center_cache.get(key)
+        if centers is None:
+            centers = anchor_centers(height, width, stride, self.num_anchors)
+            if len(self.center_cache) < 100:
+                self.center_cache[key] = centers
+        return centers
+
+    def forward(self, det_img: np.ndarray, threshold: float):
+        """
+        Run the network on an already padded BGR input image.
+
+        Returns:
+            Per-stride lists of scores (M, 1), boxes (M, 4) and keypoints
+            (M, 5, 2) for anchors scoring at least threshold, in input pixels
+        """
+        input_h, input_w = det_img.shape[:2]
+        net_outs = self.session.run(self.output_names, {self.input_name: to_blob(det_img)})
+        if self.batched:
+            net_outs = [out[0] for out in net_outs]
+
+        scores_list, bboxes_list, kpss_list = [], [], []
+        fmc = self.fmc
+        for idx, stride in enumerate(self.strides):
+            scores = net_outs[idx]
+            pos = np.where(scores.ravel() >= threshold)[0]
+            if len(pos) == 0:
+                continue
+            centers = self._anchors(input_h // stride, input_w // stride, stride)[pos]
+            # Only the anchors above threshold are decoded
+            scores_list.append(scores[pos])
+            bboxes_list.append(distance2bbox(centers, net_outs[idx + fmc][pos] * stride))
+            if self.use_kps:
+                kpss_list.append(distance2kps(centers, net_outs[idx + fmc * 2][pos] * stride))
+        return scores_list, bboxes_list, kpss_list
+
+    def detect(self, img: np.ndarray, input_size: Optional[Tuple[int, int]] = None,
+               max_num: int = 0, metric: str = 'default'):
+        """
+        Detect faces in a BGR image.
+
+        The image is letterboxed into input_size (see letterbox).
+
+        Args:
+            img: BGR image
+            input_size: (width, height) network input (defaults to prepare())
+            max_num: Keep only this many faces (0 = all), ranked by metric
+            metric: 'default' (area minus distance from center) or 'max' (area)
+
+        Returns:
+            (bboxes, kpss): (N, 5) [x1, y1, x2, y2, score] and (N, 5, 2)
+            landmarks (None for graphs without keypoints), image coordinates
+        """
+        input_size = input_size or self.input_size
+        if input_size is None:
+            raise ValueError("SCRFD needs an input_size (graph has a dynamic input)")
+
+        det_img, det_scale = letterbox(img, input_size)
+        scores_list, bboxes_list, kpss_list = self.forward(det_img, self.det_thresh)
+        if not scores_list:
+            kpss = np.zeros((0, 5, 2), dtype=np.float32) if self.use_kps else None
+            return np.zeros((0, 5), dtype=np.float32), kpss
+
+        scores = np.vstack(scores_list)
+        order = scores.ravel().argsort()[::-1]
+        bboxes = np.vstack(bboxes_list) / det_scale
+        pre_det = np.hstack((bboxes, scores)).astype(np.float32, copy=False)[order]
+        keep = nms(pre_det, self.nms_thresh)
+        det = pre_det[keep]
+        kpss = None
+        if self.use_kps:
+            kpss = (np.vstack(kpss_list) / det_scale)[order][keep]
+
+        if 0 < max_num < len(det):
+            area = (det[:, 2] - det[:, 0]) * (det[:, 3] - det[:, 1])
+            if metric == 'max':
+                values = area
+            else:
+                center = np.array([img.shape[0] // 2, img.shape[1] // 2])
+                offsets = np.vstack([(det[:, 0] + det[:, 2]) / 2 - center[1],
+                                     (det[:, 1] + det[:, 3]) / 2 - center[0]])
+                values = area - 2.0 * np.sum(np.power(offsets, 2.0), 0)
+            index = np.argsort(values)[::-1][:max_num]
+            det = det[index]
+            if kpss is not None:
+                kpss = kpss[index]
+        return det, kpss
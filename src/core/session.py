@@ -0,0 +1,289 @@
+"""
+ONNX Runtime Session Module
+One factory that builds the InferenceSession of every model (SCRFD,
+ArcFace) with the same threading, optimization and memory settings, and
+keeps OpenCV's thread pool from competing with them for cores.
+
+Graph optimization is done once: the optimized graph is saved next to the
+original as <model>.opt.onnx (with a <model>.opt.json sidecar holding the
+source hash) and later launches load it with optimization disabled. The
+sidecar also records the source size and mtime, so an unchanged model is
+not hashed again on every start.
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import onnxruntime as ort
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZATION_LEVELS = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    'sequential': ort.ExecutionMode.ORT_SEQUENTIAL,
+    'parallel': ort.ExecutionMode.ORT_PARALLEL,
+}
+
+# Sidecar fields that only record when the source was hashed
+_SOURCE_STAT_KEYS = ("source_size", "source_mtime_ns")
+
+
+class SessionFactory:
+    """Builds identically configured ONNX Runtime sessions."""
+
+    def __init__(self, intra_op_threads: int = 0, inter_op_threads: int = 1,
+                 execution_mode: str = 'sequential', optimization_level: str = 'all',
+                 enable_mem_arena: bool = True, enable_mem_pattern: bool = True,
+                 use_gpu: bool = False, opencv_threads: int = 0,
+                 cache_optimized: bool = True):
+        """
+        Initialize factory and apply the OpenCV thread setting.
+
+        Args:
+            intra_op_threads: Threads per operator; 0 = half the logical cores
+            inter_op_threads: Threads across operators (only used by the
+                'parallel' execution mode)
+            execution_mode: 'sequential' or 'parallel'
+            optimization_level: 'disable', 'basic', 'extended' or 'all'
+            enable_mem_arena: Use the CPU memory arena (faster, keeps memory)
+            enable_mem_pattern: Pre-plan allocations for fixed input shapes
+            use_gpu: Prefer CUDAExecutionProvider when it is available
+            opencv_threads: cv2.setNumThreads value; 0 = the cores ONNX
+                Runtime does not use, -1 = leave OpenCV's default
+            cache_optimized: Save the optimized graph next to each model and
+                load it on later starts while the source hash matches
+        """
+        cpu_count = os.cpu_count() or 2
+        self.intra_op_threads = int(intra_op_threads) if intra_op_threads > 0 else max(1, cpu_count // 2)
+        self.inter_op_threads = max(1, int(inter_op_threads))
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{execution_mode}'")
+        if optimization_level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown optimization level '{optimization_level}'")
+        self.execution_mode = execution_mode
+        self.optimization_level = optimization_level
+        self.enable_mem_arena = bool(enable_mem_arena)
+        self.enable_mem_pattern = bool(enable_mem_pattern)
+        self.providers = self._select_providers(use_gpu)
+        self.cache_optimized = bool(cache_optimized)
+
+        if opencv_threads == 0:
+            opencv_threads = max(1, cpu_count - self.intra_op_threads)
+        self.opencv_threads = opencv_threads
+        if opencv_threads > 0:
+            cv2.setNumThreads(opencv_threads)
+
+        logger.info(
+            "ONNX Runtime %s: providers=%s, intra_op_threads=%d, inter_op_threads=%d, "
+            "execution_mode=%s, optimization=%s, mem_arena=%s, mem_pattern=%s, "
+            "opencv_threads=%d (of %d cores), optimized cache=%s",
+            ort.__version__, self.providers, self.intra_op_threads, self.inter_op_threads,
+            self.execution_mode, self.optimization_level, self.enable_mem_arena,
+            self.enable_mem_pattern, cv2.getNumThreads(), cpu_count, self.cache_optimized,
+        )
+
+    @staticmethod
+    def _select_providers(use_gpu: bool) -> List[str]:
+        """CUDA first if requested and installed, CPU always as fallback."""
+        available = ort.get_available_providers()
+        providers = []
+        if use_gpu:
+            if 'CUDAExecutionProvider' in available:
+                providers.append('CUDAExecutionProvider')
+            else:
+                logger.warning("USE_GPU is set but CUDAExecutionProvider is not available, using CPU")
+        providers.append('CPUExecutionProvider')
+        return providers
+
+    def session_options(self) -> ort.SessionOptions:
+        """SessionOptions with the configured threading/optimization/memory settings."""
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = EXECUTION_MODES[self.execution_mode]
+        options.graph_optimization_level = OPTIMIZATION_LEVELS[self.optimization_level]
+        options.enable_cpu_mem_arena = self.enable_mem_arena
+        options.enable_mem_pattern = self.enable_mem_pattern
+        return options
+
+    def create(self, model_path, options: Optional[ort.SessionOptions] = None) -> ort.InferenceSession:
+        """
+        Create an InferenceSession for model_path.
+
+        With cache_optimized, a matching pre-optimized artifact is loaded
+        instead of the original (optimization disabled); if it is missing or
+        stale, this session writes a fresh one while it is being created.
+
+        Args:
+            model_path: Path to the .onnx model
+            options: Optional pre-built options (defaults to session_options())
+
+        Returns:
+            The session; creation time, source and providers are logged
+        """
+        start = time.perf_counter()
+        model_path = Path(model_path)
+        options = options or self.session_options()
+        load_path, source, pending = model_path, "original", None
+
+        if self.cache_optimized and options.graph_optimization_level != ort.GraphOptimizationLevel.ORT_DISABLE_ALL:
+            artifact, sidecar = self.optimized_paths(model_path)
+            current, meta = self._artifact_current(model_path, artifact, sidecar)
+            if current:
+                load_path, source = artifact, "pre-optimized"
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            else:
+                # Write to a temp name first so a crash never leaves a half-written artifact
+                pending = (artifact.with_suffix(".tmp"), artifact, sidecar, meta)
+                options.optimized_model_filepath = str(pending[0])
+                source = "original, saving optimized graph"
+
+        session = ort.InferenceSession(
+            str(load_path),
+            sess_options=options,
+            providers=self.providers,
+        )
+
+        if pending is not None:
+            self._commit_artifact(*pending)
+
+        logger.info(
+            "Created session for %s in %.2fs from %s (providers=%s)",
+            model_path.name, time.perf_counter() - start, source, session.get_providers(),
+        )
+        return session
+
+    # -------------------- OPTIMIZED ARTIFACTS --------------------
+    @staticmethod
+    def optimized_paths(model_path):
+        """(<model>.opt.onnx, <model>.opt.json) next to the original model."""
+        model_path = Path(model_path)
+        return (model_path.with_name(model_path.stem + ".opt.onnx"),
+                model_path.with_name(model_path.stem + ".opt.json"))
+
+    def optimize(self, model_path, force: bool = False) -> bool:
+        """
+        Write the pre-optimized artifact for model_path (one-time step).
+
+        Args:
+            model_path: Path to the original .onnx model
+            force: Rebuild even if a matching artifact exists
+
+        Returns:
+            True if an artifact was written, False if it was already current
+        """
+        model_path = Path(model_path)
+        artifact, sidecar = self.optimized_paths(model_path)
+        current, meta = self._artifact_current(model_path, artifact, sidecar)
+        if not force and current:
+            return False
+
+        tmp = artifact.with_suffix(".tmp")
+        options = self.session_options()
+        options.optimized_model_filepath = str(tmp)
+        ort.InferenceSession(str(model_path), sess_options=options, providers=self.providers)
+        return self._commit_artifact(tmp, artifact, sidecar, meta)
+
+    def _artifact_current(self, model_path: Path, artifact: Path, sidecar: Path) -> Tuple[bool, dict]:
+        """
+        Whether the artifact can be loaded instead of model_path.
+
+        Returns:
+            (current, meta): meta describes the source as it is now, for
+            the sidecar of a rebuilt artifact
+        """
+        stored = self._read_sidecar(sidecar)
+        meta = self._artifact_meta(model_path, stored)
+        if stored is None or not artifact.exists():
+            return False, meta
+        if any(stored.get(key) != value for key, value in meta.items() if key not in _SOURCE_STAT_KEYS):
+            return False, meta
+        if any(stored.get(key) != meta[key] for key in _SOURCE_STAT_KEYS):
+            # Touched (or copied) but identical model: record the new stat so
+            # the next start does not hash it again
+            self._write_sidecar(sidecar, meta)
+        return True, meta
+
+    def _artifact_meta(self, model_path: Path, stored: Optional[dict] = None) -> dict:
+        """
+        What an artifact must have been built from to be reusable: the source
+        hash plus everything that changes the optimized graph (optimized
+        graphs can contain CPU/provider-specific kernels).
+
+        The source is only hashed when its size or mtime differ from the
+        stored sidecar; otherwise the stored hash is reused.
+        """
+        st = model_path.stat()
+        if (stored and stored.get("source_sha1") and stored.get("source_size") == st.st_size
+                and stored.get("source_mtime_ns") == st.st_mtime_ns):
+            source_sha1 = stored["source_sha1"]
+        else:
+            source_sha1 = file_sha1(model_path)
+        return {
+            "source_sha1": source_sha1,
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "ort_version": ort.__version__,
+            "optimization_level": self.optimization_level,
+            "providers": self.providers,
+            "machine": platform.machine(),
+        }
+
+    @staticmethod
+    def _read_sidecar(sidecar: Path) -> Optional[dict]:
+        try:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_sidecar(sidecar: Path, meta: dict):
+        """Write the sidecar atomically (best effort: a stale one only costs a re-hash)."""
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp, sidecar)
+        except OSError as e:
+            logger.warning("Could not update %s: %s", sidecar.name, e)
+
+    @staticmethod
+    def _commit_artifact(tmp: Path, artifact: Path, sidecar: Path, meta: dict) -> bool:
+        """Move the freshly written graph into place and record its source hash."""
+        try:
+            os.replace(tmp, artifact)
+            with open(sidecar, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+        except OSError as e:
+            # Read-only model dir etc.: just keep optimizing at startup
+            logger.warning("Could not save optimized model %s: %s", artifact.name, e)
+            for path in (tmp, artifact):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return False
+        logger.info("Saved optimized model %s", artifact)
+        return True
+
+
+def file_sha1(path, chunk_size: int = 1 << 20) -> str:
+    """SHA1 of a file, read in chunks (models are too big to hash in one read)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
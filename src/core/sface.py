@@ -0,0 +1,129 @@
+"""
+SFace Embedding Module
+OpenCV's built-in SFace recognizer (cv2.FaceRecognizerSF) with the same
+interface as the ArcFace FaceEmbedder. 128-d embeddings from a much
+smaller network, so several times faster on CPU.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SFaceEmbedder:
+    """SFace-based face embedder (OpenCV DNN)."""
+
+    # Galleries and training manifests are tagged with this (faces are
+    # landmark-aligned, see core/alignment.py)
+    backend_id = "sface_2021dec_aligned"
+    embedding_size = 128
+
+    def __init__(self, model_path=None, max_batch_size=32):
+        """
+        Initialize face embedder.
+
+        Args:
+            model_path: Path to face_recognition_sface_*.onnx. If None, uses
+                ./models/opencv/face_recognition_sface_2021dec.onnx
+            max_batch_size: Unused (SFace runs one face per call), kept so
+                both embedders take the same arguments
+        """
+        self.model = None
+        self.model_path = model_path
+        self.input_size = (112, 112)
+        self.max_batch_size = max(1, int(max_batch_size))
+        # One cv::dnn::Net behind the recognizer: calls must not interleave
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        """Load SFace model."""
+        if self.model is None:
+            try:
+                model_path = self.model_path or './models/opencv/face_recognition_sface_2021dec.onnx'
+                if not Path(model_path).exists():
+                    raise FileNotFoundError(f"Model not found at {model_path}")
+
+                logger.info(f"Loading embedder from {model_path}")
+                start = time.perf_counter()
+                self.model = cv2.FaceRecognizerSF.create(str(model_path), "")
+                logger.info("Created SFace recognizer in %.2fs", time.perf_counter() - start)
+            except Exception as e:
+                raise Exception(f"Failed to load SFace model: {e}")
+
+    def warmup(self):
+        """
+        Load the model and run one dummy face so the first real face does
+        not pay for model loading and first-run allocations.
+
+        Returns:
+            Dict with 'load' and 'inference' times in seconds
+        """
+        start = time.perf_counter()
+        self._load_model()
+        loaded = time.perf_counter()
+        self.get_embeddings_batch([np.zeros((self.input_size[1], self.input_size[0], 3), dtype=np.uint8)])
+        return {'load': loaded - start, 'inference': time.perf_counter() - loaded}
+
+    def get_embedding(self, face_image):
+        """
+        Generate embedding for a face image.
+
+        Args:
+            face_image: BGR face crop (numpy array)
+
+        Returns:
+            Normalized 128-dimensional embedding vector
+        """
+        return self.get_embeddings_batch([face_image])[0]
+
+    def get_embeddings_aligned(self, faces, max_batch_size=None):
+        """
+        Generate embeddings for faces aligned by core.alignment.align_faces
+        (same 112x112 template SFace was trained on).
+
+        Args:
+            faces: (N, 112, 112, 3) uint8 BGR buffer
+            max_batch_size: Unused, see __init__
+
+        Returns:
+            (N, 128) array of normalized embeddings
+        """
+        self._load_model()
+        embeddings = np.empty((len(faces), self.embedding_size), dtype=np.float32)
+        for i, face in enumerate(faces):
+            with self._lock:
+                embeddings[i] = np.asarray(self.model.feature(face), dtype=np.float32).ravel()
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-10)
+        return embeddings
+
+    def get_embeddings_batch(self, face_images, max_batch_size=None):
+        """
+        Generate embeddings for multiple BGR face crops.
+
+        Args:
+            face_images: List of face crops
+            max_batch_size: Unused, see __init__
+
+        Returns:
+            List of normalized embedding vectors
+        """
+        self._load_model()
+        embeddings = []
+        for face_image in face_images:
+            try:
+                if hasattr(face_image, 'mode'):
+                    face_image = cv2.cvtColor(np.array(face_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+                face = cv2.resize(face_image, self.input_size)
+                with self._lock:
+                    feature = self.model.feature(face)
+                embedding = np.asarray(feature, dtype=np.float32).ravel()
+                embeddings.append(embedding / max(np.linalg.norm(embedding), 1e-10))
+            except Exception as e:
+                print(f"Error processing face: {e}")
+                continue
+        return embeddings
@@ -0,0 +1,250 @@
+"""
+Face Tracker Module
+Lightweight IoU/centroid tracker for live-frame detections, with an
+optional constant-velocity Kalman filter. Every track keeps the identity
+it was last recognized as, so a face is only embedded again when its
+track is new, its association confidence has decayed or its re-verify
+interval has expired.
+"""
+import itertools
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, >=4) and (M, >=4) [x1, y1, x2, y2] boxes -> (N, M)."""
+    a = np.asarray(a, dtype=np.float32)[:, :4]
+    b = np.asarray(b, dtype=np.float32)[:, :4]
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class KalmanBoxFilter:
+    """
+    Constant-velocity Kalman filter over box center and size
+    ([cx, cy, w, h] and their velocities), noise scaled by box size.
+    """
+
+    # Standard deviations per second, relative to the box size
+    POSITION_STD = 1.0 / 20
+    VELOCITY_STD = 1.0 / 160
+
+    def __init__(self, box: np.ndarray):
+        measurement = self._to_measurement(box)
+        self.mean = np.concatenate([measurement, np.zeros(4)])
+        size = max(measurement[2], measurement[3])
+        std = np.r_[[2 * self.POSITION_STD * size] * 4, [10 * self.VELOCITY_STD * size] * 4]
+        self.covariance = np.diag(std ** 2)
+
+    @staticmethod
+    def _to_measurement(box) -> np.ndarray:
+        x1, y1, x2, y2 = [float(v) for v in box[:4]]
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    @property
+    def box(self) -> np.ndarray:
+        """Current estimate as [x1, y1, x2, y2]."""
+        cx, cy, w, h = self.mean[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+    def predict(self, dt: float):
+        """Advance the state by dt seconds."""
+        dt = max(float(dt), 0.0)
+        transition = np.eye(8)
+        transition[:4, 4:] = dt * np.eye(4)
+        size = max(self.mean[2], self.mean[3], 1.0)
+        std = np.r_[[self.POSITION_STD * size * dt] * 4, [self.VELOCITY_STD * size * dt] * 4]
+        self.mean = transition @ self.mean
+        self.covariance = transition @ self.covariance @ transition.T + np.diag(std ** 2)
+        # Boxes cannot shrink below a pixel
+        self.mean[2:4] = np.maximum(self.mean[2:4], 1.0)
+
+    def update(self, box: np.ndarray):
+        """Correct the state with a measured box."""
+        measurement = self._to_measurement(box)
+        size = max(measurement[2], measurement[3], 1.0)
+        innovation_cov = self.covariance[:4, :4] + np.diag([(self.POSITION_STD * size) ** 2] * 4)
+        gain = self.covariance[:, :4] @ np.linalg.inv(innovation_cov)
+        self.mean = self.mean + gain @ (measurement - self.mean[:4])
+        self.covariance = self.covariance - gain @ self.covariance[:4, :]
+
+
+class Track:
+    """One tracked face and the identity it was last recognized as."""
+
+    __slots__ = ("track_id", "box", "filter", "predicted_at", "identity", "similarity", "matched",
+                 "confidence", "verified_at", "last_seen", "hits", "misses")
+
+    def __init__(self, track_id: int, box: np.ndarray, now: float, use_kalman: bool = False):
+        self.track_id = track_id
+        self.box = np.asarray(box[:4], dtype=np.float32)
+        self.filter = KalmanBoxFilter(box) if use_kalman else None
+        self.predicted_at = now
+        self.identity: Optional[str] = None
+        self.similarity = 0.0
+        self.matched = False
+        # 1.0 right after verification, decays with weak associations
+        self.confidence = 0.0
+        self.verified_at: Optional[float] = None
+        self.last_seen = now
+        self.hits = 1
+        self.misses = 0
+
+    def predicted_box(self, now: float) -> np.ndarray:
+        """Where the face is expected at time now (last box without Kalman)."""
+        if self.filter is None:
+            return self.box
+        self.filter.predict(now - self.predicted_at)
+        self.predicted_at = now
+        return self.filter.box
+
+
+class FaceTracker:
+    """Associates detections across live frames and caches identities per track."""
+
+    def __init__(self, iou_threshold: float = 0.3, centroid_threshold: float = 0.5,
+                 max_misses: int = 2, reverify_seconds: float = 300.0,
+                 unknown_reverify_seconds: float = 60.0, min_confidence: float = 0.6,
+                 use_kalman: bool = False):
+        """
+        Initialize tracker.
+
+        Args:
+            iou_threshold: Minimum IoU for a detection to continue a track
+            centroid_threshold: Fallback for low IoU: maximum center distance
+                as a fraction of the track's box size
+            max_misses: Updates a track may go undetected before it is dropped
+            reverify_seconds: Re-embed a recognized track after this long
+            unknown_reverify_seconds: Re-embed an unrecognized track after this long
+            min_confidence: Re-embed a track whose confidence fell below this
+            use_kalman: Predict boxes with a constant-velocity Kalman filter
+        """
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_misses = max(0, int(max_misses))
+        self.reverify_seconds = reverify_seconds
+        self.unknown_reverify_seconds = unknown_reverify_seconds
+        self.min_confidence = min_confidence
+        self.use_kalman = use_kalman
+        self.gallery_version: Optional[int] = None
+        self.tracks: List[Track] = []
+        self._ids = itertools.count(1)
+        self._stats = {"updates": 0, "detections": 0, "embedded": 0, "reused": 0, "tracks_created": 0}
+
+    def reset(self):
+        """Forget all tracks (new session or camera)."""
+        self.tracks = []
+        self.gallery_version = None
+
+    def reset_identities(self, gallery_version: Optional[int] = None):
+        """Keep the tracks but re-embed all of them (e.g. the gallery changed)."""
+        self.gallery_version = gallery_version
+        for track in self.tracks:
+            track.verified_at = None
+
+    def update(self, bboxes: np.ndarray, now: float) -> List[Track]:
+        """
+        Associate detections with tracks, greedily by IoU, then by center
+        distance for the rest. Unassociated detections start new tracks,
+        tracks missed too often are dropped.
+
+        Args:
+            bboxes: (N, >=4) detections [x1, y1, x2, y2, ...]
+            now: Timestamp in seconds (monotonic)
+
+        Returns:
+            The track of every detection, in detection order
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float32)
+        predicted = np.array([t.predicted_box(now) for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        assigned: Dict[int, int] = {}  # detection -> track index
+        taken = set()
+        factors: Dict[int, float] = {}
+
+        if len(self.tracks) and len(bboxes):
+            ious = iou_matrix(bboxes, predicted)
+            for det, trk in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[det, trk] < self.iou_threshold:
+                    break
+                if det in assigned or trk in taken:
+                    continue
+                assigned[det] = trk
+                taken.add(trk)
+                factors[det] = 0.5 + 0.5 * float(ious[det, trk])
+
+            # Centroid fallback (large jumps between sparse live ticks)
+            det_centers = (bboxes[:, :2] + bboxes[:, 2:4]) / 2
+            trk_centers = (predicted[:, :2] + predicted[:, 2:4]) / 2
+            trk_sizes = np.maximum(predicted[:, 2] - predicted[:, 0], predicted[:, 3] - predicted[:, 1])
+            distances = np.linalg.norm(det_centers[:, None] - trk_centers[None], axis=2) / np.maximum(trk_sizes, 1.0)
+            for det, trk in zip(*np.unravel_index(np.argsort(distances, axis=None), distances.shape)):
+                if distances[det, trk] > self.centroid_threshold:
+                    break
+                if det in assigned or trk in taken:
+                    continue
+                assigned[det] = trk
+                taken.add(trk)
+                factors[det] = 0.5 * (1.0 - float(distances[det, trk]) / self.centroid_threshold) + 0.25
+
+        result = []
+        seen = set()
+        for det, box in enumerate(bboxes):
+            if det in assigned:
+                track = self.tracks[assigned[det]]
+                track.box = box[:4].copy()
+                if track.filter is not None:
+                    track.filter.update(box)
+                track.confidence *= factors[det]
+                track.last_seen = now
+                track.hits += 1
+                track.misses = 0
+            else:
+                track = Track(next(self._ids), box, now, self.use_kalman)
+                self.tracks.append(track)
+                self._stats["tracks_created"] += 1
+            seen.add(id(track))
+            result.append(track)
+
+        for track in self.tracks:
+            if id(track) not in seen:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        self._stats["updates"] += 1
+        self._stats["detections"] += len(bboxes)
+        return result
+
+    def needs_embedding(self, track: Track, now: float) -> bool:
+        """New, decayed or expired tracks have to be embedded (again)."""
+        if track.verified_at is None or track.confidence < self.min_confidence:
+            return True
+        interval = self.reverify_seconds if track.matched else self.unknown_reverify_seconds
+        return now - track.verified_at >= interval
+
+    def assign(self, track: Track, identity: Optional[str], similarity: float, matched: bool, now: float):
+        """Store a fresh recognition result on a track."""
+        track.identity = identity
+        track.similarity = float(similarity)
+        track.matched = bool(matched)
+        track.confidence = 1.0
+        track.verified_at = now
+        self._stats["embedded"] += 1
+
+    def count_reused(self, count: int):
+        """Record faces whose identity came from their track."""
+        self._stats["reused"] += count
+
+    def stats(self) -> Dict[str, float]:
+        """Update/detection/embedding counters, active tracks and reuse_rate (0..1)."""
+        stats = dict(self._stats)
+        stats["active_tracks"] = len(self.tracks)
+        handled = stats["embedded"] + stats["reused"]
+        stats["reuse_rate"] = stats["reused"] / handled if handled else 0.0
+        return stats
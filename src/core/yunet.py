@@ -0,0 +1,99 @@
+"""
+YuNet Module
+OpenCV's built-in YuNet face detector (cv2.FaceDetectorYN) behind the same
+detect() interface as the SCRFD wrapper, so FaceDetector's input sizing,
+tiling and crop logic work unchanged. Several times faster than SCRFD-10G
+on CPU, at some cost in recall on small or turned faces.
+"""
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# OpenCV zoo defaults for YuNet
+YUNET_SCORE_THRESHOLD = 0.9
+YUNET_TOP_K = 5000
+
+
+class YuNet:
+    """cv2.FaceDetectorYN with SCRFD-style (bboxes, kpss) output."""
+
+    def __init__(self, model_path: str, det_thresh: float = YUNET_SCORE_THRESHOLD, nms_thresh: float = 0.4):
+        """
+        Initialize detector.
+
+        Args:
+            model_path: Path to face_detection_yunet_*.onnx
+            det_thresh: Minimum face score
+            nms_thresh: IoU above which overlapping detections are merged
+        """
+        self.model_path = str(model_path)
+        self.det_thresh = det_thresh
+        self.nms_thresh = nms_thresh
+        self.input_size = (640, 640)
+        self.model = cv2.FaceDetectorYN.create(self.model_path, "", self.input_size,
+                                               det_thresh, nms_thresh, YUNET_TOP_K)
+        # setInputSize + detect share state on one cv::dnn::Net, so calls
+        # from several scheduler workers must not interleave
+        self._lock = threading.Lock()
+
+    def prepare(self, input_size: Optional[Tuple[int, int]] = None,
+                det_thresh: Optional[float] = None, nms_thresh: Optional[float] = None):
+        """Set the default input size (width, height) and thresholds."""
+        with self._lock:
+            if input_size is not None:
+                self.input_size = tuple(input_size)
+            if det_thresh is not None:
+                self.det_thresh = det_thresh
+                self.model.setScoreThreshold(det_thresh)
+            if nms_thresh is not None:
+                self.nms_thresh = nms_thresh
+                self.model.setNMSThreshold(nms_thresh)
+
+    def detect(self, img: np.ndarray, input_size: Optional[Tuple[int, int]] = None,
+               max_num: int = 0, metric: str = 'default'):
+        """
+        Detect faces in a BGR image.
+
+        YuNet takes any input size, so the image is only resized to fit
+        input_size (aspect ratio kept, no padding).
+
+        Args:
+            img: BGR image
+            input_size: (width, height) the image is scaled to fit
+            max_num: Keep only this many faces (0 = all), largest first
+            metric: Unused, kept for SCRFD compatibility
+
+        Returns:
+            (bboxes, kpss): (N, 5) [x1, y1, x2, y2, score] and (N, 5, 2)
+            landmarks (eyes, nose, mouth corners), image coordinates
+        """
+        input_size = input_size or self.input_size
+        h, w = img.shape[:2]
+        scale = min(input_size[0] / w, input_size[1] / h)
+        new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        resized = img if (new_w, new_h) == (w, h) else cv2.resize(img, (new_w, new_h))
+
+        with self._lock:
+            self.model.setInputSize((new_w, new_h))
+            _, faces = self.model.detect(resized)
+
+        if faces is None or len(faces) == 0:
+            return np.zeros((0, 5), dtype=np.float32), np.zeros((0, 5, 2), dtype=np.float32)
+
+        # Rows are [x, y, w, h, 5 x (x, y) landmarks, score] in resized pixels
+        coords = faces[:, :14].astype(np.float32) / np.float32(scale)
+        bboxes = np.empty((len(faces), 5), dtype=np.float32)
+        bboxes[:, 0:2] = coords[:, 0:2]
+        bboxes[:, 2:4] = coords[:, 0:2] + coords[:, 2:4]
+        bboxes[:, 4] = faces[:, 14]
+        kpss = coords[:, 4:14].reshape(-1, 5, 2)
+
+        order = bboxes[:, 4].argsort()[::-1]
+        bboxes, kpss = bboxes[order], kpss[order]
+        if 0 < max_num < len(bboxes):
+            area = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+            index = np.argsort(area)[::-1][:max_num]
+            bboxes, kpss = bboxes[index], kpss[index]
+        return bboxes, kpss
@@ -3,31 +3,105 @@
 Face Recognition Code (New Engine - InsightFace)
 
 Replaces DeepFace with InsightFace (SCRFD + ArcFace) for better accuracy.
-Threshold: 0.55
+OpenCV YuNet + SFace can be selected instead for speed (DETECTOR_BACKEND,
+EMBEDDER_BACKEND in config).
+Threshold: 0.55 (ArcFace), 0.363 (SFace)
 """
 
 import os
+import copy
+import json
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 from typing import Any, Tuple, Dict, List, Optional
 
 from config import (
     STUDENT_DATASET_DIR,
-    SIMILARITY_THRESHOLD,
+    SIMILARITY_THRESHOLDS,
+    DETECTOR_BACKEND,
+    EMBEDDER_BACKEND,
     ENCODINGS_FILE,
+    GALLERY_FILE,
+    TRAIN_MANIFEST_FILE,
+    EMBEDDING_BATCH_SIZE,
+    FUSION_MODE,
+    FUSION_MIN_VOTES,
+    FACE_QUALITY_GATE,
+    MIN_FACE_SIZE,
+    MIN_FACE_SHARPNESS,
+    MIN_FACE_SCORE,
+    MAX_FACE_YAW,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_MB,
+    TRACKER_IOU_THRESHOLD,
+    TRACKER_CENTROID_THRESHOLD,
+    TRACKER_MAX_MISSES,
+    TRACKER_REVERIFY_SECONDS,
+    TRACKER_UNKNOWN_REVERIFY_SECONDS,
+    TRACKER_MIN_CONFIDENCE,
+    TRACKER_KALMAN,
+    DETECTION_TILING,
+    DETECTION_TILE_SIZE,
+    DETECTION_TILE_OVERLAP,
+    DETECTION_TILING_MIN_SIDE,
+    DETECTION_MIN_INPUT_SIDE,
+    DETECTION_MAX_INPUT_SIDE,
+    CAMERA_WIDTH,
+    CAMERA_HEIGHT,
+    ORT_INTRA_OP_THREADS,
+    ORT_INTER_OP_THREADS,
+    ORT_EXECUTION_MODE,
+    ORT_GRAPH_OPTIMIZATION,
+    ORT_ENABLE_MEM_ARENA,
+    ORT_ENABLE_MEM_PATTERN,
+    ORT_CACHE_OPTIMIZED_MODELS,
+    MODEL_PRECISION,
+    QUANTIZATION_MODE,
+    OPENCV_THREADS,
+    USE_GPU,
 )
 
 # Import new core modules (copied from 'New folder/core' to 'cam/src/core')
 from core.detector import FaceDetector
-from core.embedder import FaceEmbedder
-from core.database import FaceDatabase
+from core.embedder import create_embedder
+from core.session import SessionFactory
+from core.alignment import ALIGNED_SIZE, align_faces
+from core.quality import QualityGate
+from core.result_cache import ResultCache
+from core.tracker import FaceTracker
+from core.database import FaceDatabase, GallerySnapshot
+from core.manifest import EmbeddingManifest, content_sha1
 
 logger = logging.getLogger(__name__)
 
+
+class AttendanceResult(dict):
+    """
+    Attendance dict ({student_key: "Present"|"Absent"}) that also records
+    which gallery version it was recognized against, for fused bursts,
+    per-student confidence, and the quality of every detected face.
+    """
+
+    def __init__(self, *args, gallery_version: Optional[int] = None,
+                 confidence: Optional[Dict[str, float]] = None,
+                 face_quality: Optional[List[dict]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gallery_version = gallery_version
+        # student_key -> confidence (best similarity or vote fraction)
+        self.confidence = confidence if confidence is not None else {}
+        # One record per detected face (bbox, size, score, yaw, sharpness,
+        # passed, reason; 'frame' too for bursts), see core.quality
+        self.face_quality = face_quality if face_quality is not None else []
+
+
 class FaceRecognitionModule:
     """
-    InsightFace (SCRFD + ArcFace) engine for face recognition.
+    Face recognition engine: SCRFD or YuNet detector + ArcFace or SFace
+    embedder, selected by DETECTOR_BACKEND / EMBEDDER_BACKEND.
     """
 
     def __init__(self):
@@ -37,17 +111,108 @@ class FaceRecognitionModule:
         # Ensure models are found. The 'core' modules look in './models' by default.
         # Since we run from 'cam' root, and we copied 'models' to 'cam/models', it should work.
         try:
-            self.detector = FaceDetector()
-            self.embedder = FaceEmbedder()
-            # Use the existing ENCODINGS_FILE path structure but adapted for the new Database class if needed.
-            # The new Database class uses pickle.
-            # We will use the same ENCODINGS_FILE path defined in config.py
-            self.db = FaceDatabase(db_path=ENCODINGS_FILE)
-            logger.info("Face Recognition Engine Initialized (InsightFace)")
+            # One factory so detector and embedder share threading/optimization settings
+            self.session_factory = SessionFactory(
+                intra_op_threads=ORT_INTRA_OP_THREADS,
+                inter_op_threads=ORT_INTER_OP_THREADS,
+                execution_mode=ORT_EXECUTION_MODE,
+                optimization_level=ORT_GRAPH_OPTIMIZATION,
+                enable_mem_arena=ORT_ENABLE_MEM_ARENA,
+                enable_mem_pattern=ORT_ENABLE_MEM_PATTERN,
+                use_gpu=USE_GPU,
+                opencv_threads=OPENCV_THREADS,
+                cache_optimized=ORT_CACHE_OPTIMIZED_MODELS,
+            )
+            # int8 variants when MODEL_PRECISION = 'int8' (fp32 if not built yet)
+            quantization = QUANTIZATION_MODE if MODEL_PRECISION == 'int8' else None
+            # Large photos are detected tile by tile (see DETECTION_TILING)
+            self.detector = FaceDetector(
+                backend=DETECTOR_BACKEND,
+                tiling=DETECTION_TILING,
+                tile_size=DETECTION_TILE_SIZE,
+                tile_overlap=DETECTION_TILE_OVERLAP,
+                tiling_min_side=DETECTION_TILING_MIN_SIDE,
+                min_input_side=DETECTION_MIN_INPUT_SIDE,
+                max_input_side=DETECTION_MAX_INPUT_SIDE,
+                session_factory=self.session_factory,
+                quantization=quantization,
+            )
+            self.embedder = create_embedder(EMBEDDER_BACKEND,
+                                            max_batch_size=EMBEDDING_BATCH_SIZE,
+                                            session_factory=self.session_factory,
+                                            quantization=quantization)
+            # Thresholds are per embedding space
+            self.similarity_threshold = SIMILARITY_THRESHOLDS[EMBEDDER_BACKEND]
+            # Tiny, blurry, low-score and turned faces are skipped before embedding
+            self.quality_gate = QualityGate(
+                min_size=MIN_FACE_SIZE,
+                min_sharpness=MIN_FACE_SHARPNESS,
+                min_score=MIN_FACE_SCORE,
+                max_yaw=MAX_FACE_YAW,
+                enabled=FACE_QUALITY_GATE,
+            )
+            # Same photo dobara aaye (re-upload) toh detection + embedding cache se.
+            # Key me models/settings ka fingerprint bhi hai; matching hamesha current gallery se.
+            self.result_cache = ResultCache(max_entries=RESULT_CACHE_MAX_ENTRIES,
+                                            max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024))
+            self.model_fingerprint = self._model_fingerprint(quantization)
+            # Live feed: tracked faces keep their identity between ticks
+            self.tracker = FaceTracker(
+                iou_threshold=TRACKER_IOU_THRESHOLD,
+                centroid_threshold=TRACKER_CENTROID_THRESHOLD,
+                max_misses=TRACKER_MAX_MISSES,
+                reverify_seconds=TRACKER_REVERIFY_SECONDS,
+                unknown_reverify_seconds=TRACKER_UNKNOWN_REVERIFY_SECONDS,
+                min_confidence=TRACKER_MIN_CONFIDENCE,
+                use_kalman=TRACKER_KALMAN,
+            )
+            self._live_lock = threading.Lock()
+            # Enrollment photos detect hote hi yaha (content hash se), enroll_student sirf embed karta hai
+            self.enroll_prepared = ResultCache(max_entries=32, max_bytes=8 * 1024 * 1024)
+            # Training aur single-student enrollment manifest/gallery ek saath na chhuye
+            self._train_lock = threading.RLock()
+            # Gallery is stored as keys JSON + embedding matrix (GALLERY_FILE).
+            # The old ENCODINGS_FILE pickle is migrated automatically on first load
+            # (or retrained in warmup() if it came from a different embedder).
+            # Gallery and manifest are tagged with the embedder, so switching
+            # EMBEDDER_BACKEND never mixes embeddings of different models.
+            load_start = time.perf_counter()
+            self.db = FaceDatabase(db_path=GALLERY_FILE, legacy_path=ENCODINGS_FILE,
+                                   backend=self.embedder.backend_id)
+            self.gallery_load_time = time.perf_counter() - load_start
+            # Per-image embeddings so retraining only touches new/changed images
+            self.manifest = EmbeddingManifest(TRAIN_MANIFEST_FILE, backend=self.embedder.backend_id,
+                                              quality_gate=self.quality_gate)
+            if self.db.mismatched_backend:
+                logger.warning("Gallery was built with %s, it will be retrained for %s",
+                               self.db.mismatched_backend, self.embedder.backend_id)
+            logger.info("Face Recognition Engine Initialized (%s + %s)",
+                        DETECTOR_BACKEND, self.embedder.backend_id)
         except Exception as e:
             logger.error(f"Failed to initialize Face Recognition Engine: {e}")
             raise
 
+    def _model_fingerprint(self, quantization: Optional[str]) -> str:
+        """
+        Short hash of everything that decides which faces are found and
+        how they are embedded (models, precision, detection and quality
+        settings), for the result cache key.
+        """
+        detector = self.detector
+        settings = {
+            'detector': [detector.backend, detector.model_path, detector.tiling, detector.tile_size,
+                         detector.tile_overlap, detector.tiling_min_side, detector.nms_threshold,
+                         detector.min_input_side, detector.max_input_side],
+            'embedder': [self.embedder.backend_id, getattr(self.embedder, 'model_path', None)],
+            'quantization': quantization,
+            'quality': vars(self.quality_gate),
+        }
+        return content_sha1(json.dumps(settings, sort_keys=True, default=str).encode())[:16]
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Result cache statistics (entries, bytes, hits, misses, evictions, hit_rate)."""
+        return self.result_cache.stats()
+
     def _cosine_distance(self, a: np.ndarray, b: np.ndarray) -> float:
         """
         Compute cosine distance between two embeddings.
@@ -62,10 +227,227 @@ class FaceRecognitionModule:
         return 1.0 - np.dot(a, b) / (norm_a * norm_b)
 
     # -------------------- TRAIN --------------------
+    @staticmethod
+    def _student_key(student_name: str) -> str:
+        """Gallery key for a dataset folder (add_student with an empty roll)."""
+        return f"_{student_name}"
+
+    def _largest_face(self, img) -> Tuple[Optional[np.ndarray], Optional[dict]]:
+        """
+        Detect faces and return the largest one aligned to 112x112 BGR with
+        its quality record (or None, None). Usually largest is best for
+        enrollment.
+        """
+        # Only the largest face is used, so small background faces (tiling) are not needed
+        bboxes, kpss = self.detector.detect(img, tiled=False)
+        if len(bboxes) == 0:
+            return None, None
+        
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        i = int(np.argmax(areas))
+        bboxes, kpss = bboxes[i:i + 1], (None if kpss is None else kpss[i:i + 1])
+        quality = self.quality_gate.assess(bboxes, kpss)
+        faces = align_faces(img, kpss, bboxes)
+        self.quality_gate.assess_sharpness(quality, faces)
+        return faces[0], quality.records(bboxes)[0]
+
+    def prepare_enrollment_image(self, image_path: str) -> bool:
+        """
+        Detect and align the face of a freshly captured enrollment photo
+        right away (e.g. while the camera waits for the next shot), so
+        enroll_student() / training only has to embed it. Keyed by the file
+        content, so the photo may be moved into the dataset afterwards.
+
+        Returns:
+            True if a face was found
+        """
+        try:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            face, quality = self._largest_face(img) if img is not None else (None, None)
+        except Exception as e:
+            logger.warning(f"Error preparing enrollment image {image_path}: {e}")
+            return False
+        nbytes = face.nbytes if face is not None else 0
+        self.enroll_prepared.put(content_sha1(data), (face, quality), nbytes)
+        return face is not None
+
+    def _embed_student(self, student_name: str, counts: Dict[str, int]) -> Tuple[List[str], Optional[np.ndarray], bool]:
+        """
+        Bring the manifest up to date for one dataset folder and average its
+        embeddings. New or changed images are detected (or taken from
+        prepare_enrollment_image) and embedded in one batch.
+
+        Args:
+            student_name: Folder name in STUDENT_DATASET_DIR
+            counts: 'reused' / 'embedded' / 'rejected' counters, updated in place
+
+        Returns:
+            (manifest keys of the folder's images, normalized student
+            embedding or None, whether any image was new or changed)
+        """
+        student_path = os.path.join(STUDENT_DATASET_DIR, student_name)
+        image_files = [
+            f for f in os.listdir(student_path)
+            if f.lower().endswith((".jpg", ".jpeg", ".png"))
+        ]
+
+        if not image_files:
+            logger.warning(f"No images found for student: {student_name}")
+            return [], None, False
+
+        # Manifest keys are relative to the dataset dir, e.g. "10_Om/10_Om_1.jpg"
+        rel_paths = [f"{student_name}/{img_file}" for img_file in image_files]
+        changed = False
+        pending = []  # (rel_path, size, mtime_ns, sha1, aligned_face, quality) for new/changed images
+
+        for img_file, rel_path in zip(image_files, rel_paths):
+            img_path = os.path.join(student_path, img_file)
+            try:
+                st = os.stat(img_path)
+                # Same path, size and mtime: nothing to do
+                if self.manifest.lookup(rel_path, st.st_size, st.st_mtime_ns):
+                    counts['reused'] += 1
+                    continue
+
+                with open(img_path, 'rb') as f:
+                    data = f.read()
+                sha1 = content_sha1(data)
+                changed = True
+
+                # Touched or renamed file with identical content: reuse its embedding
+                same_path = self.manifest.find_by_hash(sha1)
+                if same_path is not None:
+                    self.manifest.update(rel_path, st.st_size, st.st_mtime_ns, sha1,
+                                         self.manifest.get_embedding(same_path),
+                                         self.manifest.entries[same_path].get("quality"))
+                    counts['reused'] += 1
+                    continue
+
+                # Already detected while it was being captured
+                prepared = self.enroll_prepared.get(sha1)
+                if prepared is not None:
+                    face, quality = prepared
+                else:
+                    # Decode from the bytes we already read for hashing
+                    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    face, quality = self._largest_face(img) if img is not None else (None, None)
+                pending.append((rel_path, st.st_size, st.st_mtime_ns, sha1, face, quality))
+
+            except Exception as e:
+                logger.warning(f"Error processing image {img_file} for {student_name}: {e}")
+
+        if pending:
+            logger.info(f"Processing student: {student_name} ({len(pending)} new/changed images)")
+
+            # Only faces that passed the quality gate are embedded
+            selected = [i for i, p in enumerate(pending) if p[4] is not None and p[5]['passed']]
+            rejected = [i for i, p in enumerate(pending) if p[4] is not None and not p[5]['passed']]
+            counts['rejected'] += len(rejected)
+            pending_paths = {p[0] for p in pending}
+            has_stored = any(self.manifest.get_embedding(p) is not None
+                             for p in rel_paths if p not in pending_paths)
+            if not selected and rejected and not has_stored:
+                # Koi bhi photo gate pass nahi hui: sabse achhi wali se hi enroll kar dete hai
+                best = max(rejected, key=lambda i: pending[i][5]['quality'] or 0.0)
+                logger.warning(f"No face of {student_name} passed the quality gate, "
+                               f"using the best one ({pending[best][0]}: {pending[best][5]['reason']})")
+                selected = [best]
+                counts['rejected'] -= 1
+
+            # Embed all of this student's selected faces in one batched ArcFace run
+            crops = [pending[i][4] for i in selected]
+            try:
+                embeddings = self.embedder.get_embeddings_aligned(np.stack(crops)) if crops else []
+                if len(embeddings) != len(crops):
+                    raise ValueError(f"got {len(embeddings)} embeddings for {len(crops)} faces")
+                by_index = dict(zip(selected, embeddings))
+                for i, (rel_path, size, mtime_ns, sha1, face, quality) in enumerate(pending):
+                    self.manifest.update(rel_path, size, mtime_ns, sha1, by_index.get(i), quality)
+                counts['embedded'] += len(crops)
+            except Exception as e:
+                # Not recorded in the manifest, so these images are retried next time
+                logger.warning(f"Error embedding faces for {student_name}: {e}")
+
+        # Averaging is better for stability (same running average as before, in image order)
+        best_embedding = None
+        for rel_path in rel_paths:
+            emb = self.manifest.get_embedding(rel_path)
+            if emb is None:
+                continue
+            if best_embedding is None:
+                best_embedding = emb
+            else:
+                best_embedding = (best_embedding + emb) / 2.0
+
+        if best_embedding is not None:
+            # Normalize again after averaging
+            best_embedding = best_embedding / np.linalg.norm(best_embedding)
+        return rel_paths, best_embedding, changed
+
+    def enroll_student(self, student_name: str) -> bool:
+        """
+        Add (or refresh) a single student without retraining everyone.
+
+        Only this folder's images are detected and embedded, as one batch,
+        and only this student's manifest entries and gallery row change. Use
+        train_face_encodings() after deleting students or editing several
+        folders.
+
+        Args:
+            student_name: Folder name in STUDENT_DATASET_DIR, e.g. "10_Om"
+
+        Returns:
+            True if the student is in the gallery afterwards
+        """
+        student_path = os.path.join(STUDENT_DATASET_DIR, student_name)
+        if not os.path.isdir(student_path):
+            logger.error("Student folder not found: %s", student_path)
+            return False
+
+        counts = {'reused': 0, 'embedded': 0, 'rejected': 0}
+        key = self._student_key(student_name)
+        with self._train_lock:
+            rel_paths, embedding, changed = self._embed_student(student_name, counts)
+
+            # Images removed from this folder only; other students are left alone
+            prefix = f"{student_name}/"
+            live_paths = set(rel_paths)
+            live_paths.update(p for p in self.manifest.entries if not p.startswith(prefix))
+            removed = self.manifest.prune(live_paths)
+            if self.manifest.changed:
+                self.manifest.save()
+
+            if embedding is None:
+                logger.error(f"No usable face found for {student_name}, not enrolled")
+                with self.db.transaction(save=True):
+                    self.db.remove_student(key)
+                return False
+
+            if changed or removed or self.db.search_by_key(key) is None:
+                with self.db.transaction(save=True):
+                    self.db.add_student(name=student_name, roll="", embedding=embedding)
+
+        logger.info(
+            f"Enrolled {student_name} (embedded {counts['embedded']} images, reused {counts['reused']}, "
+            f"skipped {counts['rejected']} low quality, gallery version {self.db.version})."
+        )
+        return True
+
     def train_face_encodings(self):
         """
         Build embeddings for each student image in STUDENT_DATASET_DIR 
-        and store them in the database (pickle file).
+        and store them in the database (gallery matrix file).
+        
+        Per-image embeddings are cached in the training manifest, so only
+        new or changed images are detected and embedded again. Images that
+        were removed from the dataset are dropped, and so are students who
+        no longer have any usable image.
+        
+        Faces failing the quality gate are not embedded (their quality is
+        kept in the manifest). A student with no face passing the gate is
+        still enrolled from their best-quality face, with a warning.
         """
         logger.info("Starting training/enrollment from %s...", STUDENT_DATASET_DIR)
         
@@ -77,116 +459,53 @@ class FaceRecognitionModule:
             d for d in os.listdir(STUDENT_DATASET_DIR)
             if os.path.isdir(os.path.join(STUDENT_DATASET_DIR, d))
         ]
-
-        if not student_folders:
-            logger.error("No student folders found in dataset directory.")
-            return False
+        # No folders left still runs below: manifest and gallery are emptied too
             
-        success_count = 0
-            
-        # Re-initialize/Clear database for fresh training? 
-        # The prompt implies "replace ours with this", usually implies a full rebuild or ensuring it works.
-        # If we want to fully retrain, we might want to clear existing. 
-        # But FaceDatabase loads existing. Let's assume we update/overwrite.
-        # Actually existing 'cam' logic was a full retrain usually.
-        
-        # NOTE: The new FaceDatabase calculates embeddings on the fly if we use add_student.
-        # But here we are processing raw images to embeddings.
+        counts = {'reused': 0, 'embedded': 0, 'rejected': 0}
+        live_paths = []
+        changed_students = set()
+        student_embeddings = {}
         
-        for student_name in student_folders:
-            student_path = os.path.join(STUDENT_DATASET_DIR, student_name)
-            image_files = [
-                f for f in os.listdir(student_path)
-                if f.lower().endswith((".jpg", ".jpeg", ".png"))
-            ]
-            
-            if not image_files:
-                logger.warning(f"No images found for student: {student_name}")
-                continue
-                
-            logger.info(f"Processing student: {student_name} ({len(image_files)} images)")
-            
-            # We will take the best/first valid face embedding for the student
-            # Or average them? The new system's 'train' logic isn't explicitly in 'New folder', 
-            # but 'FaceDatabase' stores one embedding per key (implied by add_student).
-            # We will try to find the best quality face.
+        with self._train_lock:
+            for student_name in student_folders:
+                rel_paths, embedding, changed = self._embed_student(student_name, counts)
+                live_paths.extend(rel_paths)
+                if changed:
+                    changed_students.add(student_name)
+                if embedding is not None:
+                    student_embeddings[student_name] = embedding
             
-            best_embedding = None
-            max_conf = -1.0
+            # Images deleted from the dataset
+            removed_paths = set(self.manifest.entries) - set(live_paths)
+            changed_students.update(p.split("/", 1)[0] for p in removed_paths)
+            self.manifest.prune(live_paths)
+            if self.manifest.changed:
+                self.manifest.save()
+        
+            # Update gallery: only students whose images changed, plus new/removed ones.
+            # Recognition keeps using the previous snapshot until the transaction
+            # publishes the new one in a single swap (and saves it under the same lock).
+            trained_keys = {self._student_key(name) for name in student_embeddings}
+            with self.db.transaction(save=True):
+                stale_keys = [key for key in self.db.keys if key not in trained_keys]
+                for key in stale_keys:
+                    self.db.remove_student(key)
             
-            for img_file in image_files:
-                img_path = os.path.join(student_path, img_file)
-                try:
-                    # Read image
-                    # FaceDetector expects RGB or BGR? 
-                    # Core detector.py: "SCRFD expects BGR", "Input image (numpy array or PIL Image)"
-                    # converting to RGB inside.
-                    
-                    img = cv2.imread(img_path)
-                    if img is None:
-                        continue
-                        
-                    # Detect faces
-                    # detect_faces returns [(bbox, face_crop), ...]
-                    faces = self.detector.detect_faces(img)
-                    
-                    if not faces:
-                        continue
-                        
-                    # Take the largest face or most confident?
-                    # detect_faces output doesn't sort by default but returns list.
-                    # Usually largest is best for enrollment.
-                    # Let's pick the one with largest area.
-                    
-                    best_face = None
-                    max_area = 0
-                    
-                    for (bbox, face_crop) in faces:
-                        x1, y1, x2, y2, score = bbox
-                        area = (x2 - x1) * (y2 - y1)
-                        if area > max_area:
-                            max_area = area
-                            best_face = face_crop
-                            
-                    if best_face is not None:
-                         # Convert RGB crop (from detector) to BGR for Embedder
-                         # Detector returns RGB crop when input is BGR (due to internal swap).
-                         # Embedder expects BGR (internal swap to RGB).
-                         if len(best_face.shape) == 3:
-                             best_face = cv2.cvtColor(best_face, cv2.COLOR_RGB2BGR)
-
-                         # Get embedding
-                         emb = self.embedder.get_embedding(best_face)
-                         
-                         # Store this. If we process multiple images, maybe we can average?
-                         # For now, let's just stick to the simplest robust strategy:
-                         # Use the first good one, or average if we want to be fancy.
-                         # The prompt said "no ui/ux change", keeping logic simple and robust is best.
-                         # Let's use the first valid one we find, or overwrite if we find another? 
-                         # Actually, let's just use the last one successfully processed, or average.
-                         # Averaging is better for stability.
-                         
-                         if best_embedding is None:
-                             best_embedding = emb
-                         else:
-                             best_embedding = (best_embedding + emb) / 2.0
-                             
-                except Exception as e:
-                    logger.warning(f"Error processing image {img_file} for {student_name}: {e}")
-                    
-            if best_embedding is not None:
-                # Normalize again after averaging
-                best_embedding = best_embedding / np.linalg.norm(best_embedding)
-                
-                # Store in DB
-                # DB expects roll, name. We only have folder name which is usually "Name" or "Roll_Name".
-                # Existing system seems to use just "student_name" as data.
-                # We will treat 'roll' as empty or part of name.
-                self.db.add_student(name=student_name, roll="", embedding=best_embedding)
-                success_count += 1
-                
-        self.db.save_database()
-        logger.info(f"Training complete. Enrolled {success_count} students.")
+                for student_name, embedding in student_embeddings.items():
+                    if student_name in changed_students or self.db.search_by_key(self._student_key(student_name)) is None:
+                        # DB expects roll, name. We only have folder name which is usually "Name" or "Roll_Name".
+                        # We will treat 'roll' as empty or part of name.
+                        self.db.add_student(name=student_name, roll="", embedding=embedding)
+        
+        if not student_folders:
+            logger.error("No student folders found in dataset directory.")
+            return False
+        logger.info(
+            f"Training complete. Enrolled {len(student_embeddings)} students "
+            f"(embedded {counts['embedded']} images, reused {counts['reused']}, skipped {counts['rejected']} low quality, "
+            f"removed {len(removed_paths)}, "
+            f"gallery version {self.db.version})."
+        )
         return True
 
     # -------------------- SAVE/LOAD --------------------
@@ -204,106 +523,457 @@ class FaceRecognitionModule:
         self.db.load_database()
         return True
 
+    # -------------------- WARMUP --------------------
+    def warmup(self) -> Dict[str, float]:
+        """
+        Get the engine ready for the first recognition without retraining.
+        
+        Loads the detector and embedder in parallel, runs one dummy
+        inference through each and loads the gallery from disk as-is. A
+        gallery built by a different embedder backend is retrained here,
+        since its embeddings cannot be matched.
+        
+        Returns:
+            Timing (seconds) for each step
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # Warm the webcam frame shape so live frames start at full speed
+            det_future = pool.submit(self.detector.warmup, shapes=[(CAMERA_HEIGHT, CAMERA_WIDTH)])
+            emb_future = pool.submit(self.embedder.warmup)
+            det_times = det_future.result()
+            emb_times = emb_future.result()
+        models_done = time.perf_counter()
+        
+        timings = {
+            'detector_load': det_times['load'],
+            'detector_inference': det_times['inference'],
+            'embedder_load': emb_times['load'],
+            'embedder_inference': emb_times['inference'],
+            'models_parallel': models_done - start,
+            # Gallery was memory-mapped from disk in __init__, nothing to recompute
+            'gallery_load': self.gallery_load_time,
+        }
+        timings['total'] = models_done - start + self.gallery_load_time
+        
+        if self.db.mismatched_backend:
+            retrain_start = time.perf_counter()
+            self.train_face_encodings()
+            timings['retrain'] = time.perf_counter() - retrain_start
+            timings['total'] += timings['retrain']
+        
+        logger.info(
+            "Warmup done in %.2fs: detector load %.2fs + infer %.2fs, embedder load %.2fs + infer %.2fs "
+            "(parallel %.2fs), gallery %d students in %.3fs",
+            timings['total'], timings['detector_load'], timings['detector_inference'],
+            timings['embedder_load'], timings['embedder_inference'], timings['models_parallel'],
+            self.db.get_student_count(), timings['gallery_load'],
+        )
+        return timings
+
     # -------------------- RECOGNITION --------------------
     def recognize_faces(self, image_path: str, return_annotated: bool = False) -> Any:
         """
         Recognize faces in the given image path.
+        
+        Detections and embeddings are cached by image content (plus the
+        model fingerprint), so analyzing the same photo again only redoes
+        the matching against the current gallery.
+        
         Returns:
             attendance (dict): {student_name: "Present"|"Absent", ...}
             annotated_img (np.ndarray|None): Image with boxes if requested
         """
-        # Load DB if empty?
-        if self.db.get_student_count() == 0:
-            self.load_encodings()
-
-        all_students = self.db.get_all_students() 
-        # The key in DB is f"{roll}_{name}" or just name if roll empty.
-        # We need to map back to simple names for the attendance dict if possible, 
-        # or use the keys as names.
+        logger.info("Recognizing faces in %s", image_path)
+        snapshot = self._current_snapshot()
+        try:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            logger.error("Could not read image %s: %s", image_path, e)
+            data = None
         
-        # Initialize attendance dict
-        attendance = {name: "Absent" for name in all_students.keys()}
+        key = (content_sha1(data), self.model_fingerprint) if data else None
+        detections = self.result_cache.get(key) if key else None
+        img = None
+        if detections is None or return_annotated:
+            # Decode from the bytes we already read for hashing
+            if data:
+                img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                if data is not None:
+                    logger.error("Could not read image: %s", image_path)
+                attendance = self._empty_attendance(snapshot)
+                return (attendance, None) if return_annotated else attendance
         
-        annotated_img = None
-        if return_annotated:
-            annotated_img = cv2.imread(image_path)
-
         try:
-            logger.info("Recognizing faces in %s", image_path)
-            img = cv2.imread(image_path)
-            if img is None:
-                logger.error("Could not read image: %s", image_path)
-                return (attendance, annotated_img) if return_annotated else attendance
+            if detections is None:
+                detections = self._detect_and_embed([img])
+                per_frame_faces, query_embs, per_frame_quality = detections
+                # Rough size: embeddings + boxes + quality records
+                nbytes = query_embs.nbytes + sum(len(q) for q in per_frame_quality) * 1024
+                self.result_cache.put(key, detections, nbytes)
+            else:
+                stats = self.result_cache.stats()
+                logger.info("Result cache hit for %s (hit rate %.0f%%)", image_path, stats['hit_rate'] * 100)
+            return self._frame_results([img], detections, snapshot, return_annotated)[0]
+        except Exception as e:
+            logger.error(f"Error during recognition: {e}")
+            attendance = AttendanceResult(gallery_version=snapshot.version)
+            return (attendance, None) if return_annotated else attendance
 
-            # Detect Faces
-            faces = self.detector.detect_faces(img)
-            
-            if not faces:
-                logger.info("No faces detected.")
-                return (attendance, annotated_img) if return_annotated else attendance
+    def recognize_frame(self, frame: np.ndarray, return_annotated: bool = False) -> Any:
+        """
+        Recognize faces in an already decoded BGR frame (no disk round-trip).
+        Returns:
+            attendance (AttendanceResult): {student_name: "Present"|"Absent", ...}
+                with .gallery_version set
+            annotated_img (np.ndarray|None): Copy of the frame with boxes if requested
+        """
+        return self.recognize_frames([frame], return_annotated=return_annotated)[0]
+
+    def recognize_frames(self, frames: List[np.ndarray], return_annotated: bool = False) -> List[Any]:
+        """
+        Recognize faces in several decoded BGR frames.
+        
+        Faces from all frames are embedded in one ArcFace batch and matched
+        in one gallery product; results are returned per frame. All frames
+        use the same gallery snapshot, even if training swaps in a new one
+        meanwhile.
+        
+        Returns:
+            List with one recognize_frame() result per input frame
+        """
+        snapshot = self._current_snapshot()
+        try:
+            return self._frame_results(frames, self._detect_and_embed(frames), snapshot, return_annotated)
+        except Exception as e:
+            logger.error(f"Error during recognition: {e}")
+            empty = lambda: AttendanceResult(gallery_version=snapshot.version)
+            return [(empty(), None) if return_annotated else empty() for _ in frames]
 
-            logger.info("Detected %d faces.", len(faces))
+    def _frame_results(self, frames: List[Optional[np.ndarray]], detections, snapshot: GallerySnapshot,
+                       return_annotated: bool) -> List[Any]:
+        """
+        Match _detect_and_embed() output against a gallery snapshot and
+        build one attendance result per frame (frames are only used for
+        annotation).
+        """
+        per_frame_faces, query_embs, per_frame_quality = detections
+        best_names, best_sims = self._match_embeddings(query_embs, snapshot)
+        matched = best_sims >= self.similarity_threshold
 
-            for (bbox, face_crop) in faces:
-                # Convert RGB crop (from detector) to BGR for Embedder
-                if len(face_crop.shape) == 3:
-                     face_crop = cv2.cvtColor(face_crop, cv2.COLOR_RGB2BGR)
+        results = []
+        face_idx = 0
+        for frame, faces, quality in zip(frames, per_frame_faces, per_frame_quality):
+            # Initialize attendance dict
+            attendance = self._empty_attendance(snapshot)
+            # Copies: the records may be shared with the result cache
+            attendance.face_quality = copy.deepcopy(quality)
+            annotated_img = frame.copy() if return_annotated else None
+            if annotated_img is not None:
+                self._annotate_rejected(annotated_img, quality)
 
-                # Get Embedding
-                query_emb = self.embedder.get_embedding(face_crop)
-                
-                # Find Best Match
-                best_name = None
-                best_sim = -1.0
-                
-                # Manual search vs DB search (DB doesn't have search with threshold exposed widely in the snippet I saw, 
-                # but 'recognize.py' implemented 'find_best_match'. I will replicate logic here.)
-                
-                for name, db_emb in all_students.items():
-                    # Cosine Similarity
-                    # sim = dot(u, v) / (norm(u)*norm(v))
-                    # My embedder returns normalized vectors, but let's be safe.
-                    sim = np.dot(query_emb, db_emb) / (np.linalg.norm(query_emb) * np.linalg.norm(db_emb) + 1e-10)
-                    
-                    if sim > best_sim:
-                        best_sim = sim
-                        best_name = name
-                        
-                # Check Threshold
-                matched = False
+            for bbox in faces:
+                best_name, best_sim, is_match = best_names[face_idx], best_sims[face_idx], matched[face_idx]
+                face_idx += 1
                 final_name = "Unknown"
                 
-                if best_sim >= SIMILARITY_THRESHOLD:
+                if is_match:
                     attendance[best_name] = "Present"
                     final_name = best_name
-                    matched = True
                     logger.info(f"Match found: {best_name} ({best_sim:.4f})")
                 else:
-                    logger.info(f"Unknown face. Best match: {best_name} ({best_sim:.4f}) < {SIMILARITY_THRESHOLD}")
+                    logger.info(f"Unknown face. Best match: {best_name} ({best_sim:.4f}) < {self.similarity_threshold}")
 
                 # Annotation
-                if return_annotated and annotated_img is not None:
-                    x1, y1, x2, y2, score = bbox
-                    color = (0, 255, 0) if matched else (0, 0, 255)
-                    cv2.rectangle(annotated_img, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-                    
-                    label = f"{final_name} ({best_sim:.2f})"
-                    cv2.putText(annotated_img, label, (int(x1), int(y1)-10), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+                if annotated_img is not None:
+                    self._annotate(annotated_img, bbox, final_name, best_sim, is_match)
+
+            results.append((attendance, annotated_img) if return_annotated else attendance)
+        return results
+
+    def recognize_live(self, frame: np.ndarray, now: Optional[float] = None) -> AttendanceResult:
+        """
+        Recognize faces in a live camera frame, reusing tracked identities.
+        
+        Every face is detected and associated with a track. Only faces whose
+        track is new, has lost confidence or is due for re-verification are
+        aligned, embedded and matched; the others keep their track's
+        identity. Tracks are re-verified when the gallery changes.
+        
+        Args:
+            frame: BGR frame
+            now: Timestamp in seconds (default: time.monotonic())
+            
+        Returns:
+            AttendanceResult with .confidence (similarity of each present
+            student's track) and .face_quality
+        """
+        now = time.monotonic() if now is None else now
+        snapshot = self._current_snapshot()
+        with self._live_lock:
+            try:
+                if self.tracker.gallery_version != snapshot.version:
+                    self.tracker.reset_identities(snapshot.version)
+                
+                bboxes, kpss = self.detector.detect(frame)
+                quality = self.quality_gate.assess(bboxes, kpss)
+                tracks = self.tracker.update(bboxes, now)
+                
+                index = np.array([i for i, track in enumerate(tracks)
+                                  if quality.passed[i] and self.tracker.needs_embedding(track, now)], dtype=np.intp)
+                faces = align_faces(frame, None if kpss is None else kpss[index], bboxes[index])
+                self.quality_gate.assess_sharpness(quality, faces, index)
+                sharp = quality.passed[index]
+                index, faces = index[sharp], faces[sharp]
+                
+                if len(index):
+                    names, sims = self._match_embeddings(self.embedder.get_embeddings_aligned(faces), snapshot)
+                    for i, name, sim in zip(index, names, sims):
+                        self.tracker.assign(tracks[i], name, sim, sim >= self.similarity_threshold, now)
+                reused = sum(1 for track in tracks if track.verified_at is not None) - len(index)
+                self.tracker.count_reused(reused)
+                
+                attendance = self._empty_attendance(snapshot)
+                attendance.face_quality = quality.records(bboxes)
+                for track in tracks:
+                    if track.matched and track.identity in attendance:
+                        attendance[track.identity] = "Present"
+                        attendance.confidence[track.identity] = max(
+                            attendance.confidence.get(track.identity, 0.0), track.similarity)
+                
+                logger.info("Live frame: %d faces, %d embedded, %d identities from tracks",
+                            len(tracks), len(index), reused)
+                return attendance
+            except Exception as e:
+                logger.error(f"Error during live recognition: {e}")
+                return AttendanceResult(gallery_version=snapshot.version)
+
+    def reset_tracker(self):
+        """Forget live tracks (new session / camera restart)."""
+        with self._live_lock:
+            self.tracker.reset()
 
-            return (attendance, annotated_img) if return_annotated else attendance
+    def tracker_stats(self) -> Dict[str, float]:
+        """Live tracker counters (embedded vs reused identities, active tracks)."""
+        with self._live_lock:
+            return self.tracker.stats()
 
+    def recognize_burst(self, frames: List[np.ndarray], return_annotated: bool = False,
+                        mode: str = FUSION_MODE, min_votes: int = FUSION_MIN_VOTES) -> Any:
+        """
+        Recognize a burst of frames of the same scene as one fused result.
+        
+        All frames go through one detect/embed/match pass against a single
+        gallery snapshot. Evidence is then aggregated per student: 'max'
+        marks a student Present if matched in any frame (confidence = best
+        similarity), 'vote' needs matches in at least min_votes frames
+        (confidence = fraction of frames matched). A student seen in one
+        frame is never overwritten back to Absent by a later frame.
+        
+        Returns:
+            attendance (AttendanceResult): merged result with .confidence
+            annotated_img (np.ndarray|None): Frame with the most recognized
+                students, annotated, if requested
+        """
+        snapshot = self._current_snapshot()
+        attendance = self._empty_attendance(snapshot)
+        annotated_img = None
+        
+        try:
+            try:
+                per_frame_faces, query_embs, per_frame_quality = self._detect_and_embed(frames)
+            except Exception as e:
+                # Batch fail hua toh frame by frame, jo frames chal gaye unke matches rakhte hai
+                logger.error(f"Error during burst recognition, retrying frame by frame: {e}")
+                per_frame_faces, query_embs, per_frame_quality = self._detect_and_embed_each(frames)
+            best_names, best_sims = self._match_embeddings(query_embs, snapshot)
+            matched = best_sims >= self.similarity_threshold
+            attendance.face_quality = [dict(record, frame=i) for i, quality in enumerate(per_frame_quality)
+                                       for record in quality]
+            
+            # Per student: best similarity and number of frames it was matched in
+            best_sim: Dict[str, float] = {}
+            votes: Dict[str, int] = {}
+            frame_starts = []
+            frame_hits = []
+            face_idx = 0
+            for faces in per_frame_faces:
+                frame_starts.append(face_idx)
+                seen = set()
+                for _ in faces:
+                    if matched[face_idx]:
+                        name = best_names[face_idx]
+                        best_sim[name] = max(best_sim.get(name, -1.0), float(best_sims[face_idx]))
+                        seen.add(name)
+                    face_idx += 1
+                for name in seen:
+                    votes[name] = votes.get(name, 0) + 1
+                frame_hits.append(len(seen))
+            
+            required = 1 if mode == 'max' else max(1, min(min_votes, len(frames)))
+            for name, count in votes.items():
+                if count >= required:
+                    attendance[name] = "Present"
+                attendance.confidence[name] = best_sim[name] if mode == 'max' else count / len(frames)
+            
+            logger.info(
+                f"Burst of {len(frames)} frames ({len(best_names)} faces, mode={mode}): "
+                f"{sum(1 for s in attendance.values() if s == 'Present')} present"
+            )
+            
+            if return_annotated and frames:
+                # Jis frame me sabse zyada log pehchane gaye, wahi dikhayenge (tie pe aakhri wala)
+                best_frame = max(range(len(frames)), key=lambda i: (frame_hits[i], i))
+                annotated_img = frames[best_frame].copy()
+                self._annotate_rejected(annotated_img, per_frame_quality[best_frame])
+                start = frame_starts[best_frame]
+                for offset, bbox in enumerate(per_frame_faces[best_frame]):
+                    i = start + offset
+                    name = best_names[i] if matched[i] else "Unknown"
+                    self._annotate(annotated_img, bbox, name, best_sims[i], matched[i])
+        
         except Exception as e:
-            logger.error(f"Error during recognition: {e}")
-            return ({}, None) if return_annotated else {}
+            logger.error(f"Error during burst recognition: {e}")
+        
+        return (attendance, annotated_img) if return_annotated else attendance
+
+    def _current_snapshot(self) -> GallerySnapshot:
+        """
+        Published gallery snapshot (zero copy). The gallery is loaded in
+        __init__ and kept current by the writers, so an empty one is not
+        reloaded here (that could publish the older gallery on disk over
+        one that is being enrolled).
+        """
+        return self.db.snapshot()
+
+    @staticmethod
+    def _empty_attendance(snapshot: GallerySnapshot) -> AttendanceResult:
+        """Everyone Absent to start with."""
+        # The key in DB is f"{roll}_{name}" or just name if roll empty.
+        # We use the keys as names in the attendance dict.
+        return AttendanceResult(
+            {name: "Absent" for name in snapshot.keys},
+            gallery_version=snapshot.version,
+        )
+
+    def _detect_and_embed(self, frames: List[np.ndarray]) -> Tuple[List[List[np.ndarray]], np.ndarray, List[List[dict]]]:
+        """
+        Detect faces (with landmarks) in every frame, drop faces failing
+        the quality gate, align the rest into one preallocated
+        (N, 112, 112, 3) buffer, then embed the sharp ones in one batch.
+        
+        Size, score and yaw are checked before alignment, sharpness on the
+        aligned face, so rejected faces cost almost nothing.
+        
+        Returns:
+            (per_frame_bboxes, embeddings, per_frame_quality): bboxes of the
+            faces that passed (embeddings rows follow them frame by frame)
+            and quality records of every detected face
+        """
+        detections = []
+        for i, frame in enumerate(frames):
+            try:
+                bboxes, kpss = self.detector.detect(frame)
+            except Exception as e:
+                # Ek kharab frame baaki frames ka result na bigaade
+                logger.warning(f"Face detection failed on frame {i}: {e}")
+                bboxes, kpss = np.zeros((0, 5), dtype=np.float32), None
+            quality = self.quality_gate.assess(bboxes, kpss)
+            detections.append((bboxes, kpss, quality, np.flatnonzero(quality.passed)))
+        total = sum(len(keep) for _, _, _, keep in detections)
+        aligned = np.empty((total, ALIGNED_SIZE, ALIGNED_SIZE, 3), dtype=np.uint8)
+        
+        per_frame_faces = []
+        per_frame_quality = []
+        sharp = []
+        start = 0
+        for i, (frame, (bboxes, kpss, quality, keep)) in enumerate(zip(frames, detections)):
+            # Each frame warps straight into its slice of the shared buffer
+            faces = aligned[start:start + len(keep)]
+            start += len(keep)
+            try:
+                align_faces(frame, None if kpss is None else kpss[keep], bboxes[keep], out=faces)
+                self.quality_gate.assess_sharpness(quality, faces, keep)
+            except Exception as e:
+                # Is frame ke faces buffer me rehte hai par embed nahi hote
+                logger.warning(f"Face alignment failed on frame {i}: {e}")
+                sharp.append(np.zeros(len(keep), dtype=bool))
+                per_frame_faces.append([])
+                per_frame_quality.append(quality.records(bboxes))
+                continue
+            
+            sharp.append(quality.passed[keep])
+            per_frame_faces.append(list(bboxes[quality.passed]))
+            per_frame_quality.append(quality.records(bboxes))
+            logger.info("Detected %d faces, %d passed quality gate.", len(bboxes), len(per_frame_faces[-1]))
+
+        embed = np.concatenate(sharp) if sharp else np.zeros(0, dtype=bool)
+        if not embed.any():
+            return per_frame_faces, np.zeros((0, 0), dtype=np.float32), per_frame_quality
+
+        # Get Embeddings (all faces in one batched run)
+        faces = aligned if embed.all() else aligned[embed]
+        return per_frame_faces, self.embedder.get_embeddings_aligned(faces), per_frame_quality
+
+    def _detect_and_embed_each(self, frames: List[np.ndarray]) -> Tuple[List[List[np.ndarray]], np.ndarray, List[List[dict]]]:
+        """
+        _detect_and_embed() one frame at a time (slower). A frame that fails
+        contributes no faces instead of failing the whole burst.
+        """
+        per_frame_faces, embeddings, per_frame_quality = [], [], []
+        for i, frame in enumerate(frames):
+            try:
+                faces, embs, quality = self._detect_and_embed([frame])
+            except Exception as e:
+                logger.warning(f"Skipping frame {i} of the burst: {e}")
+                faces, embs, quality = [[]], np.zeros((0, 0), dtype=np.float32), [[]]
+            per_frame_faces.extend(faces)
+            per_frame_quality.extend(quality)
+            if len(embs):
+                embeddings.append(embs)
+        if not embeddings:
+            return per_frame_faces, np.zeros((0, 0), dtype=np.float32), per_frame_quality
+        return per_frame_faces, np.concatenate(embeddings), per_frame_quality
+
+    @staticmethod
+    def _match_embeddings(query_embs: np.ndarray, snapshot: GallerySnapshot) -> Tuple[List[Optional[str]], np.ndarray]:
+        """Find Best Match for all faces at once (one matrix product against the gallery)."""
+        if len(query_embs) == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        return snapshot.find_best_matches(query_embs)
+
+    @staticmethod
+    def _annotate(img: np.ndarray, bbox, name: str, sim: float, matched: bool):
+        """Draw box + label for one face (green = match, red = unknown)."""
+        x1, y1, x2, y2, score = bbox
+        color = (0, 255, 0) if matched else (0, 0, 255)
+        cv2.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+        
+        label = f"{name} ({sim:.2f})"
+        cv2.putText(img, label, (int(x1), int(y1)-10), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    @staticmethod
+    def _annotate_rejected(img: np.ndarray, quality: List[dict]):
+        """Draw faces skipped by the quality gate (gray box + reason)."""
+        color = (160, 160, 160)
+        for record in quality:
+            if record['passed']:
+                continue
+            x1, y1, x2, y2 = record['bbox']
+            cv2.rectangle(img, (x1, y1), (x2, y2), color, 1)
+            cv2.putText(img, record['reason'], (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
 
     def get_all_students(self):
         """Return list of student names/keys."""
-        return list(self.db.get_all_students().keys())
+        return list(self.db.snapshot().keys)
 
     def is_trained(self):
         """Check if we have embeddings."""
-        return self.db.get_student_count() > 0
+        return len(self.db.snapshot()) > 0
 
     def refresh_from_disk(self):
         """Force retrain/refresh."""
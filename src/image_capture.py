@@ -6,7 +6,9 @@ Camera handle karne wala module
 
 import cv2
 import os
+import time
 import threading
+from collections import deque
 from datetime import datetime
 import logging
 from config import *
@@ -17,14 +19,39 @@ logger = logging.getLogger(__name__)
 class ImageCapture:
     """Webcam se photo khinchne wali class"""
     
-    def __init__(self, camera_index=CAMERA_INDEX):
+    def __init__(self, camera_index=CAMERA_INDEX, source=CAMERA_SOURCE, buffer_size=FRAME_BUFFER_SIZE, loop_video=True):
+        """
+        Args:
+            camera_index: Webcam index
+            source: Video file path (testing ke liye); None matlab webcam
+            buffer_size: Ring buffer me kitne latest frames rakhne hai
+            loop_video: Video file khatam ho toh shuru se chalaye
+        """
         self.camera_index = camera_index
+        self.source = str(source) if source else None
+        self.loop_video = loop_video
         self.camera = None
         self.is_camera_active = False
         self.lock = threading.Lock()
+        # Background JPEG writes: filepath -> thread
+        self.save_lock = threading.Lock()
+        self.pending_saves = {}
+        
+        # Grabber thread latest frames (timestamp, frame_id, frame) yaha daalta hai
+        self.frames = deque(maxlen=max(1, buffer_size))
+        self.frame_cond = threading.Condition()
+        self.frame_id = 0
+        self.grabber_thread = None
+        self._stop_event = threading.Event()
         
     def initialize_camera(self):
         """Camera chalu karte hai (jo bhi mile)"""
+        if self.is_camera_active:
+            return True
+        
+        if self.source:
+            return self._open_video_source()
+        
         # Pehle user wala index try karenge, fir baaki
         indices_to_try = [self.camera_index] + [i for i in range(3) if i != self.camera_index]
         
@@ -50,6 +77,7 @@ class ImageCapture:
                         self.camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
                         
                         self.is_camera_active = True
+                        self._start_grabber()
                         logger.info(f"Camera {index} mast chal gaya")
                         return True
                     else:
@@ -61,85 +89,295 @@ class ImageCapture:
         logger.error("Koi bhi camera nahi chala bhai")
         return False
     
+    def _open_video_source(self):
+        """Webcam ki jagah video file kholte hai (bina camera ke test karne ke liye)"""
+        try:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                logger.error(f"Video file nahi khuli: {self.source}")
+                return False
+            
+            self.camera = cap
+            self.is_camera_active = True
+            self._start_grabber()
+            logger.info(f"Video source chalu: {self.source}")
+            return True
+        except Exception as e:
+            logger.error(f"Video source me dikkat aayi: {e}")
+            return False
+    
+    # -------------------- GRABBER THREAD --------------------
+    def _start_grabber(self):
+        """Background thread jo lagataar camera padhta rehta hai"""
+        with self.frame_cond:
+            self.frames.clear()
+        self._stop_event.clear()
+        self.grabber_thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self.grabber_thread.start()
+    
+    def _grab_loop(self):
+        """
+        Camera se frames padh ke ring buffer me daalte hai.
+        Sirf yahi thread camera.read() karta hai, baaki sab buffer se latest frame lete hai
+        (GUI block nahi hota aur driver me frames jama nahi hote).
+        """
+        # Video file ko real camera jaisi speed pe chalate hai
+        frame_gap = 0.0
+        if self.source:
+            fps = self.camera.get(cv2.CAP_PROP_FPS)
+            frame_gap = 1.0 / (fps if fps and fps > 0 else CAMERA_FPS)
+        
+        failures = 0
+        next_time = time.perf_counter()
+        while not self._stop_event.is_set():
+            try:
+                with self.lock:
+                    if self.camera is None:
+                        break
+                    ret, frame = self.camera.read()
+                    
+                    if not ret and self.source and self.loop_video:
+                        # Video khatam, shuru se chalate hai
+                        self.camera.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        ret, frame = self.camera.read()
+                
+                if not ret:
+                    failures += 1
+                    if self.source and not self.loop_video:
+                        logger.info("Video source khatam ho gaya")
+                        break
+                    if failures % 100 == 1:
+                        logger.warning("Camera se frame nahi aa raha")
+                    time.sleep(0.01)
+                    continue
+                failures = 0
+                
+                with self.frame_cond:
+                    self.frame_id += 1
+                    self.frames.append((time.time(), self.frame_id, frame))
+                    self.frame_cond.notify_all()
+                
+                if frame_gap:
+                    next_time += frame_gap
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+                    else:
+                        next_time = time.perf_counter()
+                        
+            except Exception as e:
+                logger.error(f"Grabber thread me error: {e}")
+                time.sleep(0.1)
+        
+        # Koi wait kar raha ho toh usko jaga dete hai
+        with self.frame_cond:
+            self.frame_cond.notify_all()
+    
+    def get_latest(self):
+        """
+        Sabse naya frame bina block kiye.
+        Returns:
+            (timestamp, frame_id, frame) ya None agar abhi tak koi frame nahi aaya
+        """
+        with self.frame_cond:
+            return self.frames[-1] if self.frames else None
+    
+    def get_recent_frames(self):
+        """Ring buffer ke saare frames (purane se naye) [(timestamp, frame_id, frame), ...]"""
+        with self.frame_cond:
+            return list(self.frames)
+    
+    def wait_for_frame(self, newer_than=None, timeout=1.0):
+        """
+        Naye frame ka wait karte hai.
+        
+        Args:
+            newer_than: Is time.time() timestamp ke baad wala frame chahiye (None = jo bhi latest ho)
+            timeout: Max kitne second rukna hai
+        
+        Returns:
+            (timestamp, frame_id, frame) ya None agar timeout ho gaya
+        """
+        deadline = time.time() + timeout
+        with self.frame_cond:
+            while True:
+                if self.frames and (newer_than is None or self.frames[-1][0] > newer_than):
+                    return self.frames[-1]
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_camera_active or self._stop_event.is_set():
+                    return None
+                self.frame_cond.wait(remaining)
+    
     def capture_image(self, class_id=""):
         """
         Ek photo khichte hai
         """
+        frame = self.capture_frame()
+        if frame is None:
+            return None
+        
+        try:
+            return self.save_frame(frame, class_id)
+        except Exception as e:
+            logger.error(f"Photo khinchne me error: {e}")
+            return None
+    
+    def capture_frame(self):
+        """
+        Ek photo khichte hai, par disk pe save nahi karte (seedha recognition ke liye).
+        Button dabane ke baad wala taaza frame buffer se lete hai.
+        """
         if not self.is_camera_active:
             if not self.initialize_camera():
                 return None
         
         try:
-            # Frame capture karte hai
-            with self.lock:
-                if self.camera is None or not self.camera.isOpened():
-                     return None
-                ret, frame = self.camera.read()
+            entry = self.wait_for_frame(newer_than=time.time())
+            if entry is None:
+                # Naya frame time pe nahi aaya toh jo latest hai wahi
+                entry = self.get_latest()
             
-            if not ret:
+            if entry is None:
                 logger.error("Frame capture nahi hua")
                 return None
             
-            # Filename banate hai timestamp ke saath
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            filename = f"{class_id}_{timestamp}.{IMAGE_FORMAT}" if class_id else f"{timestamp}.{IMAGE_FORMAT}"
-            filepath = os.path.join(IMAGES_DIR, filename)
+            return entry[2].copy()
+            
+        except Exception as e:
+            logger.error(f"Photo khinchne me error: {e}")
+            return None
+    
+    def save_frame(self, frame, class_id="", background=False):
+        """
+        Frame ko JPEG me save karte hai.
+        background=True pe writing alag thread me hoti hai aur path turant mil jata hai
+        (flush_saves() se wait kar sakte hai).
+        """
+        # Filename banate hai timestamp ke saath
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        base = f"{class_id}_{timestamp}" if class_id else timestamp
+        
+        with self.save_lock:
+            # Same second me do photo aayi toh naam clash na ho
+            filepath = os.path.join(IMAGES_DIR, f"{base}.{IMAGE_FORMAT}")
+            suffix = 1
+            while os.path.exists(filepath) or filepath in self.pending_saves:
+                filepath = os.path.join(IMAGES_DIR, f"{base}_{suffix}.{IMAGE_FORMAT}")
+                suffix += 1
             
+            if background:
+                thread = threading.Thread(target=self._write_frame, args=(filepath, frame), daemon=True)
+                self.pending_saves[filepath] = thread
+                thread.start()
+                return filepath
+        
+        self._write_frame(filepath, frame)
+        return filepath
+    
+    def _write_frame(self, filepath, frame):
+        """Asli disk write (JPEG encode)"""
+        try:
             # Save karte hai
             cv2.imwrite(filepath, frame, [cv2.IMWRITE_JPEG_QUALITY, IMAGE_QUALITY])
             logger.info(f"Photo save ho gayi: {filepath}")
-            
-            return filepath
-            
         except Exception as e:
-            logger.error(f"Photo khinchne me error: {e}")
-            return None
+            logger.error(f"Photo save karne me error: {e}")
+        finally:
+            with self.save_lock:
+                self.pending_saves.pop(filepath, None)
+    
+    def flush_saves(self, timeout=None):
+        """Background me chal rahi saari saves ka wait karte hai"""
+        with self.save_lock:
+            threads = list(self.pending_saves.values())
+        for thread in threads:
+            thread.join(timeout)
     
-    def capture_multiple_images(self, count=3, interval=2, class_id=""):
+    def capture_multiple_images(self, count=3, interval=2, class_id="", on_saved=None):
         """
         Dhadadhan photos khenchna (interval ke saath)
+        on_saved(filepath) har photo save hote hi call hota hai, agli photo ka
+        wait karte hue (jaise enrollment me is photo ka face pehle hi detect karna)
         """
         images = []
         
-        for i in range(count):
-            filepath = self.capture_image(class_id)
-            
-            if filepath:
-                images.append(filepath)
-                logger.info(f"Photo {i+1}/{count} khinch li")
+        def save(i, frame):
+            try:
+                filepath = self.save_frame(frame, class_id)
+            except Exception as e:
+                logger.error(f"Photo khinchne me error: {e}")
+                return
             
-            # Agli photo se pehle thoda rukte hai
-            if i < count - 1:
-                import time
-                time.sleep(interval)
+            images.append(filepath)
+            logger.info(f"Photo {i+1}/{count} khinch li")
+            if on_saved is not None:
+                try:
+                    on_saved(filepath)
+                except Exception as e:
+                    logger.warning(f"Photo {filepath} ke callback me error: {e}")
         
+        self.capture_multiple_frames(count, interval, on_frame=save)
         return images
     
+    def capture_multiple_frames(self, count=3, interval=2, on_frame=None):
+        """
+        Dhadadhan frames memory me lena (disk pe kuch nahi likhte).
+        Sleep ki jagah buffer se interval ke hisaab se frames uthate hai.
+        on_frame(i, frame) har frame milte hi call hota hai (agle shot ka time
+        fixed hai, toh callback ka time interval me hi chhup jata hai)
+        """
+        frames = []
+        if not self.is_camera_active:
+            if not self.initialize_camera():
+                return frames
+        
+        start = time.time()
+        for i in range(count):
+            # Har shot ka target time: start, start+interval, ...
+            target = start + i * interval
+            entry = self.wait_for_frame(newer_than=target, timeout=interval + 1.0)
+            
+            if entry is not None:
+                frames.append(entry[2].copy())
+                logger.info(f"Frame {i+1}/{count} le liya")
+                if on_frame is not None:
+                    on_frame(i, frames[-1])
+        
+        return frames
+    
     def get_frame(self):
         """
-        Live preview ke liye frame chahiye
+        Live preview ke liye frame chahiye (latest wala, bina camera pe ruke)
         """
         if not self.is_camera_active:
             if not self.initialize_camera():
                 return None
         
-        try:
-            with self.lock:
-                if self.camera is None or not self.camera.isOpened():
-                    return None
-                ret, frame = self.camera.read()
-            return frame if ret else None
-            
-        except Exception as e:
-            logger.error(f"Frame lene me error: {e}")
-            return None
+        entry = self.get_latest()
+        if entry is None:
+            # Camera abhi chalu hua hai, pehle frame ka thoda wait
+            entry = self.wait_for_frame(timeout=0.5)
+        
+        # Copy dete hai taaki koi box banaye toh buffer wala frame kharab na ho
+        return entry[2].copy() if entry is not None else None
     
     def release_camera(self):
         """Camera band karte hai"""
-        if self.camera is not None:
-            self.camera.release()
-            self.is_camera_active = False
-            logger.info("Camera band kar diya")
+        self._stop_event.set()
+        if self.grabber_thread is not None and self.grabber_thread is not threading.current_thread():
+            self.grabber_thread.join(timeout=2.0)
+        self.grabber_thread = None
+        
+        with self.lock:
+            if self.camera is not None:
+                self.camera.release()
+                self.camera = None
+                logger.info("Camera band kar diya")
+        self.is_camera_active = False
+        
+        with self.frame_cond:
+            self.frames.clear()
+            self.frame_cond.notify_all()
     
     def __del__(self):
         """Agar object delete hua toh camera bhi band"""
@@ -14,13 +14,14 @@ import cv2
 import threading
 import os
 import logging
+import re
 import shutil
 import random
 from datetime import datetime, timedelta
 
 # Backend modules import kar rahe hai
 from image_capture import ImageCapture
-from face_recognition_module import FaceRecognitionModule
+from face_recognition_module import FaceRecognitionModule, AttendanceResult
 from emotion_detection import EmotionDetection
 from report_generator import ReportGenerator
 from email_automation import EmailAutomation
@@ -28,6 +29,11 @@ from data_cleanup import DataCleanup
 from settings_manager import SettingsManager
 from realtime_emotion_monitor import RealtimeEmotionMonitor
 from emotion_overlay import EmotionOverlay
+from preview_detector import PreviewFaceDetector
+from motion_gate import MotionGate
+from core.presence import PresenceLedger
+from core.scheduler import (InferenceScheduler, PRIORITY_CAPTURE, PRIORITY_UPLOAD,
+                            PRIORITY_TRAINING, PRIORITY_LIVE)
 from config import *
 
 # Logging setup - sab record hoga yaha
@@ -65,6 +71,12 @@ class AttendanceApp(ctk.CTk):
         self.email_automation = EmailAutomation(self.settings_manager)
         self.data_cleanup = DataCleanup()
         
+        # Saara recognition/training ek hi bounded pool se chalega (priority ke hisaab se)
+        self.scheduler = InferenceScheduler(
+            max_workers=MAX_WORKERS if PARALLEL_PROCESSING else 1,
+            max_queue=INFERENCE_QUEUE_SIZE
+        )
+        
         # Real-time emotion overlay ke liye
         self.emotion_monitor = None
         self.emotion_overlay = None
@@ -78,6 +90,8 @@ class AttendanceApp(ctk.CTk):
         
         self.last_analysis_time = datetime.now()
         self.last_attendance_time = datetime.now()
+        # Session ka presence ledger (kaun kitni der dikha), session start pe banta hai
+        self.presence = None
         
         # Haar Cascade load karte hai (chehra dhundne ke liye)
         try:
@@ -85,6 +99,12 @@ class AttendanceApp(ctk.CTk):
         except:
             logger.warning("Haar Cascade nahi mila yaar")
             self.face_cascade = None
+        
+        # Preview ke dibbe alag thread me dhoondhenge, GUI thread sirf draw karega
+        self.preview_detector = PreviewFaceDetector(self.image_capture, self.face_cascade)
+        
+        # Scene nahi badla toh live analysis skip (badla toh interval se pehle bhi)
+        self.motion_gate = MotionGate()
 
         # Face Recognition ko background me start karte hai taaki app hang na ho
         threading.Thread(target=self._warmup_model, daemon=True).start()
@@ -1133,6 +1153,7 @@ class AttendanceApp(ctk.CTk):
 
         if self.image_capture.initialize_camera():
             self.camera_active = True
+            self.preview_detector.start()
             self.enroll_start_cam_btn.configure(state="disabled", text="Running...")
             self.enroll_stop_cam_btn.configure(state="normal")
             self.update_enrollment_camera()
@@ -1142,6 +1163,7 @@ class AttendanceApp(ctk.CTk):
     def stop_enrollment_camera(self):
         """Stop camera from enrollment page"""
         self.camera_active = False
+        self.preview_detector.stop()
         self.image_capture.release_camera()
         
         self.enroll_start_cam_btn.configure(state="normal", text="▶ START CAMERA")
@@ -1155,12 +1177,8 @@ class AttendanceApp(ctk.CTk):
         
         frame = self.image_capture.get_frame()
         if frame is not None:
-            # Add face detection box
-            if self.face_cascade:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-                for (x, y, w, h) in faces:
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+            # Add face detection box (worker ke cached boxes)
+            self.preview_detector.draw(frame)
             
             # Resize and display
             h, w = frame.shape[:2]
@@ -1238,7 +1256,9 @@ class AttendanceApp(ctk.CTk):
             # Train model
             image_count = len(self.enrollment_images)
             messagebox.showinfo("Training", "Enrollment successful! Training model...")
-            threading.Thread(target=self.face_recognition.train_face_encodings, daemon=True).start()
+            # Sirf is student ki photos embed hoti hai, poori gallery retrain nahi
+            self.scheduler.submit(PRIORITY_TRAINING, self.face_recognition.enroll_student, folder_name,
+                                  coalesce_key=f"enroll:{folder_name}")
             
             # Clear form
             self.clear_enrollment()
@@ -1457,7 +1477,7 @@ class AttendanceApp(ctk.CTk):
                 logger.info(f"Deleted folder: {path}")
                 
             # Step 3: Trigger retrain to update embeddings
-            threading.Thread(target=self.face_recognition.train_face_encodings, daemon=True).start()
+            self.scheduler.submit(PRIORITY_TRAINING, self.face_recognition.train_face_encodings, coalesce_key="train")
             
             messagebox.showinfo("Deleted", f"Student {student_id} deleted successfully.\nModel is retraining in background.")
             self.show_student_database() # Refresh list
@@ -1487,6 +1507,10 @@ class AttendanceApp(ctk.CTk):
                 except Exception as e:
                     logger.warning(f"Could not remove encodings file: {e}")
 
+            # Gallery bhi khaali karte hai (matrix files bhi hat jayengi)
+            self.face_recognition.db.clear()
+            self.face_recognition.db.save_database()
+
             # Refresh face recognition module (empty student list, no encodings)
             if hasattr(self.face_recognition, "refresh_from_disk"):
                 self.face_recognition.refresh_from_disk()
@@ -1509,7 +1533,7 @@ class AttendanceApp(ctk.CTk):
         self.update_status("Analyzing uploaded photo...", "blue")
         
         # Run in background thread to prevent freeze
-        threading.Thread(target=self._process_manual_upload, args=(file_path,), daemon=True).start()
+        self.scheduler.submit(PRIORITY_UPLOAD, self._process_manual_upload, file_path)
 
     def _process_manual_upload(self, file_path):
         """Background processing for manual upload"""
@@ -1683,11 +1707,21 @@ class AttendanceApp(ctk.CTk):
         if self.image_capture.initialize_camera():
             self.camera_active = True
             self.automation_active = True
+            self.preview_detector.start()
             self.start_btn.configure(text="⏹ STOP SESSION", fg_color=THEME_COLORS['danger'], hover_color="#b91c1c")
             self.capture_btn.configure(state="normal")
             
             # Timer reset karte hai
             self.last_analysis_time = datetime.now() - timedelta(minutes=100) # Force immediate analysis
+            self.motion_gate.reset()
+            self.face_recognition.reset_tracker()
+            # Naya session = naya ledger (subject + start time)
+            subject = re.sub(r'[^A-Za-z0-9_-]+', '_', self.subject_var.get())
+            # Kuch analysis intervals se lamba gap (camera band, restart) bhara nahi jata
+            max_gap = PRESENCE_MAX_GAP_INTERVALS * self.settings_manager.get("analysis_interval") * 60
+            self.presence = PresenceLedger(PRESENCE_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{subject}",
+                                           tick_seconds=PRESENCE_TICK_SECONDS,
+                                           max_gap_seconds=max(max_gap, PRESENCE_TICK_SECONDS))
             self.last_attendance_time = datetime.now()
             
             self.update_camera_feed()
@@ -1701,7 +1735,12 @@ class AttendanceApp(ctk.CTk):
         if self.after_id:
             self.after_cancel(self.after_id)
             self.after_id = None
+        self.preview_detector.stop()
         self.image_capture.release_camera()
+        if self.presence is not None:
+            # Ledger disk pe hi hai, session khatam
+            self.presence.flush()
+            self.presence = None
         
         # UI reset kar dete hai
         self.start_btn.configure(text="▶ START SESSION", fg_color=THEME_COLORS['success'], hover_color="#059669")
@@ -1713,17 +1752,13 @@ class AttendanceApp(ctk.CTk):
         
         frame = self.image_capture.get_frame()
         if frame is not None:
-            # 1. Face Detection (Bas dikhane ke liye)
-            if self.face_cascade:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-                for (x, y, w, h) in faces:
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-
-            # 2. Automation Logic (Apna main kaam)
+            # 1. Automation Logic (Apna main kaam) - saaf frame pe, dibbe se pehle
             if self.automation_active:
                 self._check_automation(frame)
 
+            # 2. Face Detection (Bas dikhane ke liye) - worker ke cached boxes
+            self.preview_detector.draw(frame)
+
             # 3. Smart Resize (Screen pe fit hona chahiye)
             cw = self.cam_container.winfo_width()
             ch = self.cam_container.winfo_height()
@@ -1749,20 +1784,63 @@ class AttendanceApp(ctk.CTk):
         ana_int = self.settings_manager.get("analysis_interval")
         att_int = self.settings_manager.get("attendance_interval")
         
-        # Check Analysis
+        # Check Analysis (interval poora hua aur scene badla, ya bada badlaav turant)
         delta_ana = (now - self.last_analysis_time).total_seconds() / 60
-        if delta_ana >= ana_int:
-            logger.info("Chehra analyze kar rahe hai...")
+        due = delta_ana >= ana_int
+        reason = self.motion_gate.check(frame, due)
+        if reason is not None:
+            logger.info(f"Chehra analyze kar rahe hai ({reason})...")
+            self.last_analysis_time = now
+            stats = self.scheduler.stats()
+            motion = self.motion_gate.stats()
+            logger.info(f"Inference queue: depth={stats['queue_depth']}, "
+                        f"avg wait={stats['avg_wait_ms']:.0f} ms, max wait={stats['max_wait_ms']:.0f} ms, "
+                        f"dropped live={stats['dropped_stale'] + stats['dropped_replaced'] + stats['dropped_full']}")
+            logger.info(f"Motion gate: executed={motion['executed']} (early={motion['early']}), "
+                        f"skipped={motion['skipped']}, change={motion['last_change']:.1%}")
+            # Purana live job abhi queue me hai toh naya usko replace karega
+            self.scheduler.submit(PRIORITY_LIVE, self._update_live_feed, frame.copy(),
+                                  max_age=LIVE_JOB_MAX_AGE, coalesce_key="live")
+        elif due:
+            # Scene same hai, is interval ka inference skip (jo pichhli baar the wo ab bhi hai)
             self.last_analysis_time = now
-            threading.Thread(target=self._update_live_feed, args=(frame.copy(),), daemon=True).start()
+            if self.presence is not None:
+                self.presence.hold()
+            logger.info(f"Scene nahi badla, analysis skip (skipped={self.motion_gate.stats()['skipped']})")
             
-        # Check Attendance Marking (Mock implementation hai abhi)
+        # Check Attendance Marking (ledger se: kaun kitni der class me tha)
         delta_att = (now - self.last_attendance_time).total_seconds() / 60
-        if delta_att >= att_int:
-             logger.info("Attendance laga rahe hai...")
-             self.last_attendance_time = now
-             # Asli app me yaha database save hoga
-             self.after(0, lambda: messagebox.showinfo("Autolink", "✅ Attendance lag gayi."))
+        if delta_att >= att_int and self.presence is not None:
+            logger.info("Attendance laga rahe hai...")
+            self.last_attendance_time = now
+            # Background ka kaam hai, capture/upload jobs ko rokna nahi chahiye
+            self.scheduler.submit(PRIORITY_TRAINING, self._mark_dwell_attendance,
+                                  self.presence, self.subject_var.get())
+
+    def _mark_dwell_attendance(self, presence, subject):
+        """Session ledger se dwell-time attendance lagake report banate hai"""
+        try:
+            statuses, fractions = presence.attendance(
+                keys=self.face_recognition.get_all_students(),
+                min_dwell_minutes=PRESENCE_MIN_DWELL_MINUTES,
+                min_fraction=PRESENCE_MIN_FRACTION,
+            )
+            # confidence = observed time ka kitna hissa dikha
+            attendance = AttendanceResult(statuses, confidence=fractions)
+            self.update_last_attendance(attendance)
+            
+            time_start = datetime.fromtimestamp(presence.start).strftime("%H:%M:%S")
+            time_end = datetime.now().strftime("%H:%M:%S")
+            self.report_generator.generate_report(attendance, None, subject, time_start, time_end,
+                                                  report_format='both')
+            
+            present = sum(1 for status in attendance.values() if status == "Present")
+            logger.info(f"Dwell attendance: {present}/{len(attendance)} present ({presence.session_id})")
+            self.after(0, lambda: messagebox.showinfo(
+                "Autolink", f"✅ Attendance lag gayi.\n{present}/{len(attendance)} present "
+                            f"(kam se kam {PRESENCE_MIN_DWELL_MINUTES} min class me)"))
+        except Exception as e:
+            logger.error(f"Dwell attendance me error: {e}")
 
     def toggle_emotion_overlay(self):
         """Teacher overlay toggle karte hai"""
@@ -1778,7 +1856,7 @@ class AttendanceApp(ctk.CTk):
                         return
                 
                 # Monitor banate hai
-                self.emotion_monitor = RealtimeEmotionMonitor(camera_instance=self.image_capture.camera)
+                self.emotion_monitor = RealtimeEmotionMonitor(camera_instance=self.image_capture)
                 
                 # Overlay banate hai
                 self.emotion_overlay = EmotionOverlay(self.emotion_monitor)
@@ -1820,12 +1898,17 @@ class AttendanceApp(ctk.CTk):
     def _update_live_feed(self, frame):
         """Background me face dhoondhte hai taaki screen na atkegi"""
         try:
-            # Temp save karte hai
-            temp_path = os.path.join(IMAGES_DIR, "live_temp.jpg")
-            cv2.imwrite(temp_path, frame)
-            
-            # Jaldi se pehchan lete hai
-            attendance = self.face_recognition.recognize_faces(temp_path)
+            # Jaldi se pehchan lete hai (seedha memory se, disk pe temp file nahi).
+            # Pehle se track ho rahe chehron ki pehchaan track se hi aa jaati hai
+            attendance = self.face_recognition.recognize_live(frame)
+            
+            # Session ledger me is tick pe kaun dikha
+            presence = self.presence
+            if presence is not None:
+                presence.mark([name for name, status in attendance.items() if status == "Present"])
+            tracking = self.face_recognition.tracker_stats()
+            logger.info(f"Tracker: {tracking['active_tracks']} tracks, embedded={tracking['embedded']}, "
+                        f"reused={tracking['reused']} ({tracking['reuse_rate']:.0%})")
             
             # Agar koi mila toh screen pe dikhayenge
             for name, status in attendance.items():
@@ -1838,26 +1921,24 @@ class AttendanceApp(ctk.CTk):
 
     def capture_and_process(self):
         subject = self.subject_var.get()
-        threading.Thread(target=self._process_attendance, args=(subject,), daemon=True).start()
+        self.scheduler.submit(PRIORITY_CAPTURE, self._process_attendance, subject)
 
     def _process_attendance(self, subject):
         self.update_status("Photo khinch rahe hai...", "orange")
         self.capture_btn.configure(state="disabled")
         
         try:
-            images = self.image_capture.capture_multiple_images(count=3)
-            if not images: raise Exception("Photo nahi aayi yaar")
+            frames = self.image_capture.capture_multiple_frames(count=3)
+            if not frames: raise Exception("Photo nahi aayi yaar")
+            
+            # Report ke liye photos background me save hoti rahengi
+            images = [self.image_capture.save_frame(f, background=True) for f in frames]
             
             self.update_status("Chehra dhoond rahe hai...", "blue")
-            all_attendance = {}
-            final_annotated_img = None
             
-            for img_path in images:
-                # Attendance aur photo dono chahiye
-                att, ann_img = self.face_recognition.recognize_faces(img_path, return_annotated=True)
-                all_attendance.update(att)
-                if ann_img is not None:
-                    final_annotated_img = ann_img # Aakhri wala use karenge
+            # Attendance aur photo dono chahiye (teeno frames ek saath milake, ek hi gallery version pe)
+            all_attendance, final_annotated_img = self.face_recognition.recognize_burst(frames, return_annotated=True)
+            logger.info(f"Gallery version {all_attendance.gallery_version} se attendance li")
             
             # Hara dibba dikhana hai result me
             if final_annotated_img is not None:
@@ -1870,6 +1951,8 @@ class AttendanceApp(ctk.CTk):
             self.update_last_attendance(all_attendance)
 
             self.update_status("Report bana rahe hai...", "purple")
+            # Photos disk pe aa jaye tabhi report/emotion unhe padhenge
+            self.image_capture.flush_saves()
             emotion_summary = self.emotion_detection.analyze_multiple_images(images)
             timestamp = datetime.now()
             
@@ -2017,11 +2100,9 @@ class AttendanceApp(ctk.CTk):
         """Enhanced enrollment with roll number"""
         if not self.camera_active: 
             self.start_camera()
-        self.after(1000, lambda: threading.Thread(
-            target=self._enroll_thread, 
-            args=(roll_number, name), 
-            daemon=True
-        ).start())
+        self.after(1000, lambda: self.scheduler.submit(
+            PRIORITY_CAPTURE, self._enroll_thread, roll_number, name
+        ))
 
     def _enroll_thread(self, roll_number, name):
         """Enrollment thread with progress tracking"""
@@ -2036,7 +2117,11 @@ class AttendanceApp(ctk.CTk):
             
             # Capture images with feedback
             self.after(0, lambda: self.update_status(f"Image 1/5...", "blue"))
-            images = self.image_capture.capture_multiple_images(count=5, interval=1, class_id=student_folder_name)
+            # Har photo ka face agli photo ke wait me hi detect ho jata hai
+            images = self.image_capture.capture_multiple_images(
+                count=5, interval=1, class_id=student_folder_name,
+                on_saved=self.face_recognition.prepare_enrollment_image
+            )
             
             # Move images to student directory
             moved_count = 0
@@ -2056,7 +2141,13 @@ class AttendanceApp(ctk.CTk):
             
             # Train model
             self.update_status("🔄 Training recognition model...", "orange")
-            self.face_recognition.train_face_encodings()
+            if not self.face_recognition.enroll_student(student_folder_name):
+                self.update_status("Enrollment Failed", "red")
+                self.after(0, lambda: messagebox.showerror(
+                    "Enrollment Failed",
+                    "No usable face found in the captured images. Please try again."
+                ))
+                return
             
             # Success
             self.update_status("✓ Enrollment Complete!", "green")
@@ -2071,14 +2162,13 @@ class AttendanceApp(ctk.CTk):
             self.after(0, lambda: messagebox.showerror("Enrollment Error", str(e)))
 
     def open_dataset_folder(self): os.startfile(STUDENT_DATASET_DIR)
-    def train_faces(self): threading.Thread(target=lambda: self.face_recognition.train_face_encodings(), daemon=True).start()
+    def train_faces(self): self.scheduler.submit(PRIORITY_TRAINING, self.face_recognition.train_face_encodings, coalesce_key="train")
 
     def _warmup_model(self):
-        """Warmup the face recognition model in background"""
+        """Warmup the face recognition model in background (models load karo, retrain nahi)"""
         try:
-            if self.face_recognition.is_trained():
-                self.face_recognition.train_face_encodings()
-                logger.info("Model warmup complete")
+            self.face_recognition.warmup()
+            logger.info("Model warmup complete")
         except Exception as e:
             logger.error(f"Model warmup failed: {e}")
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Motion Gate
+Live analysis sirf tab chalti hai jab scene sach me badla ho.
+Chhote grayscale frame ko pichhle analyzed frame se compare karte hai
+(khaali classroom ya static lecture pe SCRFD + ArcFace bachta hai)
+"""
+
+import cv2
+import time
+import logging
+import threading
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Downscaled frame differencing se decide karta hai ki live analysis chalani hai ya nahi"""
+
+    def __init__(self, enabled=MOTION_GATE_ENABLED, width=MOTION_DETECTION_WIDTH,
+                 pixel_threshold=MOTION_PIXEL_THRESHOLD, threshold=MOTION_THRESHOLD,
+                 early_threshold=MOTION_EARLY_THRESHOLD, min_gap=MOTION_MIN_GAP,
+                 force_minutes=MOTION_FORCE_ANALYSIS_MINUTES, check_fps=MOTION_CHECK_FPS):
+        """
+        Args:
+            enabled: False ho toh har interval pe analysis (purana behaviour)
+            width: Compare karne se pehle frame ko itni width tak chhota karte hai
+            pixel_threshold: Pixel ki brightness itni badle tab "badla" maante hai (0-255)
+            threshold: Interval pe itne fraction pixels badle ho tabhi analysis
+            early_threshold: Itna bada badlaav ho toh interval ka wait kiye bina analysis
+            min_gap: Early analyses ke beech kam se kam itne seconds
+            force_minutes: Scene same rahe tab bhi itne minute me ek analysis
+            check_fps: Interval ke beech ek second me kitni baar change check kare
+        """
+        self.enabled = enabled
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.threshold = threshold
+        self.early_threshold = early_threshold
+        self.min_gap = min_gap
+        self.force_seconds = force_minutes * 60
+        self.check_interval = 1.0 / max(check_fps, 0.1)
+
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Naya session: reference frame aur counters saaf"""
+        with self.lock:
+            self.reference = None
+            self.reference_time = 0.0
+            self.last_check = 0.0
+            self.last_change = 0.0
+            self.executed = 0
+            self.skipped = 0
+            self.early = 0
+
+    def _prepare(self, frame):
+        """Chhota, grayscale, thoda blur (camera noise ko badlaav na samjhe)"""
+        h, w = frame.shape[:2]
+        scale = self.width / w if w > self.width else 1.0
+        small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def change(self, small):
+        """Reference frame ke comparison me kitne fraction pixels badle (0..1)"""
+        diff = cv2.absdiff(small, self.reference)
+        return cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+    def check(self, frame, due, now=None):
+        """
+        Args:
+            frame: Latest BGR frame
+            due: analysis_interval poora ho gaya kya
+            now: time.monotonic() jaisa timestamp (None = abhi ka; tests apna dete hai)
+
+        Returns:
+            Analysis ka reason ('first', 'interval', 'motion', 'refresh', 'early')
+            ya None (skip)
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if not self.enabled:
+                if due:
+                    self.executed += 1
+                    return 'interval'
+                return None
+
+            # Interval ke beech har GUI tick pe nahi, check_fps pe hi dekhte hai
+            if not due and now - self.last_check < self.check_interval:
+                return None
+            self.last_check = now
+
+            small = self._prepare(frame)
+            if self.reference is None or self.reference.shape != small.shape:
+                if not due:
+                    return None
+                reason = 'first'
+            else:
+                self.last_change = self.change(small)
+                if due:
+                    if self.last_change >= self.threshold:
+                        reason = 'motion'
+                    elif now - self.reference_time >= self.force_seconds:
+                        reason = 'refresh'
+                    else:
+                        # Scene same hai, inference ki zarurat nahi
+                        self.skipped += 1
+                        return None
+                elif self.last_change >= self.early_threshold and now - self.reference_time >= self.min_gap:
+                    reason = 'early'
+                    self.early += 1
+                else:
+                    return None
+
+            self.reference = small
+            self.reference_time = now
+            self.executed += 1
+            return reason
+
+    def stats(self):
+        """Counters: executed, skipped, early, last_change"""
+        with self.lock:
+            return {
+                'executed': self.executed,
+                'skipped': self.skipped,
+                'early': self.early,
+                'last_change': self.last_change,
+            }
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Preview Face Detector
+Live preview ke green dibbe background thread me dhoondhta hai
+(GUI thread sirf cached boxes draw karta hai)
+"""
+
+import cv2
+import threading
+import time
+import logging
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewFaceDetector:
+    """Haar cascade ko chhote frame pe, fixed rate pe, alag thread me chalata hai"""
+
+    def __init__(self, image_capture, cascade, fps=PREVIEW_DETECTION_FPS, width=PREVIEW_DETECTION_WIDTH):
+        """
+        Args:
+            image_capture: ImageCapture (grabber buffer se latest frame lete hai)
+            cascade: cv2.CascadeClassifier (None ho toh kuch nahi karta)
+            fps: Ek second me kitni baar detect karna hai
+            width: Detection se pehle frame ko itni width tak chhota karte hai
+        """
+        self.image_capture = image_capture
+        self.cascade = cascade
+        self.interval = 1.0 / max(fps, 0.1)
+        self.width = width
+        # Itne purane boxes nahi dikhayenge (camera ruk gaya ya chehra hat gaya)
+        self.max_box_age = max(3 * self.interval, 0.5)
+
+        self.lock = threading.Lock()
+        self.boxes = []
+        self.boxes_time = 0.0
+        self.last_frame_id = None
+        self.detect_time = 0.0
+
+        self.worker = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Worker chalu karte hai (pehle se chal raha ho toh kuch nahi)"""
+        if self.cascade is None or (self.worker is not None and self.worker.is_alive()):
+            return
+        self._stop_event.clear()
+        self.worker = threading.Thread(target=self._detect_loop, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        """Worker band karte hai aur purane boxes hata dete hai"""
+        self._stop_event.set()
+        if self.worker is not None:
+            self.worker.join(timeout=1.0)
+        self.worker = None
+        with self.lock:
+            self.boxes = []
+            self.last_frame_id = None
+
+    def _detect_loop(self):
+        """Har interval pe latest frame pe detection"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                entry = self.image_capture.get_latest()
+                if entry is None:
+                    continue
+                timestamp, frame_id, frame = entry
+                # Same frame dobara detect nahi karte
+                if frame_id == self.last_frame_id:
+                    continue
+
+                start = time.perf_counter()
+                boxes = self.detect(frame)
+                self.detect_time = time.perf_counter() - start
+
+                with self.lock:
+                    self.boxes = boxes
+                    self.boxes_time = timestamp
+                    self.last_frame_id = frame_id
+            except Exception as e:
+                logger.error(f"Preview detection me error: {e}")
+
+    def detect(self, frame):
+        """
+        Chhote grayscale frame pe detect karke boxes original size me wapis scale karte hai.
+        Returns:
+            [(x, y, w, h), ...] original frame ke coordinates me
+        """
+        h, w = frame.shape[:2]
+        scale = self.width / w if w > self.width else 1.0
+
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, 1.1, 4)
+
+        return [tuple(int(v / scale) for v in face) for face in faces]
+
+    def get_boxes(self):
+        """Latest cached boxes (bahut purane ho toh khaali list)"""
+        with self.lock:
+            if time.time() - self.boxes_time > self.max_box_age:
+                return []
+            return list(self.boxes)
+
+    def draw(self, frame):
+        """Cached boxes frame pe bana dete hai (GUI thread ke liye, sasta kaam)"""
+        for (x, y, w, h) in self.get_boxes():
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+        return frame
@@ -20,6 +20,7 @@ class RealtimeEmotionMonitor:
     """Real-time emotion monitoring ke liye class (Mock Version)"""
     
     def __init__(self, camera_instance=None):
+        # ImageCapture (grabber thread wala) - frame get_frame() se lete hai, camera.read() nahi
         self.camera = camera_instance
         self.is_running = False
         self.current_emotions = {}
@@ -86,17 +87,15 @@ class RealtimeEmotionMonitor:
                     time.sleep(0.1)
                     continue
                 
-                # Frame lete hai (Mock mode mein bhi frame read karna chahiye taaki camera busy na ho)
-                # But if usage clashes, we can skip. Let's assume camera is shared or thread safe if implemented correctly.
-                # Actually, in mock mode, we can just sleep and simulate data.
+                # Latest frame buffer se lete hai (camera pe koi lock/wait nahi)
+                frame = self.camera.get_frame()
+                if frame is None:
+                    time.sleep(0.1)
+                    continue
                 time.sleep(1.0) # Simulate processing time
                 
                 # Mock Data
-                mock_emotions = {
-                    'emotions': ['neutral'],
-                    'face_count': 1,
-                    'timestamp': time.time()
-                }
+                mock_emotions = self._analyze_frame(frame)
                 
                 # Update karte hai
                 with self.lock:
@@ -90,7 +90,12 @@ class ReportGenerator:
                 
                 f.write(f"Subject: {subject}\n")
                 f.write(f"Date: {date_str}\n")
-                f.write(f"Time: {time_start} – {time_end}\n\n")
+                f.write(f"Time: {time_start} – {time_end}\n")
+                # Kaunse gallery version se pehchana (AttendanceResult ho toh)
+                gallery_version = getattr(attendance, "gallery_version", None)
+                if gallery_version is not None:
+                    f.write(f"Gallery Version: {gallery_version}\n")
+                f.write("\n")
                 
                 f.write("-" * 70 + "\n")
                 f.write("ATTENDANCE SUMMARY\n")
@@ -105,10 +110,15 @@ class ReportGenerator:
                 f.write("PRESENT STUDENTS\n")
                 f.write("-" * 70 + "\n\n")
                 
+                # Burst fusion ho toh har student ka confidence bhi likhte hai
+                confidence = getattr(attendance, "confidence", {})
                 if present:
                     for i, name in enumerate(sorted(present), 1):
                         formatted_name = self._format_student_name(name)
-                        f.write(f"{i}. {formatted_name}\n")
+                        if name in confidence:
+                            f.write(f"{i}. {formatted_name} (confidence {confidence[name]:.2f})\n")
+                        else:
+                            f.write(f"{i}. {formatted_name}\n")
                 else:
                     f.write("Koi nahi aaya (No students present)\n")
                 
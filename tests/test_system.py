@@ -28,6 +28,7 @@ def test_imports():
         'docx': 'python-docx',
         'schedule': 'schedule',
         'deepface': 'deepface',
+        'onnxruntime': 'onnxruntime',
         'numpy': 'numpy'
     }
     
@@ -98,6 +99,1049 @@ def test_camera():
         print(f"  [FAIL] Camera test failed: {e}")
         return False
 
+def test_video_source():
+    """Test frame grabber with a video file instead of a webcam"""
+    print_header("Testing Frame Grabber (Video Source)")
+    
+    try:
+        import cv2
+        import tempfile
+        import numpy as np
+        from image_capture import ImageCapture
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            video_path = os.path.join(tmp, "grabber_test.avi")
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (320, 240))
+            for i in range(30):
+                frame = np.full((240, 320, 3), i * 8, dtype=np.uint8)
+                writer.write(frame)
+            writer.release()
+            
+            capture = ImageCapture(source=video_path, buffer_size=4)
+            try:
+                if not capture.initialize_camera():
+                    print("  [FAIL] Could not open video source")
+                    return False
+                
+                frame = capture.get_frame()
+                if frame is None or frame.shape[:2] != (240, 320):
+                    print("  [FAIL] get_frame returned no frame")
+                    return False
+                print(f"  [PASS] get_frame: {frame.shape[1]}x{frame.shape[0]}")
+                
+                frames = capture.capture_multiple_frames(count=3, interval=0.1)
+                if len(frames) != 3:
+                    print(f"  [FAIL] Burst returned {len(frames)}/3 frames")
+                    return False
+                print("  [PASS] Burst capture returned 3 frames")
+                
+                buffered = capture.get_recent_frames()
+                ids = [frame_id for _, frame_id, _ in buffered]
+                if len(buffered) > 4 or ids != sorted(ids):
+                    print(f"  [FAIL] Ring buffer out of order or over size: {ids}")
+                    return False
+                print(f"  [PASS] Ring buffer holds {len(buffered)} latest frames")
+            finally:
+                capture.release_camera()
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Frame grabber test failed: {e}")
+        return False
+
+def test_nms():
+    """Test SCRFD non-maximum suppression"""
+    print_header("Testing Non-Maximum Suppression")
+    
+    try:
+        import numpy as np
+        from core.scrfd import nms
+        
+        if len(nms(np.zeros((0, 5), dtype=np.float32))) != 0:
+            print("  [FAIL] Empty input")
+            return False
+        
+        dets = np.array([[0, 0, 100, 100, 0.8],      # overlaps the best box heavily
+                         [10, 10, 110, 110, 0.9],    # best
+                         [200, 200, 300, 300, 0.7],  # separate face
+                         [60, 60, 160, 160, 0.95]],  # touches the best box, IoU < 0.4
+                        dtype=np.float32)
+        keep = list(nms(dets, iou_threshold=0.4))
+        if keep != [3, 1, 2]:
+            print(f"  [FAIL] Kept {keep}, expected [3, 1, 2]")
+            return False
+        print("  [PASS] Overlapping box suppressed, others kept by score")
+        
+        if list(nms(dets, iou_threshold=0.9)) != [3, 1, 0, 2]:
+            print("  [FAIL] High threshold should keep all boxes")
+            return False
+        print("  [PASS] Threshold respected")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] NMS test failed: {e}")
+        return False
+
+class _SquareModel:
+    """Stub SCRFD: every bright square is a face; misses all faces in images larger than a tile"""
+    def __init__(self, max_side):
+        self.max_side = max_side
+    def detect(self, image, input_size=None, max_num=0, metric='default'):
+        import cv2
+        import numpy as np
+        if max(image.shape[:2]) > self.max_side:
+            return np.zeros((0, 5), dtype=np.float32), np.zeros((0, 5, 2), dtype=np.float32)
+        mask = (image[:, :, 0] > 128).astype(np.uint8)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+        boxes = [[x, y, x + w, y + h, 0.9] for x, y, w, h, _ in stats[1:count]]
+        kpss = [[c] * 5 for c in centroids[1:count]]
+        return np.array(boxes, dtype=np.float32).reshape(-1, 5), np.array(kpss, dtype=np.float32).reshape(-1, 5, 2)
+
+def test_detector_input_size():
+    """Test aspect-preserving SCRFD input sizes"""
+    print_header("Testing Detector Input Size")
+    
+    try:
+        from core.detector import FaceDetector
+        
+        detector = FaceDetector(min_input_side=640, max_input_side=1280)
+        expected = {
+            (480, 640, 3): (640, 480),     # webcam frame: native size, no letterbox
+            (3000, 4000, 3): (1280, 960),  # phone photo: long side clamped
+            (120, 160, 3): (640, 480),     # small image: upscaled to min_input_side
+        }
+        for shape, size in expected.items():
+            if detector.input_size_for(shape) != size:
+                print(f"  [FAIL] {shape[1]}x{shape[0]} -> {detector.input_size_for(shape)}, expected {size}")
+                return False
+        if detector.input_size_for((3000, 4000), max_side=640) != (640, 480):
+            print("  [FAIL] max_side override ignored")
+            return False
+        print("  [PASS] Aspect ratio kept, long side clamped to [640, 1280]")
+        
+        for shape in ((333, 500), (500, 333), (1080, 1920), (2000, 777), (37, 41)):
+            w, h = detector.input_size_for(shape)
+            if w % 32 or h % 32 or not 640 <= max(w, h) <= 1280 + 32:
+                print(f"  [FAIL] {shape[1]}x{shape[0]} -> {w}x{h}")
+                return False
+        print("  [PASS] Both sides are multiples of 32")
+        
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Detector input size test failed: {e}")
+        return False
+
+def test_tiled_detection():
+    """Test merging of tiled detections (faces on and across tile borders)"""
+    print_header("Testing Tiled Detection")
+    
+    try:
+        import numpy as np
+        from core.detector import FaceDetector, tile_origins
+        
+        if tile_origins(2000, 1024, 192) != [0, 832, 976] or tile_origins(1000, 1024, 192) != [0]:
+            print("  [FAIL] Tile origins do not cover the image")
+            return False
+        
+        detector = FaceDetector(tiling='on', tile_size=1024, tile_overlap=192)
+        detector.model = _SquareModel(max_side=1024)
+        image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+        faces = [(100, 400), (1000, 400), (900, 100), (1900, 700)]  # (x, y) of 60px faces
+        for x, y in faces:
+            image[y:y + 60, x:x + 60] = 255
+        
+        bboxes, kpss = detector.detect_raw(image)
+        found = sorted((int(b[0]), int(b[1]), int(b[2]), int(b[3])) for b in bboxes)
+        expected = sorted((x, y, x + 60, y + 60) for x, y in faces)
+        if found != expected:
+            print(f"  [FAIL] Boxes {found}, expected {expected}")
+            return False
+        print("  [PASS] Face split by a tile edge found once, in full")
+        
+        centers = (bboxes[:, :2] + bboxes[:, 2:4]) / 2
+        if kpss is None or not np.allclose(kpss[:, 0], centers - 0.5, atol=0.01):
+            print("  [FAIL] Landmarks not shifted into image coordinates")
+            return False
+        print("  [PASS] Landmarks shifted into image coordinates")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Tiled detection test failed: {e}")
+        return False
+
+def test_face_tracker():
+    """Test live face tracking: IDs across ticks and identity reuse"""
+    print_header("Testing Face Tracker")
+    
+    try:
+        import numpy as np
+        from core.tracker import FaceTracker
+        
+        tracker = FaceTracker(iou_threshold=0.3, centroid_threshold=0.8, max_misses=1,
+                              reverify_seconds=300, unknown_reverify_seconds=60)
+        om, riya = [100, 100, 200, 200, 0.9], [400, 100, 500, 200, 0.9]
+        
+        first = tracker.update(np.array([om, riya]), now=0.0)
+        if not all(tracker.needs_embedding(t, 0.0) for t in first):
+            print("  [FAIL] New tracks must be embedded")
+            return False
+        tracker.assign(first[0], "10_Om", 0.8, True, now=0.0)
+        tracker.assign(first[1], None, 0.2, False, now=0.0)
+        
+        # Small movement: same tracks (in detection order), identity reused
+        moved = tracker.update(np.array([[410, 105, 510, 205, 0.9], [105, 100, 205, 200, 0.9]]), now=10.0)
+        if [t.track_id for t in moved] != [first[1].track_id, first[0].track_id]:
+            print("  [FAIL] Track IDs not kept across ticks")
+            return False
+        if tracker.needs_embedding(moved[1], 10.0) or moved[1].identity != "10_Om":
+            print("  [FAIL] Recognized track re-embedded too early")
+            return False
+        print("  [PASS] IDs kept across ticks, identity reused")
+        
+        # Large jump between sparse ticks: centroid fallback keeps the track
+        jumped = tracker.update(np.array([[165, 100, 265, 200, 0.9]]), now=20.0)
+        if jumped[0].track_id != first[0].track_id:
+            print("  [FAIL] Centroid fallback did not keep the track")
+            return False
+        if not tracker.needs_embedding(jumped[0], 20.0):
+            print("  [FAIL] Weak association should lower confidence below the re-embed threshold")
+            return False
+        print("  [PASS] Large jump kept by centroid, re-verified")
+        
+        # Recognized tracks re-verify after reverify_seconds, unknown ones sooner
+        tracker.assign(jumped[0], "10_Om", 0.8, True, now=20.0)
+        if tracker.needs_embedding(jumped[0], 319.0) or not tracker.needs_embedding(jumped[0], 320.0):
+            print("  [FAIL] Recognized track re-verify interval")
+            return False
+        if tracker.needs_embedding(moved[0], 59.0) or not tracker.needs_embedding(moved[0], 60.0):
+            print("  [FAIL] Unknown track re-verify interval")
+            return False
+        
+        # Riya's track was missed at t=20; one more miss drops it, a far face is a new track
+        new = tracker.update(np.array([[165, 100, 265, 200, 0.9], [800, 500, 900, 600, 0.9]]), now=30.0)
+        ids = {t.track_id for t in tracker.tracks}
+        if first[1].track_id in ids or new[1].track_id in (first[0].track_id, first[1].track_id):
+            print(f"  [FAIL] Track bookkeeping: {sorted(ids)}")
+            return False
+        print("  [PASS] Missed tracks dropped, new faces get new IDs")
+        
+        # Gallery changed: keep tracks, re-embed everyone
+        tracker.reset_identities(gallery_version=2)
+        if not all(tracker.needs_embedding(t, 30.0) for t in tracker.tracks):
+            print("  [FAIL] reset_identities did not force re-embedding")
+            return False
+        
+        # Face walking steadily, then faster: only the Kalman prediction keeps up
+        # (70px steps leave IoU < 0.3 with the last box)
+        xs = [100 + 40 * step for step in range(8)]
+        xs += [xs[-1] + 70, xs[-1] + 140]
+        for use_kalman, expected_ids in ((True, 1), (False, 3)):
+            walker = FaceTracker(iou_threshold=0.3, centroid_threshold=0.0, use_kalman=use_kalman)
+            ids = {walker.update(np.array([[x, 100, x + 100, 200, 0.9]]), now=float(step))[0].track_id
+                   for step, x in enumerate(xs)}
+            if len(ids) != expected_ids:
+                print(f"  [FAIL] use_kalman={use_kalman}: {len(ids)} tracks, expected {expected_ids}")
+                return False
+        print("  [PASS] Kalman prediction keeps a moving face")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Face tracker test failed: {e}")
+        return False
+
+def test_quality_gate():
+    """Test face quality gate, including frames without faces"""
+    print_header("Testing Face Quality Gate")
+    
+    try:
+        import numpy as np
+        from core.quality import QualityGate
+        
+        gate = QualityGate(min_size=50, min_score=0.6)
+        
+        # Detectors return (0, 5) boxes for an empty frame
+        for kpss in (None, np.zeros((0, 5, 2), dtype=np.float32)):
+            quality = gate.assess(np.zeros((0, 5), dtype=np.float32), kpss)
+            gate.assess_sharpness(quality, np.zeros((0, 112, 112, 3), dtype=np.uint8))
+            if len(quality) != 0 or quality.records() != []:
+                print("  [FAIL] Zero detections did not give an empty result")
+                return False
+        print("  [PASS] Zero detections give an empty result")
+        
+        bboxes = np.array([[0, 0, 100, 100, 0.9],
+                           [0, 0, 20, 20, 0.9],
+                           [0, 0, 100, 100, 0.3]], dtype=np.float32)
+        quality = gate.assess(bboxes, None)
+        reasons = [record['reason'] for record in quality.records()]
+        if reasons != [None, 'small', 'low_score']:
+            print(f"  [FAIL] Unexpected rejection reasons: {reasons}")
+            return False
+        print("  [PASS] Small and low-score faces rejected")
+        
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Quality gate test failed: {e}")
+        return False
+
+class _StubDetector:
+    """Whole frame is one face unless the frame is black; None frames raise"""
+    def detect(self, frame, tiled=None):
+        import numpy as np
+        if frame.mean() < 10:
+            return np.zeros((0, 5), dtype=np.float32), None
+        h, w = frame.shape[:2]
+        return np.array([[0, 0, w, h, 0.9]], dtype=np.float32), None
+
+class _StubEmbedder:
+    """Embedding from the mean brightness of the aligned face"""
+    backend_id = "stub"
+    embedded = 0
+    def get_embeddings_aligned(self, faces, max_batch_size=None):
+        import numpy as np
+        self.embedded += len(faces)
+        embs = np.zeros((len(faces), 8), dtype=np.float32)
+        for i, face in enumerate(faces):
+            embs[i, int(face.mean()) // 32] = 1.0
+        return embs
+
+def _stub_recognizer(tmp):
+    """FaceRecognitionModule with stub models and a gallery in tmp (no model files needed)"""
+    import threading
+    from face_recognition_module import FaceRecognitionModule
+    from core.quality import QualityGate
+    from core.result_cache import ResultCache
+    from core.tracker import FaceTracker
+    from core.database import FaceDatabase
+    from core.manifest import EmbeddingManifest
+    
+    fr = FaceRecognitionModule.__new__(FaceRecognitionModule)
+    fr.detector = _StubDetector()
+    fr.embedder = _StubEmbedder()
+    fr.similarity_threshold = 0.55
+    fr.quality_gate = QualityGate()
+    fr.result_cache = ResultCache()
+    fr.model_fingerprint = "stub"
+    fr.tracker = FaceTracker()
+    fr._live_lock = threading.Lock()
+    fr.enroll_prepared = ResultCache()
+    fr._train_lock = threading.RLock()
+    fr.db = FaceDatabase(db_path=os.path.join(tmp, "gallery.json"), backend="stub")
+    fr.manifest = EmbeddingManifest(os.path.join(tmp, "manifest.json"), backend="stub",
+                                    quality_gate=fr.quality_gate)
+    return fr
+
+def _textured_frame(brightness, seed=0):
+    """Frame sharp enough for the quality gate"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(brightness, 20, (200, 200, 3)), 0, 255).astype(np.uint8)
+
+def test_burst_fusion():
+    """Test burst recognition with frames with and without faces"""
+    print_header("Testing Burst Fusion")
+    
+    try:
+        import tempfile
+        import numpy as np
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            fr = _stub_recognizer(tmp)
+            face = _textured_frame(100)
+            fr.db.add_student(name="Om", roll="10", embedding=fr.embedder.get_embeddings_aligned(face[None])[0])
+            fr.db.add_student(name="Riya", roll="11", embedding=np.eye(8, dtype=np.float32)[7])
+            empty = np.zeros_like(face)
+            
+            attendance = fr.recognize_burst([face, empty], mode='max')
+            if attendance.get("10_Om") != "Present" or attendance.get("11_Riya") != "Absent":
+                print(f"  [FAIL] Face + empty frame: {dict(attendance)}")
+                return False
+            print("  [PASS] Empty frame does not discard the face frame")
+            
+            attendance = fr.recognize_burst([empty, face, None], mode='max')
+            if attendance.get("10_Om") != "Present":
+                print(f"  [FAIL] Broken frame reset the burst: {dict(attendance)}")
+                return False
+            print("  [PASS] Broken frame keeps matches of the other frames")
+            
+            attendance = fr.recognize_burst([face, empty, empty], mode='vote', min_votes=2)
+            if attendance.get("10_Om") != "Absent" or abs(attendance.confidence["10_Om"] - 1 / 3) > 1e-6:
+                print(f"  [FAIL] Vote mode: {dict(attendance)} {attendance.confidence}")
+                return False
+            print("  [PASS] Vote mode needs min_votes frames")
+        
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Burst fusion test failed: {e}")
+        return False
+
+def test_result_cache():
+    """Test result cache eviction, statistics and keying of recognize_faces"""
+    print_header("Testing Result Cache")
+    
+    try:
+        import cv2
+        import tempfile
+        from core.result_cache import ResultCache
+        
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        if cache.get("b") is not None or cache.get("a") != 1 or len(cache) != 2:
+            print("  [FAIL] Least recently used entry not evicted")
+            return False
+        stats = cache.stats()
+        if (stats["hits"], stats["misses"], stats["evictions"]) != (2, 1, 1) or abs(stats["hit_rate"] - 2 / 3) > 1e-6:
+            print(f"  [FAIL] Stats: {stats}")
+            return False
+        print("  [PASS] Entry limit evicts the least recently used, hits/misses counted")
+        
+        cache = ResultCache(max_entries=10, max_bytes=100)
+        cache.put("x", 1, nbytes=60)
+        cache.put("y", 2, nbytes=60)
+        cache.put("z", 3, nbytes=200)
+        if cache.get("x") is not None or cache.get("y") != 2 or cache.get("z") is not None \
+                or cache.stats()["bytes"] != 60:
+            print(f"  [FAIL] Byte limit: {cache.stats()}")
+            return False
+        print("  [PASS] Byte limit evicts old entries and skips oversized ones")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            fr = _stub_recognizer(tmp)
+            photo = os.path.join(tmp, "class.jpg")
+            cv2.imwrite(photo, _textured_frame(100))
+            
+            first = fr.recognize_faces(photo)
+            first.face_quality[0]["passed"] = False
+            second = fr.recognize_faces(photo)
+            if fr.embedder.embedded != 1 or fr.result_cache.stats()["hits"] != 1:
+                print(f"  [FAIL] Same photo embedded again ({fr.embedder.embedded} embeddings)")
+                return False
+            if not second.face_quality[0]["passed"]:
+                print("  [FAIL] Cached quality records were modified through a result")
+                return False
+            print("  [PASS] Same photo served from the cache, results get their own records")
+            
+            fr.model_fingerprint = "other"
+            fr.recognize_faces(photo)
+            if fr.embedder.embedded != 2:
+                print("  [FAIL] Different model fingerprint hit the cache")
+                return False
+            print("  [PASS] Different model fingerprint misses the cache")
+        
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Result cache test failed: {e}")
+        return False
+
+def test_motion_gate():
+    """Test motion gating of live analysis with synthetic frames"""
+    print_header("Testing Motion Gate")
+    
+    try:
+        from motion_gate import MotionGate
+        
+        gate = MotionGate(enabled=True, width=160, pixel_threshold=25, threshold=0.02,
+                          early_threshold=0.2, min_gap=5, force_minutes=1, check_fps=2)
+        scene = _textured_frame(100)
+        changed = scene.copy()
+        changed[:, :100] = 255
+        
+        if gate.check(scene, due=True, now=1000.0) != 'first':
+            print("  [FAIL] First due frame not analyzed")
+            return False
+        if gate.check(scene, due=True, now=1010.0) is not None:
+            print("  [FAIL] Identical frame analyzed")
+            return False
+        print("  [PASS] Identical frame skipped")
+        
+        # Big change between intervals: early, but not before min_gap since the last analysis
+        if gate.check(changed, due=False, now=1012.0) != 'early':
+            print("  [FAIL] Large change not analyzed early")
+            return False
+        if gate.check(scene, due=False, now=1014.0) is not None:
+            print("  [FAIL] Early analysis inside min_gap")
+            return False
+        if gate.check(scene, due=False, now=1017.0) != 'early':
+            print("  [FAIL] Early analysis after min_gap")
+            return False
+        print("  [PASS] Large change triggers early analysis, respecting min_gap")
+        
+        if gate.check(scene, due=True, now=1070.0) is not None:
+            print("  [FAIL] Static scene analyzed before the force timeout")
+            return False
+        if gate.check(scene, due=True, now=1077.0) != 'refresh':
+            print("  [FAIL] No forced analysis after the timeout")
+            return False
+        if gate.check(changed, due=True, now=1080.0) != 'motion':
+            print("  [FAIL] Change at the interval not analyzed")
+            return False
+        print("  [PASS] Forced analysis after the timeout, motion at the interval")
+        
+        stats = gate.stats()
+        if (stats['executed'], stats['skipped'], stats['early']) != (5, 2, 2):
+            print(f"  [FAIL] Stats: {stats}")
+            return False
+        print("  [PASS] Stats counted")
+        
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Motion gate test failed: {e}")
+        return False
+
+def test_gallery_storage():
+    """Test gallery save/load (keys JSON + memory-mapped matrix)"""
+    print_header("Testing Gallery Storage")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from core.database import FaceDatabase
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "gallery.json")
+            db = FaceDatabase(db_path=db_path, backend="stub")
+            db.add_student(name="Om", roll="10", embedding=np.array([3, 4, 0], dtype=np.float32))
+            db.add_student(name="Riya", roll="11", embedding=np.array([0, 0, 2], dtype=np.float32))
+            db.add_student(name="Aman", roll="12", embedding=np.array([1, 0, 0], dtype=np.float32))
+            db.save_database()
+            
+            loaded = FaceDatabase(db_path=db_path, backend="stub")
+            if loaded.keys != ["10_Om", "11_Riya", "12_Aman"]:
+                print(f"  [FAIL] Keys after reload: {loaded.keys}")
+                return False
+            if not isinstance(loaded.snapshot().matrix, np.memmap):
+                print("  [FAIL] Matrix not memory-mapped after load")
+                return False
+            if not np.allclose(loaded.search_by_key("10_Om"), [0.6, 0.8, 0]):
+                print("  [FAIL] Embeddings not stored normalized")
+                return False
+            print("  [PASS] Keys and normalized matrix round-trip, memory-mapped")
+            
+            # Delete keeps enrollment order; old generation files are cleaned up
+            loaded.remove_student("11_Riya")
+            loaded.save_database()
+            reloaded = FaceDatabase(db_path=db_path, backend="stub")
+            if reloaded.keys != ["10_Om", "12_Aman"] or not np.allclose(reloaded.search_by_key("12_Aman"), [1, 0, 0]):
+                print(f"  [FAIL] Delete: {reloaded.keys}")
+                return False
+            matrices = [f for f in os.listdir(tmp) if f.endswith(".npy")]
+            if len(matrices) != 1:
+                print(f"  [FAIL] Stale matrix files left: {matrices}")
+                return False
+            print("  [PASS] Delete keeps order, one matrix generation on disk")
+            
+            # A gallery of another embedder is not loaded
+            other = FaceDatabase(db_path=db_path, backend="other")
+            if other.keys or other.mismatched_backend != "stub":
+                print("  [FAIL] Gallery of another backend was loaded")
+                return False
+            print("  [PASS] Gallery of another backend flagged, not loaded")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Gallery storage test failed: {e}")
+        return False
+
+def test_gallery_snapshots():
+    """Test snapshot isolation and version bumps of the gallery"""
+    print_header("Testing Gallery Snapshots")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from core.database import FaceDatabase
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "gallery.json")
+            db = FaceDatabase(db_path=db_path, backend="stub")
+            with db.transaction():
+                db.add_student(name="Om", roll="10", embedding=np.array([1, 0, 0], dtype=np.float32))
+                db.add_student(name="Riya", roll="11", embedding=np.array([0, 1, 0], dtype=np.float32))
+            db.save_database()
+            
+            # Start from the memory-mapped gallery, like after a restart
+            db = FaceDatabase(db_path=db_path, backend="stub")
+            before = db.snapshot()
+            with db.transaction():
+                db.add_student(name="Om", roll="10", embedding=np.array([0, 0, 1], dtype=np.float32))
+                db.remove_student("11_Riya")
+                db.add_student(name="Aman", roll="12", embedding=np.array([0, 1, 1], dtype=np.float32))
+                if db.snapshot() is not before:
+                    print("  [FAIL] Snapshot published inside a transaction")
+                    return False
+            after = db.snapshot()
+            
+            if before.keys != ("10_Om", "11_Riya") or not np.allclose(before.search_by_key("10_Om"), [1, 0, 0]):
+                print(f"  [FAIL] Old snapshot changed: {before.keys}")
+                return False
+            if after.keys != ("10_Om", "12_Aman") or not np.allclose(after.search_by_key("10_Om"), [0, 0, 1]):
+                print(f"  [FAIL] New snapshot: {after.keys}")
+                return False
+            if before.matrix.flags.writeable or after.matrix.flags.writeable:
+                print("  [FAIL] Snapshot matrix is writable")
+                return False
+            print("  [PASS] Readers keep their snapshot while a writer updates")
+            
+            if after.version != before.version + 1:
+                print(f"  [FAIL] Version {before.version} -> {after.version}, expected one bump per transaction")
+                return False
+            with db.transaction():
+                pass
+            if db.snapshot() is not after:
+                print("  [FAIL] Empty transaction published a new version")
+                return False
+            db.save_database()
+            if FaceDatabase(db_path=db_path, backend="stub").snapshot().version != after.version:
+                print("  [FAIL] Saved generation differs from snapshot version")
+                return False
+            print("  [PASS] One version per transaction, saved as the generation")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Gallery snapshot test failed: {e}")
+        return False
+
+def test_legacy_migration():
+    """Test migration of the old pickle database"""
+    print_header("Testing Legacy Database Migration")
+    
+    try:
+        import pickle
+        import tempfile
+        import numpy as np
+        from core.database import FaceDatabase, UNTAGGED_BACKEND
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, "face_encodings.pkl")
+            with open(legacy_path, 'wb') as f:
+                pickle.dump({"10_Om": np.ones(4, dtype=np.float32)}, f)
+            
+            # Pickle embeddings come from the untagged backend: migrated as-is
+            db = FaceDatabase(db_path=os.path.join(tmp, "a.json"), legacy_path=legacy_path,
+                              backend=UNTAGGED_BACKEND)
+            if db.keys != ["10_Om"] or db.mismatched_backend is not None:
+                print(f"  [FAIL] Pickle not migrated: {db.keys}")
+                return False
+            reloaded = FaceDatabase(db_path=os.path.join(tmp, "a.json"), backend=UNTAGGED_BACKEND)
+            if reloaded.keys != ["10_Om"] or not np.allclose(reloaded.matrix[0], 0.5):
+                print("  [FAIL] Migrated gallery not saved normalized")
+                return False
+            print("  [PASS] Pickle migrated and saved")
+            
+            # Another backend cannot use them: must be flagged for retraining
+            db = FaceDatabase(db_path=os.path.join(tmp, "b.json"), legacy_path=legacy_path,
+                              backend="other_backend")
+            if db.keys or db.mismatched_backend != UNTAGGED_BACKEND:
+                print(f"  [FAIL] Unusable pickle not flagged: {db.keys} {db.mismatched_backend}")
+                return False
+            print("  [PASS] Pickle from another backend flagged for retraining")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Legacy migration test failed: {e}")
+        return False
+
+def test_presence_ledger():
+    """Test presence ledger marking, gaps and dwell-time attendance"""
+    print_header("Testing Presence Ledger")
+    
+    try:
+        import tempfile
+        from core.presence import PresenceLedger
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            start = 1_000_000.0
+            minute = 60.0
+            ledger = PresenceLedger(tmp, "session", tick_seconds=minute, initial_hours=1,
+                                    start=start, max_gap_seconds=15 * minute)
+            
+            # Samples every 5 minutes: minutes between two sightings count too
+            ledger.mark(["Om", "Riya"], start)
+            ledger.mark(["Om"], start + 5 * minute)
+            ledger.mark(["Om", "Riya"], start + 10 * minute)
+            present, observed = ledger.present_ticks()
+            if observed != 11 or present != {"Om": 11, "Riya": 2}:
+                print(f"  [FAIL] Interpolation: {present}, observed {observed}")
+                return False
+            print("  [PASS] Ticks between two sightings are filled in")
+            
+            # Scene unchanged: whoever was seen last is still there
+            ledger.hold(start + 12 * minute)
+            present, observed = ledger.present_ticks()
+            if observed != 13 or present != {"Om": 13, "Riya": 4}:
+                print(f"  [FAIL] Hold: {present}, observed {observed}")
+                return False
+            print("  [PASS] Hold carries the last sighting forward")
+            
+            # Camera off for 9 hours: the gap is not counted (array grows for it)
+            ledger.mark(["Om"], start + 12 * minute + 9 * 3600)
+            present, observed = ledger.present_ticks()
+            if observed != 14 or present["Om"] != 14:
+                print(f"  [FAIL] Long gap counted: {present}, observed {observed}")
+                return False
+            print("  [PASS] Gap longer than max_gap_seconds is not filled in")
+            
+            # Resume from disk
+            resumed = PresenceLedger(tmp, "session", tick_seconds=minute, start=start)
+            if resumed.present_ticks() != (present, observed):
+                print("  [FAIL] Resumed ledger differs")
+                return False
+            print("  [PASS] Ledger resumes from disk")
+            
+            # 14 observed minutes < 20 minute dwell: fraction rule applies
+            statuses, fractions = ledger.attendance(keys=["Om", "Riya", "Aman"],
+                                                    min_dwell_minutes=20, min_fraction=0.5)
+            if statuses != {"Om": "Present", "Riya": "Absent", "Aman": "Absent"}:
+                print(f"  [FAIL] Short session attendance: {statuses}")
+                return False
+            
+            # 30 observed minutes: 20 minutes dwell needed, 15 is not enough
+            long_ledger = PresenceLedger(tmp, "long", tick_seconds=minute, start=start)
+            for i in range(30):
+                long_ledger.mark(["Om"] + (["Riya"] if i < 15 else []), start + i * minute)
+            statuses, _ = long_ledger.attendance(min_dwell_minutes=20, min_fraction=0.5)
+            if statuses != {"Om": "Present", "Riya": "Absent"}:
+                print(f"  [FAIL] Full session attendance: {statuses}")
+                return False
+            print("  [PASS] Dwell time required once the session is long enough")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Presence ledger test failed: {e}")
+        return False
+
+def test_scheduler():
+    """Test inference scheduler ordering, coalescing and dropping"""
+    print_header("Testing Inference Scheduler")
+    
+    try:
+        import threading
+        import time
+        from core.scheduler import (InferenceScheduler, PRIORITY_CAPTURE, PRIORITY_UPLOAD,
+                                    PRIORITY_TRAINING, PRIORITY_LIVE)
+        
+        # One worker held by a blocking job, so the queue fills deterministically
+        scheduler = InferenceScheduler(max_workers=1, max_queue=3)
+        try:
+            empty_keys = set(scheduler.stats())
+            started, release = threading.Event(), threading.Event()
+            
+            def blocker():
+                started.set()
+                release.wait(5)
+            
+            order = []
+            scheduler.submit(PRIORITY_CAPTURE, blocker)
+            started.wait(5)
+            
+            live = scheduler.submit(PRIORITY_LIVE, order.append, "live", max_age=10)
+            training_old = scheduler.submit(PRIORITY_TRAINING, order.append, "training_old", coalesce_key="train")
+            training = scheduler.submit(PRIORITY_TRAINING, order.append, "training", coalesce_key="train")
+            upload = scheduler.submit(PRIORITY_UPLOAD, order.append, "upload")
+            capture = scheduler.submit(PRIORITY_CAPTURE, order.append, "capture")
+            
+            # Queue full (3): the live job made room for capture, a new live job is rejected
+            rejected = scheduler.submit(PRIORITY_LIVE, order.append, "rejected", max_age=10)
+            if not (training_old.cancelled() and live.cancelled() and rejected.cancelled()):
+                print("  [FAIL] Coalesced/full-queue jobs were not dropped")
+                return False
+            print("  [PASS] Coalescing and full-queue dropping")
+            
+            release.set()
+            for future in (training, upload, capture):
+                future.result(timeout=5)
+            if order != ["capture", "upload", "training"]:
+                print(f"  [FAIL] Priority order: {order}")
+                return False
+            print("  [PASS] Jobs run in priority order")
+            
+            # A live job that waited longer than max_age is dropped as stale
+            started.clear()
+            release.clear()
+            scheduler.submit(PRIORITY_CAPTURE, blocker)
+            started.wait(5)
+            stale = scheduler.submit(PRIORITY_LIVE, order.append, "stale", max_age=0.01)
+            time.sleep(0.05)
+            release.set()
+            scheduler.submit(PRIORITY_CAPTURE, order.append, "after").result(timeout=5)
+            
+            stats = scheduler.stats()
+            if not stale.cancelled() or "stale" in order:
+                print("  [FAIL] Stale job was run")
+                return False
+            expected = {"dropped_replaced": 1, "dropped_full": 1, "rejected": 1, "dropped_stale": 1}
+            if any(stats[key] != value for key, value in expected.items()):
+                print(f"  [FAIL] Drop counters: {stats}")
+                return False
+            print("  [PASS] Stale jobs dropped and counted")
+            
+            if set(stats) != empty_keys:
+                print(f"  [FAIL] Stats keys changed: {sorted(set(stats) ^ empty_keys)}")
+                return False
+            print("  [PASS] Stats keys stable")
+        finally:
+            scheduler.shutdown()
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Scheduler test failed: {e}")
+        return False
+
+def test_concurrent_enrollment():
+    """Test enrolling while another thread recognizes against the empty gallery"""
+    print_header("Testing Concurrent Enrollment")
+    
+    try:
+        import cv2
+        import tempfile
+        import threading
+        import face_recognition_module
+        from core.database import FaceDatabase
+        
+        original_dataset = face_recognition_module.STUDENT_DATASET_DIR
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, "dataset")
+            face_recognition_module.STUDENT_DATASET_DIR = dataset
+            try:
+                fr = _stub_recognizer(tmp)
+                student_dir = os.path.join(dataset, "10_Om")
+                os.makedirs(student_dir)
+                image_path = os.path.join(student_dir, "0.jpg")
+                photo = os.path.join(tmp, "class.jpg")
+                cv2.imwrite(photo, _textured_frame(100, seed=9))
+                
+                stop = threading.Event()
+                errors = []
+                def recognize_loop():
+                    while not stop.is_set():
+                        try:
+                            fr.recognize_faces(photo)
+                        except Exception as e:
+                            errors.append(e)
+                            return
+                reader = threading.Thread(target=recognize_loop)
+                reader.start()
+                lost = None
+                try:
+                    # Every round starts from an empty gallery, the case the reader used to reload
+                    for i in range(40):
+                        cv2.imwrite(image_path, _textured_frame(60, seed=i))
+                        fr.enroll_student("10_Om")
+                        stored = FaceDatabase(db_path=os.path.join(tmp, "gallery.json"), backend="stub")
+                        if fr.db.keys != ["_10_Om"] or stored.keys != ["_10_Om"]:
+                            lost = (i, fr.db.keys, stored.keys)
+                            break
+                        os.remove(image_path)
+                        fr.enroll_student("10_Om")
+                finally:
+                    stop.set()
+                    reader.join()
+                
+                if errors:
+                    print(f"  [FAIL] Recognition raised: {errors[0]}")
+                    return False
+                if lost:
+                    print(f"  [FAIL] Enrolled student lost in round {lost[0]}: memory {lost[1]}, disk {lost[2]}")
+                    return False
+                print("  [PASS] Every enrolled student saved while recognition ran")
+            finally:
+                face_recognition_module.STUDENT_DATASET_DIR = original_dataset
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Concurrent enrollment test failed: {e}")
+        return False
+
+def test_training_manifest():
+    """Test incremental training: manifest reuse and pruning"""
+    print_header("Testing Training Manifest")
+    
+    try:
+        import cv2
+        import shutil
+        import tempfile
+        import numpy as np
+        import face_recognition_module
+        from core.database import FaceDatabase
+        from core.manifest import EmbeddingManifest
+        from core.quality import QualityGate
+        
+        original_dataset = face_recognition_module.STUDENT_DATASET_DIR
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, "dataset")
+            face_recognition_module.STUDENT_DATASET_DIR = dataset
+            try:
+                fr = _stub_recognizer(tmp)
+                for folder, brightness in (("10_Om", 60), ("11_Riya", 200)):
+                    os.makedirs(os.path.join(dataset, folder))
+                    for i in range(2):
+                        cv2.imwrite(os.path.join(dataset, folder, f"{folder}_{i}.jpg"),
+                                    _textured_frame(brightness, seed=i))
+                
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 4 or sorted(fr.db.keys) != ["_10_Om", "_11_Riya"]:
+                    print(f"  [FAIL] First training: {fr.embedder.embedded} embedded, {fr.db.keys}")
+                    return False
+                version = fr.db.version
+                
+                # Nothing changed: nothing embedded, gallery untouched
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 4 or fr.db.version != version:
+                    print("  [FAIL] Unchanged dataset was re-embedded")
+                    return False
+                print("  [PASS] Unchanged images reused from the manifest")
+                
+                # Touched and renamed files with the same content are reused by hash
+                om_dir = os.path.join(dataset, "10_Om")
+                os.utime(os.path.join(om_dir, "10_Om_0.jpg"), ns=(1, 1_000_000_000))
+                os.rename(os.path.join(om_dir, "10_Om_1.jpg"), os.path.join(om_dir, "renamed.jpg"))
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 4:
+                    print("  [FAIL] Touched/renamed image was re-embedded")
+                    return False
+                print("  [PASS] Touched and renamed images reused by content hash")
+                
+                # New image: only that one is embedded
+                cv2.imwrite(os.path.join(om_dir, "new.jpg"), _textured_frame(60, seed=5))
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 5:
+                    print(f"  [FAIL] Expected 1 new embedding, got {fr.embedder.embedded - 4}")
+                    return False
+                print("  [PASS] Only the new image embedded")
+                
+                # Removed student: gallery row and manifest entries dropped
+                shutil.rmtree(os.path.join(dataset, "11_Riya"))
+                fr.train_face_encodings()
+                stored = EmbeddingManifest(os.path.join(tmp, "manifest.json"), backend="stub")
+                if fr.db.keys != ["_10_Om"] or any(p.startswith("11_Riya/") for p in stored.entries):
+                    print(f"  [FAIL] Removed student kept: {fr.db.keys} {sorted(stored.entries)}")
+                    return False
+                if sorted(stored.entries) != ["10_Om/10_Om_0.jpg", "10_Om/new.jpg", "10_Om/renamed.jpg"]:
+                    print(f"  [FAIL] Manifest entries: {sorted(stored.entries)}")
+                    return False
+                print("  [PASS] Removed images pruned, manifest saved")
+                
+                # Last student removed: gallery and manifest emptied, not left as they were
+                shutil.rmtree(om_dir)
+                fr.train_face_encodings()
+                stored = EmbeddingManifest(os.path.join(tmp, "manifest.json"), backend="stub")
+                stored_db = FaceDatabase(db_path=os.path.join(tmp, "gallery.json"), backend="stub")
+                if fr.db.keys or stored_db.keys or stored.entries:
+                    print(f"  [FAIL] Last student kept: {fr.db.keys} {stored_db.keys} {sorted(stored.entries)}")
+                    return False
+                print("  [PASS] Empty dataset empties the gallery and manifest")
+                
+                # Rejected (blurry) face is re-gated once the gate settings change
+                aman_dir = os.path.join(dataset, "12_Aman")
+                os.makedirs(aman_dir)
+                cv2.imwrite(os.path.join(aman_dir, "sharp.jpg"), _textured_frame(150))
+                cv2.imwrite(os.path.join(aman_dir, "flat.jpg"), np.full((200, 200, 3), 90, dtype=np.uint8))
+                fr.train_face_encodings()
+                if fr.manifest.get_embedding("12_Aman/flat.jpg") is not None:
+                    print("  [FAIL] Blurry face was embedded")
+                    return False
+                fr = _stub_recognizer(tmp)
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 0:
+                    print("  [FAIL] Same gate settings re-detected rejected faces")
+                    return False
+                fr.quality_gate = QualityGate(min_sharpness=0)
+                fr.manifest = EmbeddingManifest(os.path.join(tmp, "manifest.json"), backend="stub",
+                                                quality_gate=fr.quality_gate)
+                fr.train_face_encodings()
+                if fr.embedder.embedded != 1 or fr.manifest.get_embedding("12_Aman/flat.jpg") is None:
+                    print(f"  [FAIL] Rejected face not re-gated: {fr.embedder.embedded} embedded")
+                    return False
+                print("  [PASS] Rejected faces re-gated after the gate settings change")
+            finally:
+                face_recognition_module.STUDENT_DATASET_DIR = original_dataset
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Training manifest test failed: {e}")
+        return False
+
+def test_enroll_student():
+    """Test single-student enrollment leaves other students untouched"""
+    print_header("Testing Student Enrollment")
+    
+    try:
+        import cv2
+        import tempfile
+        import numpy as np
+        import face_recognition_module
+        from core.database import FaceDatabase
+        
+        original_dataset = face_recognition_module.STUDENT_DATASET_DIR
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, "dataset")
+            face_recognition_module.STUDENT_DATASET_DIR = dataset
+            try:
+                fr = _stub_recognizer(tmp)
+                for folder, brightness in (("10_Om", 60), ("11_Riya", 200)):
+                    os.makedirs(os.path.join(dataset, folder))
+                    cv2.imwrite(os.path.join(dataset, folder, "0.jpg"), _textured_frame(brightness))
+                fr.train_face_encodings()
+                riya_row = fr.db.search_by_key("_11_Riya").copy()
+                riya_entries = {p: dict(e) for p, e in fr.manifest.entries.items() if p.startswith("11_Riya/")}
+                om_row = fr.db.search_by_key("_10_Om").copy()
+                
+                om_dir = os.path.join(dataset, "10_Om")
+                cv2.imwrite(os.path.join(om_dir, "1.jpg"), _textured_frame(150, seed=1))
+                if not fr.enroll_student("10_Om") or fr.embedder.embedded != 3:
+                    print(f"  [FAIL] Enrollment: {fr.embedder.embedded} embedded")
+                    return False
+                if np.allclose(fr.db.search_by_key("_10_Om"), om_row):
+                    print("  [FAIL] Enrolled student's row not updated")
+                    return False
+                stored_entries = {p: e for p, e in fr.manifest.entries.items() if p.startswith("11_Riya/")}
+                if not np.array_equal(fr.db.search_by_key("_11_Riya"), riya_row) or stored_entries != riya_entries:
+                    print("  [FAIL] Other student's row or manifest entries changed")
+                    return False
+                print("  [PASS] Only the enrolled student's row and manifest entries change")
+                
+                # Folder without any face: the student's old row is removed
+                for name in os.listdir(om_dir):
+                    os.remove(os.path.join(om_dir, name))
+                cv2.imwrite(os.path.join(om_dir, "empty.jpg"), np.zeros((200, 200, 3), dtype=np.uint8))
+                if fr.enroll_student("10_Om"):
+                    print("  [FAIL] Enrollment without a face reported success")
+                    return False
+                stored = FaceDatabase(db_path=os.path.join(tmp, "gallery.json"), backend="stub")
+                if fr.db.keys != ["_11_Riya"] or stored.keys != ["_11_Riya"]:
+                    print(f"  [FAIL] Student without a face kept: {fr.db.keys} {stored.keys}")
+                    return False
+                if not np.array_equal(stored.search_by_key("_11_Riya"), riya_row):
+                    print("  [FAIL] Other student's row changed")
+                    return False
+                print("  [PASS] Enrollment without a face removes the student's row")
+            finally:
+                face_recognition_module.STUDENT_DATASET_DIR = original_dataset
+        
+        return True
+        
+    except Exception as e:
+        print(f"  [FAIL] Student enrollment test failed: {e}")
+        return False
+
 def test_student_dataset():
     """Test student dataset"""
     print_header("Testing Student Dataset")
@@ -133,11 +1177,11 @@ def test_face_recognition():
     
     try:
         from face_recognition_module import FaceRecognitionModule
-        from config import ENCODINGS_FILE
+        from config import GALLERY_FILE
         
         fr = FaceRecognitionModule()
         
-        if os.path.exists(ENCODINGS_FILE):
+        if os.path.exists(GALLERY_FILE):
             print("  [PASS] Face encodings file exists")
             if fr.load_encodings():
                 students = fr.get_all_students()
@@ -189,6 +1233,7 @@ def test_modules():
     
     modules = [
         'image_capture',
+        'preview_detector',
         'face_recognition_module',
         'emotion_detection',
         'report_generator',
@@ -219,6 +1264,23 @@ def run_all_tests():
         ("Directory Structure", test_directory_structure),
         ("System Modules", test_modules),
         ("Camera", test_camera),
+        ("Frame Grabber", test_video_source),
+        ("Non-Maximum Suppression", test_nms),
+        ("Detector Input Size", test_detector_input_size),
+        ("Tiled Detection", test_tiled_detection),
+        ("Face Tracker", test_face_tracker),
+        ("Face Quality Gate", test_quality_gate),
+        ("Burst Fusion", test_burst_fusion),
+        ("Result Cache", test_result_cache),
+        ("Motion Gate", test_motion_gate),
+        ("Gallery Storage", test_gallery_storage),
+        ("Gallery Snapshots", test_gallery_snapshots),
+        ("Legacy Migration", test_legacy_migration),
+        ("Concurrent Enrollment", test_concurrent_enrollment),
+        ("Training Manifest", test_training_manifest),
+        ("Student Enrollment", test_enroll_student),
+        ("Presence Ledger", test_presence_ledger),
+        ("Inference Scheduler", test_scheduler),
         ("Student Dataset", test_student_dataset),
         ("Face Recognition", test_face_recognition),
         ("Email Configuration", test_email_config)